@@ -0,0 +1,248 @@
+"""
+Benchmark suite for the MapQuester API.
+
+    python -m benchmarks run [--target client|http] [--url URL] [--setup] ...
+    python -m benchmarks compare BASE HEAD [run options]
+    python -m benchmarks recommendations [--setup] [--scale ...] [--sqlite PATH]
+
+Run from mapquester_backend. See README.md ("Benchmarks").
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from .scenarios import SCENARIOS
+
+# Dataset sizes for --setup (users, POIs, interactions)
+SCALES = {
+    "small": (2000, 20000, 40000),
+    "medium": (20000, 200000, 400000),
+    "large": (200000, 2000000, 4000000),
+}
+# Seconds a request waits for the SQLite write lock
+SQLITE_TIMEOUT = 30
+
+
+def add_run_arguments(parser):
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Comma separated, from: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--warmup", type=int, default=5, help="Unmeasured requests per worker"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+
+
+def setup_django(app_dir=None, sqlite=None):
+    if app_dir:
+        sys.path.insert(0, os.path.abspath(app_dir))
+    if sqlite:
+        os.environ["DB_ENGINE"] = "django.db.backends.sqlite3"
+        os.environ["DB_NAME"] = os.path.abspath(sqlite)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mapquester.settings")
+    import django
+    from django.conf import settings
+
+    if sqlite:
+        # SQLite has a single write lock: concurrent writers wait for it instead
+        # of failing with "database is locked", and take it when the transaction
+        # starts so that a read followed by a write cannot deadlock
+        settings.DATABASES["default"].setdefault("OPTIONS", {}).update(
+            {"transaction_mode": "IMMEDIATE", "timeout": SQLITE_TIMEOUT}
+        )
+    django.setup()
+
+
+def setup_dataset(scale, seed):
+    from django.core.management import call_command
+
+    users, pois, interactions = SCALES[scale]
+    call_command("migrate", verbosity=0)
+    call_command(
+        "generate_benchmark_data",
+        users=users,
+        pois=pois,
+        interactions=interactions,
+        seed=seed,
+        clear=True,
+        stdout=sys.stderr,
+    )
+
+
+def parse_scenarios(value):
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return names
+
+
+def command_run(args):
+    scenarios = parse_scenarios(args.scenarios)
+    if args.concurrency < 1 or args.requests < 1:
+        raise SystemExit("--concurrency and --requests must be at least 1")
+    setup_django(args.app_dir, args.sqlite)
+    if args.setup:
+        setup_dataset(args.scale, args.seed)
+
+    from . import runner
+
+    if args.target == "http":
+        if not args.url:
+            raise SystemExit("--url is required with --target http")
+        target = runner.HttpTarget(args.url)
+    else:
+        target = runner.ClientTarget()
+
+    def log(name, summary):
+        def ms(value):
+            return "n/a" if value is None else f"{value:.2f}"
+
+        latency = summary["latency_ms"]
+        queries = summary["queries_per_request"]
+        print(
+            f"{name:<16} p50 {ms(latency['p50']):>8} ms  "
+            f"p95 {ms(latency['p95']):>8} ms  p99 {ms(latency['p99']):>8} ms  "
+            f"{summary['throughput_rps']:>8.1f} req/s  "
+            f"queries {queries['mean'] if queries else 'n/a'}  "
+            f"errors {summary['errors']}" + ("" if summary["valid"] else "  INVALID"),
+            file=sys.stderr,
+        )
+
+    report = runner.run(
+        target,
+        scenarios,
+        args.requests,
+        args.concurrency,
+        warmup=args.warmup,
+        seed=args.seed,
+        app_dir=args.app_dir or ".",
+        log=log,
+    )
+    write_json(report, args.output)
+
+
+def command_compare(args):
+    from .compare import compare, failed, format_diff
+
+    parse_scenarios(args.scenarios)
+    run_args = [
+        "--scenarios",
+        args.scenarios,
+        "--requests",
+        str(args.requests),
+        "--concurrency",
+        str(args.concurrency),
+        "--warmup",
+        str(args.warmup),
+        "--seed",
+        str(args.seed),
+        "--scale",
+        args.scale,
+    ]
+    diff = compare(args.base, args.head, run_args, args.threshold)
+    print(format_diff(diff), file=sys.stderr)
+    write_json(diff, args.output)
+    if failed(diff):
+        sys.exit(1)
+
+
+def command_recommendations(args):
+    import resource
+
+    setup_django(None, args.sqlite)
+    if args.setup:
+        setup_dataset(args.scale, args.seed)
+
+    from users.recommendations import compute_recommendations
+
+    def log(done, total):
+        print(f"{done}/{total} users", file=sys.stderr)
+
+    stats = compute_recommendations(max_fanout=args.max_fanout, log=log)
+    seconds = stats["load_seconds"] + stats["score_seconds"]
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    write_json(
+        {
+            **stats,
+            "seconds": round(seconds, 3),
+            "users_per_second": round(stats["users"] / seconds, 1) if seconds else None,
+            "peak_rss_mb": round(peak, 1),
+        },
+        args.output,
+    )
+
+
+def write_json(data, path):
+    text = json.dumps(data, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Benchmark the API and print a JSON report")
+    add_run_arguments(run)
+    run.add_argument("--target", choices=["client", "http"], default="client")
+    run.add_argument("--url", help="Base URL of the server for --target http")
+    run.add_argument(
+        "--setup",
+        action="store_true",
+        help="Migrate and generate a --scale dataset first (replaces bench_* users)",
+    )
+    run.add_argument("--sqlite", help="Use this SQLite database file")
+    run.add_argument("--app-dir", help="Benchmark the code in this directory")
+    run.add_argument("--output", help="Write the report here instead of stdout")
+    run.set_defaults(func=command_run)
+
+    compare = commands.add_parser(
+        "compare",
+        help="Benchmark two git revisions on fresh SQLite databases",
+    )
+    compare.add_argument("base", help="Base revision")
+    compare.add_argument("head", help='Head revision, "." for the working tree')
+    add_run_arguments(compare)
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="p95 latency increase reported as a regression (fraction)",
+    )
+    compare.add_argument("--output", help="Write the comparison here")
+    compare.set_defaults(func=command_compare)
+
+    recommendations = commands.add_parser(
+        "recommendations",
+        help="Time a full compute_recommendations run and print a JSON report",
+    )
+    recommendations.add_argument("--scale", choices=SCALES, default="small")
+    recommendations.add_argument("--seed", type=int, default=0)
+    recommendations.add_argument(
+        "--setup",
+        action="store_true",
+        help="Migrate and generate a --scale dataset first (replaces bench_* users)",
+    )
+    recommendations.add_argument("--max-fanout", type=int, default=500)
+    recommendations.add_argument("--sqlite", help="Use this SQLite database file")
+    recommendations.add_argument("--output", help="Write the report here")
+    recommendations.set_defaults(func=command_recommendations)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# Compares two git revisions: each one is checked out in a temporary worktree,
+# gets a fresh SQLite database with the same seeded dataset, and is benchmarked
+# by this copy of the suite with its own code on the import path. Both revisions
+# need the generate_benchmark_data command.
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Working tree of the current checkout, benchmarked without a worktree
+CURRENT = "."
+
+
+def _git(*args, cwd=BACKEND_DIR):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def benchmark_revision(revision, workdir, run_args, name="run"):
+    """
+    Benchmark a revision (or CURRENT) and return its report.
+    """
+    if revision == CURRENT:
+        app_dir = BACKEND_DIR
+    else:
+        top = Path(_git("rev-parse", "--show-toplevel"))
+        worktree = Path(workdir) / f"{name}-worktree"
+        _git("worktree", "add", "--detach", str(worktree), revision)
+        app_dir = worktree / BACKEND_DIR.relative_to(top)
+
+    output = Path(workdir) / f"{name}.json"
+    database = Path(workdir) / f"{name}.sqlite3"
+    try:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks",
+                "run",
+                "--app-dir",
+                str(app_dir),
+                "--sqlite",
+                str(database),
+                "--setup",
+                "--output",
+                str(output),
+                *run_args,
+            ],
+            cwd=BACKEND_DIR,
+            check=True,
+        )
+    finally:
+        if revision != CURRENT:
+            _git("worktree", "remove", "--force", str(worktree))
+    return json.loads(output.read_text())
+
+
+def _change(before, after):
+    if before is None or after is None:
+        return None
+    if before == 0:
+        return 0.0 if after == 0 else None
+    return round((after - before) / before, 4)
+
+
+def diff_reports(base, head, threshold=0.1):
+    """
+    Per scenario changes from base to head. A scenario regresses when its p95
+    latency grows by more than threshold (a fraction), it makes more queries per
+    request or it fails more requests. Scenarios with failed requests on either
+    side are also reported as invalid, their latencies are not comparable, and
+    scenarios of base that head did not run as missing.
+    """
+    scenarios = {}
+    missing = []
+    for name, before in base["scenarios"].items():
+        after = head["scenarios"].get(name)
+        if after is None:
+            missing.append(name)
+            continue
+        errors = [before["errors"], after["errors"]]
+        if any(errors):
+            reasons = []
+            if after["errors"] > before["errors"]:
+                reasons.append(f"errors {before['errors']} -> {after['errors']}")
+            scenarios[name] = {
+                "invalid": True,
+                "errors": errors,
+                "regressions": reasons,
+            }
+            continue
+        queries_before = (before["queries_per_request"] or {}).get("mean")
+        queries_after = (after["queries_per_request"] or {}).get("mean")
+        latency = {
+            key: _change(before["latency_ms"][key], after["latency_ms"][key])
+            for key in ("p50", "p95", "p99")
+        }
+        reasons = []
+        if latency["p95"] is not None and latency["p95"] > threshold:
+            reasons.append(f"p95 latency +{latency['p95']:.0%}")
+        if (
+            queries_before is not None
+            and queries_after is not None
+            and queries_after > queries_before + 0.5
+        ):
+            reasons.append(f"queries {queries_before} -> {queries_after}")
+        scenarios[name] = {
+            "invalid": False,
+            "latency_change": latency,
+            "throughput_change": _change(
+                before["throughput_rps"], after["throughput_rps"]
+            ),
+            "queries_per_request": [queries_before, queries_after],
+            "regressions": reasons,
+        }
+    return {
+        "base": base["meta"]["revision"],
+        "head": head["meta"]["revision"],
+        "threshold": threshold,
+        "scenarios": scenarios,
+        "regressed": sorted(name for name, s in scenarios.items() if s["regressions"]),
+        "invalid": sorted(name for name, s in scenarios.items() if s["invalid"]),
+        "missing": sorted(missing),
+    }
+
+
+def failed(diff):
+    """
+    Whether the comparison should fail: a scenario regressed, cannot be
+    compared or was not run on head.
+    """
+    return bool(diff["regressed"] or diff["invalid"] or diff["missing"])
+
+
+def compare(base, head, run_args, threshold=0.1):
+    workdir = tempfile.mkdtemp(prefix="mapquester-bench-")
+    try:
+        reports = [
+            benchmark_revision(base, workdir, run_args, "base"),
+            benchmark_revision(head, workdir, run_args, "head"),
+        ]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return diff_reports(*reports, threshold=threshold)
+
+
+def format_diff(diff):
+    lines = [
+        f"{'scenario':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}  queries",
+    ]
+
+    def pct(value):
+        return "n/a" if value is None else f"{value:+.0%}"
+
+    for name, s in diff["scenarios"].items():
+        if s["invalid"]:
+            before, after = s["errors"]
+            lines.append(
+                f"{name:<16}  INVALID: errors {before} -> {after}"
+                + (
+                    f"  REGRESSION: {', '.join(s['regressions'])}"
+                    if s["regressions"]
+                    else ""
+                )
+            )
+            continue
+        latency = s["latency_change"]
+        before, after = s["queries_per_request"]
+        lines.append(
+            f"{name:<16}{pct(latency['p50']):>9}{pct(latency['p95']):>9}"
+            f"{pct(latency['p99']):>9}{pct(s['throughput_change']):>9}  "
+            f"{before} -> {after}"
+            + (
+                f"  REGRESSION: {', '.join(s['regressions'])}"
+                if s["regressions"]
+                else ""
+            )
+        )
+    for name in diff["missing"]:
+        lines.append(f"{name:<16}  MISSING: not run on head")
+    return "\n".join(lines)
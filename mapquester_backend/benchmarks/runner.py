@@ -0,0 +1,388 @@
+# Runs the scenarios against a target with a pool of worker threads and reports
+# latency percentiles, throughput and database queries per request.
+#
+# Targets:
+# - client: in-process django.test.Client against the configured database. Each
+#   worker thread has its own database connection, queries are counted per
+#   request. The GIL serializes Python work, so concurrency mostly measures
+#   contention on the database and locks.
+# - http: a running server (runserver or gunicorn), with one keep-alive
+#   connection per worker. Queries are read from the Server-Timing header
+#   (health/instrumentation.py) when the server sends it.
+
+import http.client
+import json
+import math
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+from .scenarios import AFTER_RESPONSE, SCENARIOS
+
+FIXTURE_SIZE = 500
+
+
+@dataclass
+class Fixtures:
+    """
+    Sample of the dataset the scenarios draw from, as (id, username) pairs.
+    """
+
+    readers: list  # Users following the most accounts, with full feeds
+    authors: list  # Users with the most POIs
+    celebrities: list  # Most followed users
+    pois: list  # POI ids, the most reacted to and a random sample
+    centers: list  # (latitude, longitude) of sampled POIs, viewport centers
+
+    @classmethod
+    def load(cls, seed=0, size=FIXTURE_SIZE):
+        from django.db.models import Count, Max, Min
+        from pois.models import POI
+        from users.models import User
+
+        def top(queryset):
+            return list(queryset.values_list("id", "username")[:size])
+
+        users = User.objects.order_by("id")
+        readers = top(
+            users.annotate(count=Count("following"))
+            .filter(count__gt=0)
+            .order_by("-count", "id")
+        )
+        authors = top(
+            users.annotate(count=Count("poi"))
+            .filter(count__gt=0)
+            .order_by("-count", "id")
+        )
+        celebrities = top(
+            users.annotate(count=Count("followers"))
+            .filter(count__gt=0)
+            .order_by("-count", "id")
+        )
+
+        live = POI.objects.filter(isDeleted=False)
+        pois = list(
+            live.order_by("-reactions", "id").values_list("id", flat=True)[:size]
+        )
+        bounds = live.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is not None:
+            rng = random.Random(seed)
+            candidates = [
+                rng.randint(bounds["low"], bounds["high"]) for _ in range(size)
+            ]
+            pois += list(live.filter(id__in=candidates).values_list("id", flat=True))
+        centers = [
+            (float(latitude), float(longitude))
+            for latitude, longitude in live.filter(id__in=pois).values_list(
+                "latitude", "longitude"
+            )
+        ]
+
+        fixtures = cls(readers or top(users), authors, celebrities, pois, centers)
+        missing = [name for name, value in vars(fixtures).items() if not value]
+        if missing:
+            raise RuntimeError(
+                f"The database has no {', '.join(missing)} to benchmark, "
+                "generate a dataset with --setup"
+            )
+        return fixtures
+
+
+_tokens = {}
+_tokens_lock = threading.Lock()
+
+
+def _token(user):
+    # JWTs are minted directly instead of calling the (deliberately slow) login
+    from rest_framework_simplejwt.tokens import AccessToken
+    from users.models import User
+
+    with _tokens_lock:
+        if user not in _tokens:
+            _tokens[user] = str(
+                AccessToken.for_user(User(id=user[0], username=user[1]))
+            )
+        return _tokens[user]
+
+
+class ClientTarget:
+    name = "client"
+
+    def __init__(self):
+        from django.conf import settings
+        from django.test.utils import override_settings
+
+        # Allow the "testserver" host of the test client
+        override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ).enable()
+        self._local = threading.local()
+
+    def send(self, request):
+        from django.db import connection
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+
+        client = getattr(self._local, "client", None)
+        if client is None:
+            # Server errors are counted as failed requests, not raised
+            client = self._local.client = Client(raise_request_exception=False)
+        headers = {}
+        if request.user:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {_token(request.user)}"
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            if request.method == "GET":
+                response = client.get(request.path, request.params, **headers)
+            else:
+                response = client.generic(
+                    request.method,
+                    request.path,
+                    json.dumps(request.body),
+                    "application/json",
+                    **headers,
+                )
+            content = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+            elapsed = time.perf_counter() - start
+        return response.status_code, elapsed, content, len(queries)
+
+    def close(self):
+        from django.db import connection
+
+        connection.close()
+
+
+_QUERIES = re.compile(r'(?:^|,)\s*db;[^,]*desc="(\d+) queries"')
+
+
+def server_timing_queries(response):
+    match = _QUERIES.search(response.getheader("Server-Timing") or "")
+    return int(match.group(1)) if match else None
+
+
+class HttpTarget:
+    name = "http"
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.https = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            cls = (
+                http.client.HTTPSConnection
+                if self.https
+                else http.client.HTTPConnection
+            )
+            connection = self._local.connection = cls(self.host, self.port, timeout=60)
+        return connection
+
+    def send(self, request):
+        path = self.prefix + request.path
+        if request.params:
+            path += "?" + urlencode(request.params, doseq=True)
+        headers = {}
+        body = None
+        if request.body is not None:
+            body = json.dumps(request.body)
+            headers["Content-Type"] = "application/json"
+        if request.user:
+            headers["Authorization"] = f"Bearer {_token(request.user)}"
+
+        start = time.perf_counter()
+        try:
+            connection = self._connection()
+            connection.request(request.method, path, body, headers)
+            response = connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        elapsed = time.perf_counter() - start
+        return response.status, elapsed, content, server_timing_queries(response)
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of sorted values.
+    """
+    if not values:
+        return None
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def summarize(samples, wall_time):
+    """
+    Aggregate (status, seconds, queries) samples of one scenario. Failed requests
+    are left out of the latencies and query counts, and make the scenario invalid:
+    its numbers do not measure the work of the endpoint.
+    """
+    ok = [sample for sample in samples if sample[0] < 400]
+    latencies = sorted(seconds * 1000 for status, seconds, queries in ok)
+    counts = [queries for status, seconds, queries in ok if queries is not None]
+    errors = len(samples) - len(ok)
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "valid": errors == 0,
+        "throughput_rps": round(len(samples) / wall_time, 2) if wall_time else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "queries_per_request": None,
+    }
+    for key in ("p50", "p95", "p99", "max"):
+        if summary["latency_ms"][key] is not None:
+            summary["latency_ms"][key] = round(summary["latency_ms"][key], 3)
+    if counts:
+        summary["queries_per_request"] = {
+            "mean": round(sum(counts) / len(counts), 2),
+            "max": max(counts),
+        }
+    return summary
+
+
+def run_scenario(target, name, fixtures, requests, concurrency, warmup=0, seed=0):
+    """
+    Send `requests` requests of a scenario from `concurrency` workers, after
+    `warmup` unmeasured requests per worker. Returns the summary.
+    """
+    build = SCENARIOS[name]
+    after = AFTER_RESPONSE.get(name)
+    samples = []
+    failures = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index, count):
+        rng = random.Random(f"{seed}:{name}:{index}")
+        state = {}
+        results = []
+        try:
+            for i in range(warmup + count):
+                if i == warmup:
+                    start_barrier.wait()
+                request = build(rng, fixtures, state)
+                status, seconds, content, queries = target.send(request)
+                if after:
+                    try:
+                        after(state, json.loads(content))
+                    except ValueError:
+                        after(state, None)
+                if i >= warmup:
+                    results.append((status, seconds, queries))
+            if count == 0:
+                start_barrier.wait()
+        except Exception as e:
+            start_barrier.abort()
+            failures.append(e)
+        finally:
+            target.close()
+            with lock:
+                samples.extend(results)
+
+    shares = [
+        requests // concurrency + (i < requests % concurrency)
+        for i in range(concurrency)
+    ]
+    threads = [
+        threading.Thread(target=worker, args=(i, share))
+        for i, share in enumerate(shares)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        start_barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+    if failures:
+        raise failures[0]
+    return summarize(samples, wall_time)
+
+
+def git_revision(path):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=path,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_counts():
+    from pois.models import POI, PoiInteractions
+    from users.models import Follow, User
+
+    return {
+        "users": User.objects.count(),
+        "pois": POI.objects.count(),
+        "follows": Follow.objects.count(),
+        "interactions": PoiInteractions.objects.count(),
+    }
+
+
+def run(
+    target, scenarios, requests, concurrency, warmup=5, seed=0, app_dir=".", log=None
+):
+    """
+    Run the scenarios one after another and build the JSON report.
+    """
+    from django.db import connection
+
+    fixtures = Fixtures.load(seed)
+    report = {
+        "meta": {
+            "revision": git_revision(app_dir),
+            "target": target.name,
+            "database": connection.vendor,
+            "python": sys.version.split()[0],
+            "concurrency": concurrency,
+            "requests": requests,
+            "seed": seed,
+            "dataset": dataset_counts(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "scenarios": {},
+    }
+    for name in scenarios:
+        summary = run_scenario(
+            target, name, fixtures, requests, concurrency, warmup, seed
+        )
+        report["scenarios"][name] = summary
+        if log:
+            log(name, summary)
+    return report
@@ -0,0 +1,146 @@
+# Request mixes, one per endpoint. A scenario builds the next request of a virtual
+# user from the dataset sample (Fixtures) and a per-worker random generator and
+# state, so runs with the same seed send the same requests.
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    params: dict = field(default_factory=dict)
+    body: dict = None
+    user: tuple = None  # (id, username) to authenticate as
+
+
+# Viewports around the hotspots of the synthetic dataset (pois/synthetic_data.py)
+VIEWPORT = 0.25  # Half width in degrees
+
+
+def _bbox(rng, fixtures):
+    latitude, longitude = rng.choice(fixtures.centers)
+    return {
+        "min_lat": latitude - VIEWPORT,
+        "max_lat": latitude + VIEWPORT,
+        "min_lon": longitude - VIEWPORT,
+        "max_lon": longitude + VIEWPORT,
+    }
+
+
+def feed_list(rng, fixtures, state):
+    user_id, _ = rng.choice(fixtures.readers)
+    return Request(
+        "GET", f"/api/v1/pois/feed/{user_id}/", {"viewType": "list", "cursor": ""}
+    )
+
+
+def feed_map(rng, fixtures, state):
+    user_id, _ = rng.choice(fixtures.readers)
+    params = dict(_bbox(rng, fixtures), viewType="map")
+    return Request("GET", f"/api/v1/pois/feed/{user_id}/", params)
+
+
+def map_bbox(rng, fixtures, state):
+    user_id, _ = rng.choice(fixtures.authors)
+    params = dict(_bbox(rng, fixtures), viewType="map")
+    return Request("GET", f"/api/v1/pois/get/{user_id}/", params)
+
+
+def list_paging(rng, fixtures, state):
+    # Each worker pages through an author's POIs, then starts over with another
+    if not state.get("cursor"):
+        state["author"] = rng.choice(fixtures.authors)[0]
+    params = {"viewType": "list", "cursor": state.get("cursor") or "", "page_size": 20}
+    return Request("GET", f"/api/v1/pois/get/{state['author']}/", params)
+
+
+def interactions(rng, fixtures, state):
+    return Request("GET", f"/api/v1/pois/interactions/{rng.choice(fixtures.pois)}/")
+
+
+def followers(rng, fixtures, state):
+    user_id, _ = rng.choice(fixtures.celebrities)
+    mode = rng.choice(["followers", "followings"])
+    return Request(
+        "GET", f"/api/v1/users/{user_id}/followers_or_followings/", {"mode": mode}
+    )
+
+
+def followers_you_know(rng, fixtures, state):
+    (viewer, _), (user_id, _) = rng.choice(fixtures.readers), rng.choice(
+        fixtures.celebrities
+    )
+    return Request(
+        "GET",
+        f"/api/v1/users/{user_id}/followers_you_know/",
+        {"viewerId": viewer, "limit": 3},
+    )
+
+
+def follow_toggle(rng, fixtures, state):
+    (follower, _), (following, _) = rng.sample(fixtures.readers, 2)
+    return Request(
+        "POST",
+        "/api/v1/users/follow/",
+        body={"followerId": follower, "followingId": following},
+    )
+
+
+def user_search(rng, fixtures, state):
+    _, username = rng.choice(fixtures.readers)
+    # Prefix of a known username, so most searches match several users
+    query = username[: rng.randint(max(len(username) - 3, 1), len(username))]
+    return Request(
+        "GET", f"/api/v1/users/user/{query}/", user=rng.choice(fixtures.readers)
+    )
+
+
+# Words of the synthetic POIs' titles, tags and descriptions
+SEARCH_WORDS = ["food", "event", "music", "park", "museum", "poi", "synthetic"]
+
+
+def poi_search(rng, fixtures, state):
+    word = rng.choice(SEARCH_WORDS)
+    # Prefixes as typed while searching, half of them inside a viewport
+    params = {"q": word[: rng.randint(3, len(word))], "page_size": 20}
+    if rng.random() < 0.5:
+        params.update(_bbox(rng, fixtures))
+    return Request("GET", "/api/v1/pois/search/", params)
+
+
+def nearby(rng, fixtures, state):
+    # "What's near me" from around a hotspot, a quarter of them filtered by tag
+    latitude, longitude = rng.choice(fixtures.centers)
+    params = {
+        "lat": round(latitude + rng.uniform(-VIEWPORT, VIEWPORT), 6),
+        "lon": round(longitude + rng.uniform(-VIEWPORT, VIEWPORT), 6),
+        "radius_km": 25,
+        "k": 20,
+    }
+    if rng.random() < 0.25:
+        params["tags"] = rng.choice(SEARCH_WORDS[:4])
+    return Request("GET", "/api/v1/pois/nearby/", params)
+
+
+SCENARIOS = {
+    "feed_list": feed_list,
+    "feed_map": feed_map,
+    "map_bbox": map_bbox,
+    "list_paging": list_paging,
+    "interactions": interactions,
+    "followers": followers,
+    "followers_you_know": followers_you_know,
+    "follow_toggle": follow_toggle,
+    "user_search": user_search,
+    "poi_search": poi_search,
+    "nearby": nearby,
+}
+
+
+# Scenarios that read the response body to build the next request
+def _next_cursor(state, data):
+    state["cursor"] = ((data or {}).get("pagination") or {}).get("next_cursor")
+
+
+AFTER_RESPONSE = {"list_paging": _next_cursor}
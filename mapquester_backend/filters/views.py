@@ -3,30 +3,38 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
 from pois.models import POI
+from pois.search import search_pois
+from pois.spatial_index import filter_bbox, parse_bbox
 
 
 # Apply Filter View
 @login_required
 def apply_filter(request):
-    # Initialize the queryset with all POIs
-    pois = POI.objects.all()
+    # Initialize the queryset with all public POIs
+    pois = POI.objects.filter(isPublic=True, isDeleted=False)
 
     if request.method == "POST":
         # Extract filter parameters from the POST request
-        category = request.POST.get("category")
-        name = request.POST.get("name")
-        coordinates = request.POST.get("coordinates")
+        tag = request.POST.get("tag")
         keyword = request.POST.get("keyword")
 
         # Apply filters based on the provided parameters
-        if category:
-            pois = pois.filter(category=category)
-        if name:
-            pois = pois.filter(name__icontains=name)
-        if coordinates:
-            pois = pois.filter(coordinates=coordinates)
+        if tag:
+            pois = pois.filter(tag=tag)
+        if any(
+            request.POST.get(param)
+            for param in ("min_lat", "max_lat", "min_lon", "max_lon")
+        ):
+            try:
+                pois = filter_bbox(pois, *parse_bbox(request.POST))
+            except ValueError:
+                pois = pois.none()
+        # Ranked search over title, tag and description through the search index
         if keyword:
-            pois = pois.filter(description__icontains=keyword)
+            try:
+                pois = search_pois(pois, keyword)
+            except ValueError:
+                pass
 
         # Return the filtered POIs to the template
         return render(request, "filter_system/apply_filter.html", {"pois": pois})
@@ -0,0 +1,216 @@
+# Per-request performance instrumentation. RequestTimingMiddleware measures, for
+# each request, the wall time, the number and duration of database queries, the
+# time spent serializing JSON and the time spent calling S3. Each response gets a
+# Server-Timing header, and the measurements are aggregated per endpoint into
+# fixed-bucket histograms served by health.views.metrics.
+#
+# The cost per request is a few perf_counter() calls, one execute_wrapper frame
+# per query and a dict update under a lock, so it can stay on in production.
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Upper bounds of the histogram buckets, in milliseconds (plus an overflow bucket)
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+METRICS = ("total", "db", "serialize", "s3")
+# Endpoint of measurements made outside a request, e.g. background uploads
+BACKGROUND = "(background)"
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("start", "queries", "db", "serialize", "s3", "s3_calls")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.s3 = 0.0
+        self.s3_calls = 0
+
+    def server_timing(self, total):
+        return ", ".join(
+            [
+                f"app;dur={total * 1000:.1f}",
+                f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+                f"serialize;dur={self.serialize * 1000:.1f}",
+                f's3;dur={self.s3 * 1000:.1f};desc="{self.s3_calls} calls"',
+            ]
+        )
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum += ms
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the quantile, None past the last bucket
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "mean_ms": round(self.sum / self.count, 3) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, BUCKETS_MS), "+Inf"], self.counts)),
+        }
+
+
+class Registry:
+    """
+    Histograms per (endpoint, metric) and query counts per endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._queries = {}
+        self.started_at = time.time()
+
+    def observe(self, endpoint, values, queries=0):
+        with self._lock:
+            histograms = self._histograms.get(endpoint)
+            if histograms is None:
+                histograms = self._histograms[endpoint] = {}
+            for metric, ms in values.items():
+                histogram = histograms.get(metric)
+                if histogram is None:
+                    histogram = histograms[metric] = Histogram()
+                histogram.observe(ms)
+            self._queries[endpoint] = self._queries.get(endpoint, 0) + queries
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, histograms in sorted(self._histograms.items()):
+                data = {
+                    metric: histograms[metric].as_dict()
+                    for metric in METRICS
+                    if metric in histograms
+                }
+                requests = histograms["total"].count if "total" in histograms else 0
+                if requests:
+                    data["queries_per_request"] = round(
+                        self._queries[endpoint] / requests, 2
+                    )
+                endpoints[endpoint] = data
+        return {
+            "uptime_seconds": round(time.time() - self.started_at),
+            "endpoints": endpoints,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._queries.clear()
+            self.started_at = time.time()
+
+
+registry = Registry()
+
+
+def record(kind, seconds, calls=1):
+    """
+    Add time spent on "serialize" or "s3" to the current request. S3 calls made
+    outside a request (background uploads) go to the BACKGROUND histograms.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        if kind == "s3" and settings.INSTRUMENTATION_ENABLED:
+            registry.observe(BACKGROUND, {kind: seconds * 1000})
+        return
+    setattr(metrics, kind, getattr(metrics, kind) + seconds)
+    if kind == "s3":
+        metrics.s3_calls += calls
+
+
+@contextmanager
+def timed(kind):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, time.perf_counter() - start)
+
+
+def _endpoint(request):
+    match = request.resolver_match
+    name = (match.view_name or match.route) if match else "(unmatched)"
+    return f"{request.method} {name}"
+
+
+class RequestTimingMiddleware:
+    """
+    Measures each request, adds a Server-Timing header and feeds the histograms.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _count_query(self, execute, sql, params, many, context):
+        metrics = _current.get()
+        if metrics is None:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.db += time.perf_counter() - start
+            metrics.queries += 1
+
+    def __call__(self, request):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self._count_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - metrics.start
+
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = metrics.server_timing(total)
+        registry.observe(
+            _endpoint(request),
+            {
+                "total": total * 1000,
+                "db": metrics.db * 1000,
+                "serialize": metrics.serialize * 1000,
+                "s3": metrics.s3 * 1000,
+            },
+            metrics.queries,
+        )
+        return response
@@ -0,0 +1,283 @@
+# Request profiling for the pois and users views. A sampled request (a
+# PROFILING_SAMPLE_RATE fraction of them, or any request with an "X-Profile: 1"
+# header when DEBUG is on) gets:
+# - a full SQL trace: every query with its duration and the application frames
+#   that issued it
+# - N+1 detection: query shapes (SQL with parameters and IN lists collapsed)
+#   repeated PROFILING_N_PLUS_ONE_THRESHOLD times or more
+# - slow queries, over PROFILING_SLOW_QUERY_MS
+# - stack samples of the request thread every PROFILING_SAMPLE_INTERVAL_MS, in
+#   the folded format of flame graph tools
+# and its report is written as JSON to PROFILING_REPORT_DIR.
+#
+# The same detector backs assertNoNPlusOne() for tests, and with
+# PROFILING_RAISE_ON_N_PLUS_ONE every request in the test suite is checked.
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+PROFILED_APPS = ("pois", "users")
+MAX_PARAMS_LENGTH = 200
+
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)")
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """
+    SQL with literals and placeholder lists collapsed, so the same query with
+    different parameters (or IN lists of different lengths) has the same shape.
+    """
+    shape = _STRING.sub("?", sql.replace("%s", "?"))
+    shape = _NUMBER.sub("?", shape)
+    return _PLACEHOLDER_LIST.sub("(?...)", shape)
+
+
+def _app_frames():
+    # Frames of this project's code, outermost first, without this module
+    root = str(settings.BASE_DIR)
+    return [
+        f"{os.path.relpath(frame.filename, root)}:{frame.lineno} in {frame.name}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(root)
+        and "site-packages" not in frame.filename
+        and frame.filename != __file__
+    ]
+
+
+class QueryTracer:
+    """
+    Records the queries run on every database connection of this thread while
+    active (see trace()).
+    """
+
+    def __init__(self, capture_stacks=True):
+        self.capture_stacks = capture_stacks
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "sql": sql,
+                    "params": repr(params)[:MAX_PARAMS_LENGTH],
+                    "many": many,
+                    "ms": round((time.perf_counter() - start) * 1000, 3),
+                    "stack": _app_frames() if self.capture_stacks else None,
+                }
+            )
+
+    @contextmanager
+    def trace(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def n_plus_one(self, threshold):
+        """
+        Query shapes run at least `threshold` times, most repeated first.
+        """
+        shapes = Counter(query_shape(query["sql"]) for query in self.queries)
+        found = []
+        for shape, count in shapes.most_common():
+            if count < threshold:
+                break
+            queries = [q for q in self.queries if query_shape(q["sql"]) == shape]
+            found.append(
+                {
+                    "shape": shape,
+                    "count": count,
+                    "total_ms": round(sum(q["ms"] for q in queries), 3),
+                    "example": queries[0]["sql"],
+                    "stack": queries[0]["stack"],
+                }
+            )
+        return found
+
+    def slow(self, threshold_ms):
+        return [query for query in self.queries if query["ms"] >= threshold_ms]
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread, and counts the
+    folded stacks ("outer;inner;leaf").
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                names.append(f"{code.co_name} ({filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(names))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+
+def _view_name(request):
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    if match.func.__module__.split(".")[0] not in PROFILED_APPS:
+        return None
+    return match.view_name or match.func.__name__
+
+
+def write_report(report, directory=None):
+    directory = directory or settings.PROFILING_REPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    started = report["started_at"].replace(":", "").replace("-", "")[:15]
+    name = f"{started}-{report['view']}-{uuid.uuid4().hex[:8]}.json"
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    Profiles sampled requests to the pois and users views and writes a report.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _sampled(self, request):
+        if settings.DEBUG and request.headers.get("X-Profile") == "1":
+            return True
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        strict = settings.PROFILING_RAISE_ON_N_PLUS_ONE
+        sampled = self._sampled(request)
+        if not (sampled or strict):
+            return self.get_response(request)
+        view = _view_name(request)
+        if view is None:
+            return self.get_response(request)
+        if not sampled:
+            return self._check(request, view)
+
+        tracer = QueryTracer()
+        started_at = datetime.now(timezone.utc).isoformat()
+        start = time.perf_counter()
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        )
+        with tracer.trace(), sampler:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        n_plus_one = tracer.n_plus_one(settings.PROFILING_N_PLUS_ONE_THRESHOLD)
+        write_report(
+            {
+                "started_at": started_at,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": view,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 3),
+                "query_count": len(tracer.queries),
+                "query_ms": round(sum(q["ms"] for q in tracer.queries), 3),
+                "n_plus_one": n_plus_one,
+                "slow_queries": tracer.slow(settings.PROFILING_SLOW_QUERY_MS),
+                "queries": tracer.queries,
+                "stack_samples": sampler.folded(),
+            }
+        )
+        if strict and n_plus_one:
+            raise NPlusOneError(format_n_plus_one(view, n_plus_one))
+        return response
+
+    def _check(self, request, view):
+        tracer = QueryTracer(capture_stacks=False)
+        with tracer.trace():
+            response = self.get_response(request)
+        n_plus_one = tracer.n_plus_one(settings.PROFILING_N_PLUS_ONE_THRESHOLD)
+        if n_plus_one:
+            raise NPlusOneError(format_n_plus_one(view, n_plus_one))
+        return response
+
+
+def format_n_plus_one(label, found):
+    lines = [f"N+1 queries in {label}:"]
+    for item in found:
+        lines.append(f"  {item['count']}x {item['shape']}")
+        if item["stack"]:
+            lines.append(f"     from {item['stack'][-1]}")
+    return "\n".join(lines)
+
+
+@contextmanager
+def detect_n_plus_one():
+    """
+    Trace the queries of a block; yields the QueryTracer.
+    """
+    tracer = QueryTracer()
+    with tracer.trace():
+        yield tracer
+
+
+class NPlusOneAssertionsMixin:
+    """
+    TestCase mixin: `with self.assertNoNPlusOne(): ...` fails the test when a
+    query shape is repeated `threshold` times or more inside the block.
+    """
+
+    @contextmanager
+    def assertNoNPlusOne(self, threshold=None):
+        threshold = threshold or settings.PROFILING_N_PLUS_ONE_THRESHOLD
+        with detect_n_plus_one() as tracer:
+            yield tracer
+        found = tracer.n_plus_one(threshold)
+        if found:
+            self.fail(format_n_plus_one("block", found))
@@ -1,3 +1,176 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from health.instrumentation import BACKGROUND, Histogram, registry, timed
+from health.profiling import NPlusOneAssertionsMixin, NPlusOneError, query_shape
+from pois.models import POI, PoiInteractions
+from rest_framework_simplejwt.tokens import AccessToken
+from unittest import mock
+import json
+import os
+import re
+import tempfile
 
-# Create your tests here.
+User = get_user_model()
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        POI.objects.create(
+            userId=self.user,
+            title="Test POI",
+            description="Test Description",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+
+    def get_pois(self):
+        return self.client.get(
+            reverse("get_pois", args=[self.user.id]), {"viewType": "list"}
+        )
+
+    def test_server_timing(self):
+        """Test that responses report their timings and query count"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_pois()
+        header = response["Server-Timing"]
+        for metric in ("app", "db", "serialize", "s3"):
+            self.assertRegex(header, rf"(^|, ){metric};dur=\d+\.\d")
+        reported = int(re.search(r'"(\d+) queries"', header).group(1))
+        self.assertEqual(reported, len(queries))
+
+    def test_metrics_endpoint(self):
+        """Test the histograms and who can read them"""
+        for _ in range(3):
+            self.get_pois()
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        with self.settings(METRICS_TOKEN="secret"):
+            response = self.client.get(url, HTTP_X_METRICS_TOKEN="wrong")
+            self.assertEqual(response.status_code, 403)
+            response = self.client.get(url, HTTP_X_METRICS_TOKEN="secret")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        endpoint = data["endpoints"]["GET get_pois"]
+        self.assertEqual(endpoint["total"]["count"], 3)
+        self.assertEqual(sum(endpoint["db"]["buckets"].values()), 3)
+        self.assertGreater(endpoint["queries_per_request"], 0)
+        self.assertIn("hit_rate", data["signing_cache"])
+
+        self.user.is_staff = True
+        self.user.save()
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(
+            url, {"reset": "true"}, HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("GET get_pois", registry.snapshot()["endpoints"])
+
+    def test_background_and_disabled(self):
+        """Test S3 time outside requests and switching instrumentation off"""
+        with timed("s3"):
+            pass
+        self.assertEqual(registry.snapshot()["endpoints"][BACKGROUND]["s3"]["count"], 1)
+        with override_settings(INSTRUMENTATION_ENABLED=False):
+            self.assertNotIn("Server-Timing", self.get_pois())
+        self.assertNotIn("GET get_pois", registry.snapshot()["endpoints"])
+
+    def test_histogram(self):
+        """Test bucket quantiles"""
+        histogram = Histogram()
+        for ms in [0.5] * 90 + [30] * 9 + [20000]:
+            histogram.observe(ms)
+        self.assertEqual(
+            [histogram.quantile(q) for q in (0.5, 0.95, 0.99, 1)], [1, 50, 50, None]
+        )
+
+
+class ProfilingTests(NPlusOneAssertionsMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.poi = POI.objects.create(
+            userId=self.user,
+            title="Test POI",
+            description="Test Description",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+        for i in range(4):
+            commenter = User.objects.create_user(username=f"commenter{i}")
+            PoiInteractions.objects.create(
+                userId=commenter, poiId=self.poi, interactionType="comment"
+            )
+
+    def test_query_shape(self):
+        """Test that parameters and IN lists do not change a query's shape"""
+        self.assertEqual(
+            query_shape('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND x = %s'),
+            query_shape('SELECT * FROM "t" WHERE "id" IN (%s) AND x = %s'),
+        )
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE name = 'a' LIMIT 10"),
+            query_shape("SELECT * FROM t WHERE name = 'it''s' LIMIT 21"),
+        )
+
+    def test_assert_no_n_plus_one(self):
+        """Test the test helper on a loop of identical queries"""
+        with self.assertNoNPlusOne():
+            list(PoiInteractions.objects.select_related("userId"))
+        with self.assertRaises(AssertionError) as raised:
+            with self.assertNoNPlusOne():
+                for interaction in PoiInteractions.objects.all():
+                    interaction.userId.username
+        self.assertIn("4x SELECT", str(raised.exception))
+        self.assertIn("health/tests.py", str(raised.exception))
+
+    def test_requests_fail_on_n_plus_one(self):
+        """Test that the suite fails when a view starts issuing N+1 queries"""
+
+        def project_one_by_one(interactions, fields):
+            return [
+                {"id": interaction.id, "username": interaction.userId.username}
+                for interaction in interactions
+            ]
+
+        url = reverse("list_interactions", args=[self.poi.id])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with mock.patch("pois.poiInteractionView.project", project_one_by_one):
+            with self.assertRaises(NPlusOneError):
+                self.client.get(url)
+
+    @override_settings(DEBUG=True, PROFILING_RAISE_ON_N_PLUS_ONE=False)
+    def test_sampled_report(self):
+        """Test the report written for a profiled request"""
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(PROFILING_REPORT_DIR=directory):
+                self.client.get(reverse("health_check"), HTTP_X_PROFILE="1")
+                self.assertEqual(os.listdir(directory), [])
+                url = reverse("list_interactions", args=[self.poi.id])
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertEqual(os.listdir(directory), [])
+                self.client.get(url, HTTP_X_PROFILE="1")
+                (name,) = os.listdir(directory)
+                with open(os.path.join(directory, name)) as f:
+                    report = json.load(f)
+        self.assertIn("list_interactions", name)
+        self.assertEqual(report["status"], 200)
+        self.assertEqual(report["query_count"], len(report["queries"]))
+        self.assertEqual(report["n_plus_one"], [])
+        self.assertIsInstance(report["stack_samples"], list)
+        self.assertTrue(
+            any(
+                "poiInteractionView" in frame
+                for frame in report["queries"][-1]["stack"]
+            )
+        )
@@ -1,7 +1,42 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from pois.url_signing import get_signing_cache
+from users.follow_graph import get_follow_graph
+from .instrumentation import registry
+
 
 @api_view(["GET"])
 def health_check(request):
     return Response({"status": "ok", "message": "MapQuester API is running"})
+
+
+def _can_read_metrics(request):
+    token = request.headers.get("X-Metrics-Token")
+    if settings.METRICS_TOKEN and token:
+        return constant_time_compare(token, settings.METRICS_TOKEN)
+    return request.user.is_staff
+
+
+@api_view(["GET"])
+def metrics(request):
+    """
+    Internal API with the request timing histograms of this process.
+    Query Parameter:
+    - `reset`: "true" to clear the histograms after reading them
+    """
+    if not _can_read_metrics(request):
+        return Response(
+            {"error": "Metrics are only available to staff."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    data = registry.snapshot()
+    data["signing_cache"] = get_signing_cache().stats()
+    graph = get_follow_graph()
+    data["follow_graph"] = graph.stats() if graph is not None else None
+    if request.GET.get("reset") == "true":
+        registry.reset()
+    return Response(data)
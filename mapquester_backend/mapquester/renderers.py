@@ -0,0 +1,126 @@
+# JSON serialization shared by the pois and users views. Coordinates are Decimals
+# and timestamps are datetimes, which the stock encoders handle through slow
+# per-value Python fallbacks. Decimals are sent as floats rounded to
+# JSON_DECIMAL_PLACES and datetimes as RFC 3339 strings ("Z" for UTC, microseconds
+# when set). orjson formats datetimes natively, so only Decimals call back into
+# Python; the standard library encoder is the fallback and emits the same bytes.
+
+import datetime
+import decimal
+import json
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+from health.instrumentation import record
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def format_datetime(value):
+    # Same output as orjson with OPT_UTC_Z
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _make_default(places):
+    def default(value):
+        # Decimals first, they are by far the most common
+        if isinstance(value, decimal.Decimal):
+            return round(float(value), places)
+        if isinstance(value, datetime.datetime):
+            return format_datetime(value)
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, datetime.timedelta):
+            return duration_iso_string(value)
+        if isinstance(value, (uuid.UUID, Promise)):
+            return str(value)
+        raise TypeError(
+            f"Object of type {type(value).__name__} is not JSON serializable"
+        )
+
+    return default
+
+
+def _orjson_backend(places):
+    default = _make_default(places)
+    option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data):
+        return orjson.dumps(data, default=default, option=option)
+
+    return dumps
+
+
+def _python_backend(places):
+    # Compact separators and no indent keep the C accelerated encoder in use
+    encoder = json.JSONEncoder(
+        separators=(",", ":"), ensure_ascii=False, default=_make_default(places)
+    )
+
+    def dumps(data):
+        return encoder.encode(data).encode()
+
+    return dumps
+
+
+BACKENDS = {"orjson": _orjson_backend, "python": _python_backend}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name, places=6):
+    if name == "orjson" and orjson is None:
+        name = "python"
+    return BACKENDS[name](places)
+
+
+def dumps(data):
+    """
+    Serialize data to UTF-8 JSON bytes with the configured JSON_RENDERER_BACKEND.
+    """
+    start = time.perf_counter()
+    content = get_backend(settings.JSON_RENDERER_BACKEND, settings.JSON_DECIMAL_PLACES)(
+        data
+    )
+    record("serialize", time.perf_counter() - start)
+    return content
+
+
+class JsonResponse(HttpResponse):
+    """
+    Drop-in replacement for django.http.JsonResponse that serializes with dumps().
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    DRF renderer for @api_view responses, using the same serialization.
+    """
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps(data)
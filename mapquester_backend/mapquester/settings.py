@@ -58,6 +58,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    "health.instrumentation.RequestTimingMiddleware",
+    "health.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -74,7 +77,7 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",  # Next.js app running locally
     "https://api.mapquester.website",
     "https://app.mapquester.website",
-    "https://app.mapquester.website/"
+    "https://app.mapquester.website/",
 ]
 
 CORS_ALLOW_CREDENTIALS = True
@@ -140,6 +143,11 @@ if "test" in sys.argv:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # Writers wait for the lock instead of failing, so concurrency tests
+            # can run requests in parallel. A file is used because in-memory
+            # databases shared between threads fail fast with "table is locked"
+            "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 30},
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
         }
     }
 elif "RDS_DB_NAME" in os.environ:
@@ -220,6 +228,12 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "mapquester.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # "format" selects the compact map formats (see pois/columnar.py), not a renderer
+    "URL_FORMAT_OVERRIDE": None,
 }
 
 SIMPLE_JWT = {
@@ -237,4 +251,80 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_STORAGE_BUCKET_NAME = os.getenv("AWS_STORAGE_BUCKET_NAME")
 AWS_S3_REGION_NAME = os.getenv("AWS_S3_REGION_NAME")
-AWS_S3_PRESIGNED_URL_TIME = os.getenv("AWS_S3_PRESIGNED_URL_TIME")
+AWS_S3_PRESIGNED_URL_TIME = int(os.getenv("AWS_S3_PRESIGNED_URL_TIME") or 3600)
+
+# Presigned URLs are cached (LRU) until shortly before they expire
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv("PRESIGNED_URL_CACHE_SIZE", "10000"))
+
+# POI attachment storage: pois.media.S3MediaBackend or pois.media.FileSystemMediaBackend
+POI_MEDIA_BACKEND = os.getenv("POI_MEDIA_BACKEND", "pois.media.S3MediaBackend")
+POI_MEDIA_UPLOAD_WORKERS = int(os.getenv("POI_MEDIA_UPLOAD_WORKERS", "8"))
+# Upload in the background and answer create_poi right away with pending attachments
+POI_MEDIA_ASYNC = os.getenv("POI_MEDIA_ASYNC", "True") == "True"
+
+# Reaction counters: "atomic" updates POI.reactions on every toggle, "buffered"
+# batches the increments in memory and flushes them every
+# REACTION_FLUSH_INTERVAL seconds
+REACTION_COUNTER_MODE = os.getenv("REACTION_COUNTER_MODE", "atomic")
+REACTION_FLUSH_INTERVAL = float(os.getenv("REACTION_FLUSH_INTERVAL", "5"))
+
+# Cache backend. The response cache keeps its version counters here too, so run
+# several server processes only with a shared cache (REDIS_URL)
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "mapquester",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+# In-process cache of the follow graph (see users/follow_graph.py), bounded to
+# FOLLOW_GRAPH_MAX_EDGES user ids. Entries are reloaded after FOLLOW_GRAPH_TTL
+# seconds to pick up follows made through other server processes
+FOLLOW_GRAPH_ENABLED = os.getenv("FOLLOW_GRAPH_ENABLED", "False") == "True"
+FOLLOW_GRAPH_MAX_EDGES = int(os.getenv("FOLLOW_GRAPH_MAX_EDGES", "5000000"))
+FOLLOW_GRAPH_TTL = float(os.getenv("FOLLOW_GRAPH_TTL", "60"))
+
+# Versioned caching of read endpoints (see pois/response_cache.py). Entries are
+# invalidated by writes, the timeout only bounds how long unused entries linger.
+# Responses holding presigned URLs expire sooner, before the URLs do
+# Versions are bumped in the cache of the writing process, so it is only on by
+# default with the shared Redis cache (see the pois.W001 check)
+RESPONSE_CACHE_ENABLED = (
+    os.getenv("RESPONSE_CACHE_ENABLED") or str(bool(os.getenv("REDIS_URL")))
+) == "True"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "86400"))
+if "test" in sys.argv:
+    # The cache outlives each test's database rollback, tests opt in explicitly
+    RESPONSE_CACHE_ENABLED = False
+
+# JSON serialization of API responses (see mapquester/renderers.py): "orjson", or
+# "python" for the standard library encoder. Decimals are sent as rounded floats
+JSON_RENDERER_BACKEND = os.getenv("JSON_RENDERER_BACKEND", "orjson")
+JSON_DECIMAL_PLACES = 6
+
+# Per-request timings (see health/instrumentation.py): Server-Timing headers and
+# histograms per endpoint at /health/metrics. The metrics are readable by staff
+# users, or with the METRICS_TOKEN in an X-Metrics-Token header
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "True") == "True"
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "True") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Profiling of sampled pois/users requests (see health/profiling.py): SQL traces,
+# N+1 detection and stack samples, written as JSON reports. With DEBUG on, an
+# "X-Profile: 1" header profiles a single request
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_REPORT_DIR = os.getenv("PROFILING_REPORT_DIR") or str(BASE_DIR / "profiles")
+PROFILING_SLOW_QUERY_MS = float(os.getenv("PROFILING_SLOW_QUERY_MS", "100"))
+PROFILING_N_PLUS_ONE_THRESHOLD = int(os.getenv("PROFILING_N_PLUS_ONE_THRESHOLD", "3"))
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+# Every request in the test suite fails on a repeated query shape
+PROFILING_RAISE_ON_N_PLUS_ONE = "test" in sys.argv
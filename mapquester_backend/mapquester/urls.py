@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
+from health.views import metrics
 
 urlpatterns = [
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
@@ -24,6 +25,7 @@ urlpatterns = [
     path("api/v1/users/", include("users.urls")),
     path("api/v1/pois/", include("pois.urls")),
     path("health", include("health.urls")),
+    path("health/metrics", metrics, name="metrics"),
     #     path('apis/map/', include('mapView.urls')), # TODO: mapViews will be a subset of pois
     #     path('filters/', include('filters.urls')), # TODO: filters will be a subset of pois
 ]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PoisConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pois"
+
+    def ready(self):
+        # Connects the response cache invalidation and search indexing signals,
+        # and registers the system checks
+        from . import checks, response_cache, search  # noqa: F401
@@ -0,0 +1,71 @@
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework import status
+from .bulk_import import (
+    FORMATS,
+    _geojson_records,
+    detect_format,
+    import_pois,
+    parse_records,
+)
+
+# Larger datasets go through the import_pois management command
+MAX_BULK_POIS = 10000
+
+
+@api_view(["POST"])
+@parser_classes([MultiPartParser, JSONParser])
+def bulk_create_pois(request):
+    """
+    API to create many POIs at once. Accepts a JSON body {"userId", "pois": [...]}
+    or a GeoJSON FeatureCollection, or a multipart "file" (JSON, NDJSON, CSV or
+    GeoJSON, by "format" or file extension) with a "userId" field.
+    Query Parameter:
+    - `strict`: "true" to insert nothing unless every row is valid
+    """
+    data = request.data
+    upload = request.FILES.get("file")
+    try:
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        if upload is not None:
+            fmt = data.get("format") or detect_format(upload.name)
+            if fmt not in FORMATS:
+                raise ValueError(
+                    f"Unknown file format, use one of: {', '.join(FORMATS)}"
+                )
+            records = parse_records(upload.read(), fmt)
+        elif data.get("type") == "FeatureCollection":
+            # request.body can no longer be read once DRF parsed request.data
+            records = _geojson_records(data)
+        else:
+            records = data.get("pois")
+            if not isinstance(records, list):
+                raise ValueError("Missing required field: 'pois'")
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(records) > MAX_BULK_POIS:
+        return Response(
+            {"error": f"At most {MAX_BULK_POIS} POIs can be created per request."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    strict = request.GET.get("strict") == "true"
+    pois, errors = import_pois(records, user_id=data.get("userId"), strict=strict)
+    if strict and errors:
+        return Response(
+            {"message": "No POIs were created", "created": 0, "errors": errors},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return Response(
+        {
+            "message": f"{len(pois)} POIs created successfully",
+            "created": len(pois),
+            "poi_ids": [poi.id for poi in pois],
+            "errors": errors,
+        },
+        status=status.HTTP_201_CREATED,
+    )
@@ -0,0 +1,280 @@
+# Bulk POI import for partner datasets and users migrating from other apps.
+# Records are parsed from JSON, NDJSON, CSV or GeoJSON, validated column by column
+# (every value of a field in one pass, with errors collected per row), and the
+# valid rows are inserted with bulk_create in batches inside one transaction.
+# bulk_create skips save() and signals, so the geohash, feed fan-out, search
+# index and cache invalidation are done here for the whole batch.
+
+import csv
+import io
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from users.models import User
+from .feed_store import fan_out_pois
+from .models import POI
+from .response_cache import invalidate_new_pois
+from .search import index_pois
+
+BATCH_SIZE = 1000
+FORMATS = ("json", "ndjson", "csv", "geojson")
+EXTENSIONS = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+    ".geojson": "geojson",
+}
+# Column names commonly found in other apps' exports
+ALIASES = {
+    "lat": "latitude",
+    "lng": "longitude",
+    "lon": "longitude",
+    "name": "title",
+    "category": "tag",
+}
+COORDINATE = Decimal("0.000001")  # POI coordinates have 6 decimal places
+
+
+class InvalidRecord:
+    """
+    Placeholder for a record that could not be parsed, reported as a row error.
+    """
+
+    def __init__(self, message):
+        self.message = message
+
+
+def detect_format(filename):
+    return EXTENSIONS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def _geojson_records(document):
+    if not isinstance(document, dict) or document.get("type") != "FeatureCollection":
+        raise ValueError("GeoJSON must be a FeatureCollection")
+    features = document.get("features", [])
+    if not isinstance(features, list) or not all(
+        isinstance(feature, dict) for feature in features
+    ):
+        raise ValueError("GeoJSON features must be a list of objects")
+    records = []
+    for feature in features:
+        geometry = feature.get("geometry")
+        if not isinstance(geometry, dict) or geometry.get("type") != "Point":
+            records.append(InvalidRecord("Only Point geometries are supported"))
+            continue
+        coordinates = geometry.get("coordinates")
+        properties = feature.get("properties") or {}
+        if not isinstance(coordinates, list) or len(coordinates) < 2:
+            records.append(
+                InvalidRecord("Point coordinates must be [longitude, latitude]")
+            )
+            continue
+        if not isinstance(properties, dict):
+            records.append(InvalidRecord("Feature properties must be an object"))
+            continue
+        longitude, latitude = coordinates[:2]
+        records.append(dict(properties, latitude=latitude, longitude=longitude))
+    return records
+
+
+def parse_records(content, fmt):
+    """
+    Parse a dataset into a list of records (dicts, or InvalidRecord for rows that
+    could not be read). Raises ValueError when the document itself is unreadable.
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    if fmt == "ndjson":
+        records = []
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                records.append(InvalidRecord(f"Invalid JSON: {e}"))
+        return records
+
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(content)))
+
+    if fmt in ("json", "geojson"):
+        try:
+            document = json.loads(content)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if isinstance(document, dict) and document.get("type") == "FeatureCollection":
+            return _geojson_records(document)
+        if fmt == "geojson":
+            raise ValueError("GeoJSON must be a FeatureCollection")
+        if isinstance(document, dict):
+            document = document.get("pois")
+        if not isinstance(document, list):
+            raise ValueError('Expected a list of POIs or {"pois": [...]}')
+        return document
+
+    raise ValueError(f"Unsupported format, use one of: {', '.join(FORMATS)}")
+
+
+# Column validators: take a present value, return the cleaned value or raise
+# ValueError with the message reported for the row
+
+
+def _text(max_length):
+    def clean(value):
+        value = str(value).strip()
+        if not value:
+            raise ValueError("This field may not be blank.")
+        if max_length and len(value) > max_length:
+            raise ValueError(
+                f"Ensure this field has no more than {max_length} characters."
+            )
+        return value
+
+    return clean
+
+
+def _coordinate(limit):
+    def clean(value):
+        try:
+            value = Decimal(str(value).strip()).quantize(COORDINATE)
+        except (InvalidOperation, ValueError):
+            raise ValueError("A valid number is required.")
+        if not -limit <= value <= limit:
+            raise ValueError(f"Must be between -{limit} and {limit} degrees.")
+        return value
+
+    return clean
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1", "yes", "t", "y"):
+        return True
+    if text in ("false", "0", "no", "f", "n"):
+        return False
+    raise ValueError("Must be a valid boolean.")
+
+
+def _user_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("A valid integer is required.")
+
+
+def _timestamp(value):
+    parsed = parse_datetime(str(value).strip())
+    if parsed is None:
+        raise ValueError("Datetime has wrong format, use ISO 8601.")
+    return make_aware(parsed) if is_naive(parsed) else parsed
+
+
+# field: (validator, required, default)
+COLUMNS = {
+    "userId": (_user_id, True, None),
+    "title": (_text(255), True, None),
+    "description": (_text(None), True, None),
+    "tag": (_text(100), True, None),
+    "latitude": (_coordinate(90), True, None),
+    "longitude": (_coordinate(180), True, None),
+    "isPublic": (_boolean, False, True),
+    "createdAt": (_timestamp, False, None),
+}
+
+
+def _normalize(record):
+    return {ALIASES.get(key, key): value for key, value in record.items()}
+
+
+def validate_records(records, user_id=None):
+    """
+    Validate records column by column. Returns (rows, errors): rows maps the
+    1-based row number to the cleaned fields of each valid row, errors is a list
+    of {"row": n, "errors": {field: message}} for the others.
+    """
+    row_errors = {}
+    records = list(records)
+    for i, record in enumerate(records):
+        if isinstance(record, InvalidRecord):
+            row_errors[i] = {"record": record.message}
+        elif not isinstance(record, dict):
+            row_errors[i] = {"record": "Expected an object."}
+    records = [
+        _normalize(record) if i not in row_errors else {}
+        for i, record in enumerate(records)
+    ]
+    if user_id is not None:
+        for record in records:
+            if record.get("userId") in (None, ""):
+                record["userId"] = user_id
+
+    cleaned = [{} for _ in records]
+    for field, (clean, required, default) in COLUMNS.items():
+        column = [record.get(field) for record in records]
+        for i, value in enumerate(column):
+            if i in row_errors and "record" in row_errors[i]:
+                continue
+            if value is None or value == "":
+                if required:
+                    row_errors.setdefault(i, {})[field] = "This field is required."
+                elif default is not None:
+                    cleaned[i][field] = default
+                continue
+            try:
+                cleaned[i][field] = clean(value)
+            except ValueError as e:
+                row_errors.setdefault(i, {})[field] = str(e)
+
+    # Owners are checked in one query for the whole dataset
+    user_ids = {row["userId"] for row in cleaned if "userId" in row}
+    existing = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+    for i, row in enumerate(cleaned):
+        if "userId" in row and row["userId"] not in existing:
+            row_errors.setdefault(i, {})[
+                "userId"
+            ] = f"User with ID {row['userId']} does not exist."
+
+    rows = {i + 1: row for i, row in enumerate(cleaned) if i not in row_errors}
+    errors = [
+        {"row": i + 1, "errors": messages} for i, messages in sorted(row_errors.items())
+    ]
+    return rows, errors
+
+
+def import_pois(
+    records, user_id=None, batch_size=BATCH_SIZE, strict=False, dry_run=False
+):
+    """
+    Validate and insert records as POIs owned by user_id (or each record's
+    userId). Invalid rows are skipped and reported; with strict nothing is
+    inserted unless every row is valid. Returns (created POIs, errors).
+    """
+    rows, errors = validate_records(records, user_id)
+    if dry_run or (strict and errors):
+        return [], errors
+
+    pois = []
+    for row in rows.values():
+        owner_id = row.pop("userId")
+        poi = POI(userId_id=owner_id, content=[], **row)
+        if "createdAt" in row:
+            poi.updatedAt = row["createdAt"]
+        poi.assign_geohash()
+        pois.append(poi)
+
+    with transaction.atomic():
+        POI.objects.bulk_create(pois, batch_size=batch_size)
+        fan_out_pois(pois, batch_size)
+        index_pois(pois, batch_size)
+        invalidate_new_pois(pois)
+    return pois, errors
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends whose entries are private to one server process
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def response_cache_backend(app_configs, **kwargs):
+    """
+    The response cache keeps its scope versions in the default cache, so with a
+    per-process cache a write in one server process does not invalidate the
+    responses cached by the others.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.RESPONSE_CACHE_ENABLED and backend in LOCAL_CACHE_BACKENDS:
+        return [
+            Warning(
+                "RESPONSE_CACHE_ENABLED is on with a per-process cache backend.",
+                hint="Set REDIS_URL when running more than one server process, "
+                "or other processes serve stale responses.",
+                id="pois.W001",
+            )
+        ]
+    return []
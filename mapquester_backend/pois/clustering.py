@@ -0,0 +1,79 @@
+from django.db.models import Avg, Count, F, Window
+from django.db.models.functions import RowNumber, Substr
+
+from .spatial_index import GEOHASH_PRECISION
+
+MAX_ZOOM = 22
+TOP_TAGS = 3
+SAMPLE_SIZE = 3
+
+
+def zoom_to_precision(zoom):
+    """
+    Map a web map zoom level to the geohash precision used as the cluster grid.
+    A tile at zoom z is 360 / 2**z degrees wide; a geohash of precision p splits
+    longitude into 2**ceil(5p / 2) columns, so aim for roughly 4 columns per tile.
+    """
+    return max(1, min(GEOHASH_PRECISION, round(2 * (zoom + 2) / 5)))
+
+
+def cluster_pois(queryset, zoom):
+    """
+    Aggregate a POI queryset into geohash grid buckets inside the database.
+    Runs a fixed number of queries whatever the number of POIs in the queryset.
+    """
+    precision = zoom_to_precision(zoom)
+    cell = Substr("geohash", 1, precision)
+    # Drop any ordering so it does not leak into the GROUP BY clause
+    queryset = queryset.order_by()
+
+    buckets = (
+        queryset.annotate(cell=cell)
+        .values("cell")
+        .annotate(count=Count("id"), avg_lat=Avg("latitude"), avg_lon=Avg("longitude"))
+        .order_by("cell")
+    )
+
+    # Per-cell tag histogram, reduced to the most common tags below
+    tag_counts = {}
+    for row in (
+        queryset.annotate(cell=cell)
+        .values("cell", "tag")
+        .annotate(count=Count("id"))
+        .order_by("cell", "-count", "tag")
+    ):
+        tags = tag_counts.setdefault(row["cell"], [])
+        if len(tags) < TOP_TAGS:
+            tags.append({"tag": row["tag"], "count": row["count"]})
+
+    # Most recent few POI ids per cell
+    samples = {}
+    for cell_key, poi_id in (
+        queryset.annotate(
+            cell=cell,
+            rank=Window(
+                RowNumber(),
+                partition_by=[cell],
+                order_by=[F("createdAt").desc(), F("id").desc()],
+            ),
+        )
+        .filter(rank__lte=SAMPLE_SIZE)
+        .order_by("cell", "rank")
+        .values_list("cell", "id")
+    ):
+        samples.setdefault(cell_key, []).append(poi_id)
+
+    return {
+        "precision": precision,
+        "clusters": [
+            {
+                "geohash": bucket["cell"],
+                "count": bucket["count"],
+                "latitude": round(float(bucket["avg_lat"]), 6),
+                "longitude": round(float(bucket["avg_lon"]), 6),
+                "top_tags": tag_counts.get(bucket["cell"], []),
+                "sample_ids": samples.get(bucket["cell"], []),
+            }
+            for bucket in buckets
+        ],
+    }
@@ -0,0 +1,99 @@
+# Compact map view formats. The map only needs each POI's id, owner, position,
+# tag and visibility, so instead of one JSON object per POI (with every key
+# repeated) the rows are sent as parallel arrays:
+#
+# format=columnar, JSON:
+#   {"count": n, "tags": [distinct tags],
+#    "columns": {"id": [...], "user_id": [...], "latitude": [...],
+#                "longitude": [...], "tag": [index into tags], "isPublic": [...]}}
+#
+# format=binary, little-endian buffer (application/octet-stream):
+#   "MQP1"                 magic
+#   uint32 count, uint16 tag count, uint16 header padding
+#   tags                   each as uint8 byte length + UTF-8 bytes, then padding
+#                          so the arrays below start at a multiple of 4 bytes
+#   uint32[count] id, uint32[count] user_id,
+#   float32[count] latitude, float32[count] longitude,
+#   uint16[count] tag index, uint8[count] flags (bit 0: public)
+#
+# float32 keeps coordinates to within a metre, which is plenty to place markers.
+# Coordinates are cast to floats by the database, and the columns are converted
+# to packed arrays with the array module rather than value by value.
+
+import struct
+import sys
+from array import array
+
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+MAGIC = b"MQP1"
+FORMATS = {
+    "columnar": "application/json",
+    "binary": "application/octet-stream",
+}
+
+
+def fetch_columns(queryset):
+    """
+    Read the map columns of a queryset as (ids, user_ids, lats, lons, tags, public).
+    """
+    rows = queryset.values_list(
+        "id",
+        "userId",
+        Cast("latitude", FloatField()),
+        Cast("longitude", FloatField()),
+        "tag",
+        "isPublic",
+    )
+    columns = tuple(zip(*rows))
+    return columns or ((),) * 6
+
+
+def _encode_tags(tags):
+    # Dictionary-encode the tag column, tags repeat heavily
+    index = {}
+    codes = [index.setdefault(tag, len(index)) for tag in tags]
+    return list(index), codes
+
+
+def columnar_payload(queryset):
+    ids, user_ids, lats, lons, tags, public = fetch_columns(queryset)
+    tag_names, codes = _encode_tags(tags)
+    return {
+        "count": len(ids),
+        "tags": tag_names,
+        "columns": {
+            "id": list(ids),
+            "user_id": list(user_ids),
+            "latitude": list(lats),
+            "longitude": list(lons),
+            "tag": codes,
+            "isPublic": [bool(value) for value in public],
+        },
+    }
+
+
+def binary_payload(queryset):
+    ids, user_ids, lats, lons, tags, public = fetch_columns(queryset)
+    tag_names, codes = _encode_tags(tags)
+
+    header = bytearray(MAGIC + struct.pack("<IHH", len(ids), len(tag_names), 0))
+    for name in tag_names:
+        # At most 255 bytes, without splitting a character
+        encoded = name.encode()[:255].decode("utf-8", "ignore").encode()
+        header += struct.pack("<B", len(encoded)) + encoded
+    header += bytes(-len(header) % 4)
+
+    arrays = [
+        array("I", ids),
+        array("I", user_ids),
+        array("f", lats),
+        array("f", lons),
+        array("H", codes),
+        array("B", (1 if value else 0 for value in public)),
+    ]
+    if sys.byteorder == "big":
+        for column in arrays:
+            column.byteswap()
+    return bytes(header) + b"".join(column.tobytes() for column in arrays)
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import POI
+from .response_cache import invalidate_poi_owners
+
+logger = logging.getLogger(__name__)
+
+
+def apply_reaction_delta(poi_id, delta):
+    """
+    Atomically add delta to a POI's reaction count in the database, never below 0.
+    A single UPDATE ... SET reactions = GREATEST(reactions + delta, 0), so concurrent
+    writers cannot lose each other's updates and the rest of the row is untouched.
+    """
+    POI.objects.filter(id=poi_id).update(reactions=Greatest(F("reactions") + delta, 0))
+    invalidate_poi_owners([poi_id])
+
+
+class ReactionBuffer:
+    """
+    Buffered-increment mode for viral POIs: deltas are summed in memory and written
+    with one UPDATE per POI every `interval` seconds, instead of one UPDATE (and one
+    row lock) per reaction. Writes only happen on flush, from the background thread
+    once started, so requests adding deltas never wait on or fail with them.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._deltas = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, poi_id, delta):
+        with self._lock:
+            self._deltas[poi_id] += delta
+
+    def pending(self, poi_id):
+        with self._lock:
+            return self._deltas.get(poi_id, 0)
+
+    def flush(self):
+        # Swap the buffer out under the lock, write it without holding the lock
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(int)
+        items = [(poi_id, delta) for poi_id, delta in deltas.items() if delta]
+        for i, (poi_id, delta) in enumerate(items):
+            try:
+                apply_reaction_delta(poi_id, delta)
+            except Exception:
+                # Keep the unwritten deltas for the next flush
+                logger.exception("Failed to flush buffered reaction counts")
+                with self._lock:
+                    for poi_id, delta in items[i:]:
+                        self._deltas[poi_id] += delta
+                return
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            close_old_connections()
+            self.flush()
+        connection.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="reaction-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and write what is left.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_reaction_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = ReactionBuffer(settings.REACTION_FLUSH_INTERVAL)
+            _buffer.start()
+            atexit.register(_buffer.stop)
+        return _buffer
+
+
+def change_reactions(poi_id, delta):
+    """
+    Record a change of a POI's reaction count using the configured counter mode:
+    "atomic" (default) writes immediately, "buffered" batches writes per process.
+    Buffered deltas are only added once the surrounding transaction commits.
+    """
+    if settings.REACTION_COUNTER_MODE == "buffered":
+        transaction.on_commit(lambda: get_reaction_buffer().add(poi_id, delta))
+    else:
+        apply_reaction_delta(poi_id, delta)
@@ -0,0 +1,140 @@
+from django.db import transaction
+
+from users.follow_graph import follower_ids, followers_many
+from .models import POI, FeedEntry
+from .response_cache import feed_scopes, invalidate
+
+BATCH_SIZE = 1000
+
+
+def _insert(entries, batch_size=BATCH_SIZE):
+    # Fan-out writes are idempotent: re-inserting an existing (user, POI) pair is
+    # a no-op
+    FeedEntry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+
+
+def _entries_from_rows(rows, batch_size=BATCH_SIZE):
+    """
+    Bulk insert feed entries from (follower_id, poi_id, author_id, created_at) rows.
+    """
+    batch = []
+    count = 0
+    follower_ids = set()
+    for follower_id, poi_id, author_id, created_at in rows:
+        if follower_id is None:
+            continue
+        follower_ids.add(follower_id)
+        batch.append(
+            FeedEntry(
+                userId_id=follower_id,
+                poiId_id=poi_id,
+                authorId_id=author_id,
+                createdAt=created_at,
+            )
+        )
+        if len(batch) >= batch_size:
+            _insert(batch, batch_size)
+            count += len(batch)
+            batch = []
+    if batch:
+        _insert(batch, batch_size)
+        count += len(batch)
+    invalidate(*feed_scopes(follower_ids))
+    return count
+
+
+def fan_out_poi(poi):
+    """
+    Push a newly visible POI into the feed of every follower of its author.
+    """
+    if not poi.is_feed_visible():
+        return 0
+    rows = (
+        (follower_id, poi.id, poi.userId_id, poi.createdAt)
+        for follower_id in follower_ids(poi.userId_id)
+    )
+    return _entries_from_rows(rows)
+
+
+def fan_out_pois(pois, batch_size=BATCH_SIZE):
+    """
+    Fan out many new POIs at once, e.g. after a bulk import: one query for the
+    followers of all their authors instead of one per POI.
+    """
+    pois = [poi for poi in pois if poi.is_feed_visible()]
+    followers = followers_many({poi.userId_id for poi in pois})
+    rows = (
+        (follower_id, poi.id, poi.userId_id, poi.createdAt)
+        for poi in pois
+        for follower_id in followers.get(poi.userId_id, [])
+    )
+    return _entries_from_rows(rows, batch_size)
+
+
+def retract_poi(poi):
+    """
+    Remove a POI from every feed, e.g. after it was deleted or made private.
+    The feeds are invalidated again after the delete: the POI's save already did,
+    but a feed read in between would have been cached with the POI still in it.
+    """
+    entries = FeedEntry.objects.filter(poiId=poi.id)
+    follower_ids = list(entries.values_list("userId", flat=True))
+    entries.delete()
+    invalidate(*feed_scopes(follower_ids))
+
+
+def sync_poi(poi):
+    """
+    Bring the feeds in line with the POI's current visibility.
+    """
+    if poi.is_feed_visible():
+        fan_out_poi(poi)
+    else:
+        retract_poi(poi)
+
+
+def add_follow(follower_id, following_id):
+    """
+    Backfill the follower's feed with the followed user's visible POIs.
+    """
+    rows = POI.objects.filter(
+        userId=following_id, isPublic=True, isDeleted=False
+    ).values_list("id", "createdAt")
+    return _entries_from_rows(
+        (follower_id, poi_id, following_id, created_at)
+        for poi_id, created_at in rows.iterator()
+    )
+
+
+def remove_follow(follower_id, following_id):
+    """
+    Drop the unfollowed user's POIs from the follower's feed.
+    """
+    FeedEntry.objects.filter(userId=follower_id, authorId=following_id).delete()
+    invalidate(f"feed:{follower_id}")
+
+
+def rebuild_feeds(user_ids=None, batch_size=BATCH_SIZE):
+    """
+    Recompute feeds from the follow graph, for every user or only the given ones.
+    Returns the number of feed entries written.
+    """
+    entries = FeedEntry.objects.all()
+    pois = POI.objects.filter(isPublic=True, isDeleted=False)
+    if user_ids is not None:
+        entries = entries.filter(userId__in=user_ids)
+        pois = pois.filter(userId__followers__follower__in=user_ids)
+
+    rows = pois.values_list("userId__followers__follower", "id", "userId", "createdAt")
+    if user_ids is not None:
+        # Only keep the join rows that belong to the requested followers
+        user_ids = set(user_ids)
+        rows = (row for row in rows.iterator() if row[0] in user_ids)
+    else:
+        rows = rows.iterator()
+
+    with transaction.atomic():
+        entries.delete()
+        # Feeds that end up empty are not seen by the fan-out below
+        invalidate(*(feed_scopes(user_ids) if user_ids is not None else ["feeds"]))
+        return _entries_from_rows(rows, batch_size)
@@ -1,12 +1,23 @@
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from .models import POI
+from .clustering import MAX_ZOOM, cluster_pois
+from .columnar import FORMATS, binary_payload, columnar_payload
+from .pagination import cursor_page, cursor_q, parse_page_size
+from .projections import FEED_POI_FIELDS, project
+from .response_cache import cached_response
+from .spatial_index import filter_bbox, parse_bbox
+from .streaming import STREAM_FORMATS, streaming_response
 from users.models import User
-from django.http import JsonResponse
+from django.http import HttpResponse
+from mapquester.renderers import JsonResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
 
 # Get Feed (POIs by followed users)
+@cached_response(
+    lambda request, user_id: ["feeds", "users", f"feed:{user_id}"], signed_urls=True
+)
 def get_feed(request, user_id):
     if request.method == "GET":
         tags = request.GET.getlist("tags")
@@ -19,17 +30,51 @@ def get_feed(request, user_id):
                 {"error": f"User with ID {user_id} does not exist."}, status=404
             )
 
-        # Fetch POIs created by followed users
-        followed_users = user.following.values_list("following", flat=True)
-        pois = POI.objects.filter(
-            Q(userId__id__in=followed_users), isPublic=True
-        ).order_by("-createdAt")
+        # Keyset (cursor) pagination is used when a cursor is passed
+        use_cursor = view_type == "list" and "cursor" in request.GET
+        try:
+            after_cursor = (
+                cursor_q(request.GET["cursor"], "feed_entries__createdAt")
+                if use_cursor
+                else Q()
+            )
+        except ValueError:
+            return JsonResponse({"error": "Invalid pagination parameters"}, status=400)
+
+        # Read POIs by followed users from the materialized feed (see feed_store.py).
+        # The cursor goes in the same filter() so it reuses the feed entry join.
+        pois = POI.objects.filter(Q(feed_entries__userId=user) & after_cursor).order_by(
+            "-feed_entries__createdAt", "-id"
+        )
 
         if tags:
             pois = pois.filter(tag__in=tags)
 
+        # Handling the list view with keyset pagination
+        if use_cursor:
+            try:
+                page_size = parse_page_size(request.GET)
+            except ValueError:
+                return JsonResponse(
+                    {"error": "Invalid pagination parameters"}, status=400
+                )
+
+            # Fetch one extra row to know whether there is a next page, no COUNT needed
+            poi_list, next_cursor = cursor_page(
+                project(pois[: page_size + 1], FEED_POI_FIELDS),
+                page_size,
+                key=lambda poi: (poi["created_at"], poi["id"]),
+            )
+
+            return JsonResponse(
+                {
+                    "pois": poi_list,
+                    "pagination": {"page_size": page_size, "next_cursor": next_cursor},
+                }
+            )
+
         # Handling the list view with pagination
-        if view_type == "list":
+        elif view_type == "list":
             # Pagination parameters
             try:
                 page = int(request.GET.get("page", 1))
@@ -48,27 +93,8 @@ def get_feed(request, user_id):
             except EmptyPage:
                 pois_page = paginator.page(paginator.num_pages)
 
-            # Build paginated POI list
-            poi_list = []
-            for poi in pois_page.object_list:
-                # Check if the POI has a valid userId and if it's not null
-                poi_user = poi.userId.username if poi.userId else "Unknown User"
-
-                poi_list.append(
-                    {
-                        "id": poi.id,
-                        "user_id": poi.userId.id if poi.userId else None,
-                        "user": poi_user,
-                        "title": poi.title,
-                        "description": poi.description,
-                        "latitude": poi.latitude,
-                        "longitude": poi.longitude,
-                        "tag": poi.tag,
-                        "created_at": poi.createdAt,
-                        "updated_at": poi.updatedAt,
-                        "content_urls": poi.content,
-                    }
-                )
+            # Build paginated POI list with the author's username joined in
+            poi_list = project(pois_page.object_list, FEED_POI_FIELDS)
 
             # Response with pagination metadata
             response_data = {
@@ -87,47 +113,73 @@ def get_feed(request, user_id):
         elif view_type == "map":
             # Retrieve bounding box coordinates from request
             try:
-                min_lat = float(request.GET.get("min_lat", -90))
-                max_lat = float(request.GET.get("max_lat", 90))
-                min_lon = float(request.GET.get("min_lon", -180))
-                max_lon = float(request.GET.get("max_lon", 180))
-                pois_query = pois.filter(
-                    latitude__gte=min_lat,
-                    latitude__lte=max_lat,
-                    longitude__gte=min_lon,
-                    longitude__lte=max_lon,
-                )
+                min_lat, max_lat, min_lon, max_lon = parse_bbox(request.GET)
             except (KeyError, ValueError):
                 return JsonResponse(
                     {
-                        "error": "Please provide valid min_lat, max_lat, min_lon, and max_lon values for map view"
+                        "error": (
+                            "Please provide valid min_lat, max_lat, min_lon, and "
+                            "max_lon values for map view"
+                        )
                     },
                     status=400,
                 )
+            stream_format = request.GET.get("stream")
+            if stream_format is not None and stream_format not in STREAM_FORMATS:
+                return JsonResponse(
+                    {"error": "Invalid stream format. Use 'json' or 'ndjson'."},
+                    status=400,
+                )
+            output_format = request.GET.get("format")
+            if output_format is not None and output_format not in FORMATS:
+                return JsonResponse(
+                    {"error": "Invalid format. Use 'columnar' or 'binary'."},
+                    status=400,
+                )
+            pois_query = filter_bbox(pois, min_lat, max_lat, min_lon, max_lon)
+
+            # Marker-only clients can get parallel arrays instead of full objects
+            if output_format == "columnar":
+                return JsonResponse(columnar_payload(pois_query))
+            if output_format == "binary":
+                return HttpResponse(
+                    binary_payload(pois_query), content_type=FORMATS["binary"]
+                )
+
+            # Large viewports can be streamed chunk by chunk instead of built in memory
+            if stream_format:
+                return streaming_response(pois_query, FEED_POI_FIELDS, stream_format)
+
+            poi_list = project(pois_query, FEED_POI_FIELDS)
+            response_data = {"pois": poi_list}
 
-            poi_list = []
-            for poi in pois_query:
-                poi_user = poi.userId.username if poi.userId else "Unknown User"
+            return JsonResponse(response_data)
 
-                poi_list.append(
+        # Handle clustered map view for dense or zoomed-out viewports
+        elif view_type == "clusters":
+            try:
+                min_lat, max_lat, min_lon, max_lon = parse_bbox(request.GET)
+                zoom = int(request.GET["zoom"])
+                if not (0 <= zoom <= MAX_ZOOM):
+                    raise ValueError(f"Zoom must be between 0 and {MAX_ZOOM}")
+            except (KeyError, ValueError):
+                return JsonResponse(
                     {
-                        "id": poi.id,
-                        "user_id": poi.userId.id if poi.userId else None,
-                        "user": poi_user,
-                        "title": poi.title,
-                        "description": poi.description,
-                        "latitude": poi.latitude,
-                        "longitude": poi.longitude,
-                        "tag": poi.tag,
-                        "created_at": poi.createdAt,
-                        "updated_at": poi.updatedAt,
-                        "content_urls": poi.content,
-                    }
+                        "error": (
+                            "Please provide valid bounding box values and a zoom level "
+                            "for clusters view"
+                        )
+                    },
+                    status=400,
                 )
+            pois_query = filter_bbox(pois, min_lat, max_lat, min_lon, max_lon)
 
-            response_data = {"pois": poi_list}
+            return JsonResponse(cluster_pois(pois_query, zoom))
 
-            return JsonResponse(response_data)
+        return JsonResponse(
+            {"error": "Invalid view type. Use 'list', 'map' or 'clusters'."},
+            status=400,
+        )
 
     else:
         return JsonResponse({"error": "Invalid request method"}, status=405)
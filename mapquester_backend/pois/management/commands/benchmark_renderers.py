@@ -0,0 +1,91 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import now
+
+from mapquester.renderers import BACKENDS, get_backend, orjson
+
+
+def synthetic_pois(count, seed=0):
+    """
+    POI rows shaped like the get_pois projection, with Decimal coordinates and
+    aware datetimes as they come out of the database.
+    """
+    rng = random.Random(seed)
+    tags = ["food", "event", "school", "photo", "music"]
+    start = now()
+    return [
+        {
+            "id": i,
+            "userId_id": rng.randint(1, 500),
+            "latitude": Decimal(f"{rng.uniform(40.5, 40.9):.6f}"),
+            "longitude": Decimal(f"{rng.uniform(-74.1, -73.8):.6f}"),
+            "isPublic": rng.random() < 0.8,
+            "isDeleted": False,
+            "title": f"Benchmark POI {i}",
+            "tag": rng.choice(tags),
+            "description": "Synthetic POI for renderer benchmarks",
+            "reactions": rng.randint(0, 100),
+            "createdAt": start
+            - timedelta(minutes=i, microseconds=rng.randint(0, 999999)),
+            "updatedAt": start - timedelta(minutes=i),
+            "content": [f"https://example.com/poi_attachments/{i}/photo.jpg"],
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compares the JSON renderer backends on a large POI payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pois", type=int, default=10000, help="Number of POIs in the payload"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=10, help="Timed runs per renderer"
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1")
+        payload = {"pois": synthetic_pois(options["pois"])}
+
+        renderers = {
+            # What JsonResponse did before mapquester/renderers.py
+            "DjangoJSONEncoder": lambda data: json.dumps(
+                data, cls=DjangoJSONEncoder
+            ).encode(),
+        }
+        for name in BACKENDS:
+            if name == "orjson" and orjson is None:
+                self.stdout.write(self.style.WARNING("orjson is not installed"))
+                continue
+            renderers[name] = get_backend(name)
+
+        self.stdout.write(
+            f"Rendering {options['pois']} POIs, best and median of "
+            f"{options['repeat']} runs\n"
+        )
+        self.stdout.write(
+            f"{'renderer':<20}{'best ms':>10}{'median ms':>12}{'KiB':>10}"
+        )
+        baseline = None
+        for name, render in renderers.items():
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                body = render(payload)
+                timings.append((time.perf_counter() - start) * 1000)
+            best = min(timings)
+            baseline = baseline or best
+            self.stdout.write(
+                f"{name:<20}{best:>10.1f}{statistics.median(timings):>12.1f}"
+                f"{len(body) / 1024:>10.0f}  ({baseline / best:.1f}x)"
+            )
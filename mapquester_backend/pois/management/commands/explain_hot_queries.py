@@ -0,0 +1,165 @@
+import random
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from pois.feed_store import rebuild_feeds
+from pois.models import POI, PoiInteractions
+from pois.spatial_index import filter_bbox
+from users.models import Follow, User
+
+# Plan lines that mean a table is read end to end
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    # SQLite prints "SCAN <table>" for full scans and "SCAN <table> USING INDEX ..."
+    # or "SEARCH ..." when an index drives the lookup
+    "sqlite": re.compile(r"\bSCAN (\w+)(?! USING)\s*$", re.MULTILINE),
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def canonical_queries(user, poi):
+    """
+    The query each hot endpoint issues, built the same way the views build them.
+    """
+    live_pois = POI.objects.filter(userId=user, isDeleted=False)
+    return {
+        "get_pois list": live_pois.order_by("-createdAt", "-id")[:10],
+        "get_pois tags": live_pois.filter(tag__in=["food", "music"]),
+        "get_pois map": filter_bbox(live_pois, 40.70, 40.75, -74.02, -73.97),
+        "get_feed list": POI.objects.filter(feed_entries__userId=user).order_by(
+            "-feed_entries__createdAt", "-id"
+        )[:10],
+        "create_interaction toggle": PoiInteractions.objects.filter(
+            userId=user, poiId=poi, interactionType="reaction"
+        ),
+        "list_interactions": PoiInteractions.objects.filter(poiId=poi).order_by(
+            "-createdAt"
+        ),
+        "followers": Follow.objects.filter(following=user),
+        "followings": Follow.objects.filter(follower=user),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on each endpoint's canonical query and fails if any of them "
+        "falls back to a sequential scan"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed this many POIs (rolled back afterwards) before explaining",
+        )
+        parser.add_argument(
+            "--users", type=int, default=50, help="Number of users to seed"
+        )
+        parser.add_argument(
+            "--show-plans", action="store_true", help="Print every query plan"
+        )
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f"EXPLAIN checks are not supported on {connection.vendor}"
+            )
+
+        try:
+            with transaction.atomic():
+                if options["seed"]:
+                    self.seed(options["seed"], options["users"])
+                failures = self.explain_all(pattern, options["show_plans"])
+                # Never keep the seeded rows
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError(
+                "Sequential scans found in: "
+                + ", ".join(f"{name} ({table})" for name, table in failures)
+            )
+        self.stdout.write(self.style.SUCCESS("All hot queries use an index"))
+
+    def explain_all(self, pattern, show_plans):
+        poi = POI.objects.order_by("id").first()
+        if poi is None:
+            raise CommandError("No POIs to explain against, use --seed")
+        failures = []
+        for name, queryset in canonical_queries(poi.userId, poi).items():
+            plan = queryset.explain()
+            if show_plans:
+                self.stdout.write(f"== {name}\n{plan}\n")
+            for table in pattern.findall(plan):
+                failures.append((name, table))
+                self.stdout.write(
+                    self.style.ERROR(f"{name}: sequential scan on {table}")
+                )
+        return failures
+
+    def seed(self, poi_count, user_count):
+        rng = random.Random(0)
+        tags = ["food", "event", "school", "photo", "music"]
+        User.objects.bulk_create(
+            [
+                User(username=f"explain_seed_{i}", password="!")
+                for i in range(user_count)
+            ]
+        )
+        users = list(User.objects.filter(username__startswith="explain_seed_"))
+        Follow.objects.bulk_create(
+            [
+                Follow(follower=follower, following=following)
+                for follower in users
+                for following in rng.sample(users, min(10, len(users)))
+                if follower != following
+            ],
+            ignore_conflicts=True,
+        )
+
+        start = now()
+        pois = []
+        for i in range(poi_count):
+            poi = POI(
+                userId=users[i % len(users)],
+                latitude=round(rng.uniform(40.5, 40.9), 6),
+                longitude=round(rng.uniform(-74.1, -73.8), 6),
+                isPublic=rng.random() < 0.8,
+                isDeleted=rng.random() < 0.05,
+                title=f"Seed POI {i}",
+                tag=rng.choice(tags),
+                description="Seeded for EXPLAIN",
+                createdAt=start - timedelta(minutes=i),
+            )
+            poi.assign_geohash()
+            pois.append(poi)
+        POI.objects.bulk_create(pois, batch_size=1000)
+
+        pois = list(POI.objects.filter(title__startswith="Seed POI ").only("id"))
+        PoiInteractions.objects.bulk_create(
+            [
+                PoiInteractions(
+                    userId=rng.choice(users),
+                    poiId=rng.choice(pois),
+                    interactionType="reaction",
+                )
+                for _ in range(poi_count // 2)
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,  # One reaction per (user, POI)
+        )
+        rebuild_feeds([user.id for user in users])
+
+        # Refresh planner statistics so the seeded distribution is taken into account
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
@@ -0,0 +1,116 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pois.feed_store import rebuild_feeds
+from pois.synthetic_data import (
+    BATCH_SIZE,
+    CITIES,
+    SyntheticDataset,
+    delete_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a reproducible benchmark dataset: users, POIs clustered around "
+        "cities, a power-law follow graph and Zipf distributed interactions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--pois", type=int, default=100000)
+        parser.add_argument(
+            "--follows-per-user",
+            type=int,
+            default=20,
+            help="Average number of accounts each user follows",
+        )
+        parser.add_argument("--interactions", type=int, default=200000)
+        parser.add_argument(
+            "--hotspots",
+            type=int,
+            default=len(CITIES),
+            help=f"Number of cities POIs cluster around (at most {len(CITIES)})",
+        )
+        parser.add_argument(
+            "--follow-skew",
+            type=float,
+            default=0.75,
+            help="Power-law exponent of follower counts",
+        )
+        parser.add_argument(
+            "--activity-skew",
+            type=float,
+            default=0.75,
+            help="Power-law exponent of POIs per author",
+        )
+        parser.add_argument(
+            "--popularity-skew",
+            type=float,
+            default=1.0,
+            help="Zipf exponent of interactions per POI",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix", default="bench", help="Usernames are <prefix>_<n>"
+        )
+        parser.add_argument(
+            "--password", default="benchmark", help="Password of every user"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Rows written per COPY or bulk_create",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create on PostgreSQL too",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the users of an earlier run with the same prefix first",
+        )
+        parser.add_argument(
+            "--skip-feeds",
+            action="store_true",
+            help="Do not rebuild the materialized feeds",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--users and --batch-size must be at least 1")
+        if options["clear"]:
+            deleted = delete_dataset(options["prefix"])
+            self.stdout.write(f"Deleted {deleted} rows of the previous dataset")
+
+        dataset = SyntheticDataset(
+            users=options["users"],
+            pois=options["pois"],
+            follows_per_user=options["follows_per_user"],
+            interactions=options["interactions"],
+            hotspots=options["hotspots"],
+            follow_skew=options["follow_skew"],
+            activity_skew=options["activity_skew"],
+            popularity_skew=options["popularity_skew"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+            password=options["password"],
+        )
+        start = time.perf_counter()
+
+        def log(table, count):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{table}: {count} rows ({elapsed:.1f} s)")
+
+        dataset.write(
+            batch_size=options["batch_size"],
+            use_copy=False if options["no_copy"] else None,
+            log=log,
+        )
+        if not options["skip_feeds"]:
+            log("feed entries", rebuild_feeds(batch_size=options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS("Benchmark dataset generated"))
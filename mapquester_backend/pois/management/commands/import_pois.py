@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pois.bulk_import import (
+    BATCH_SIZE,
+    FORMATS,
+    detect_format,
+    import_pois,
+    parse_records,
+)
+
+
+class Command(BaseCommand):
+    help = "Imports POIs from a JSON, NDJSON, CSV or GeoJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument(
+            "--user",
+            type=int,
+            dest="user_id",
+            help="Owner of POIs without a userId column",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format, detected from the extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of POIs inserted per batch",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Import nothing unless every row is valid",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only validate the file",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        if fmt is None:
+            raise CommandError("Cannot detect the file format, use --format")
+        try:
+            with open(options["path"], "rb") as f:
+                records = parse_records(f.read(), fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        pois, errors = import_pois(
+            records,
+            user_id=options["user_id"],
+            batch_size=options["batch_size"],
+            strict=options["strict"],
+            dry_run=options["dry_run"],
+        )
+        for error in errors:
+            messages = "; ".join(
+                f"{field}: {message}" for field, message in error["errors"].items()
+            )
+            self.stderr.write(f"Row {error['row']}: {messages}")
+
+        valid = len(records) - len(errors)
+        if options["dry_run"]:
+            summary = f"{valid} of {len(records)} rows are valid"
+        else:
+            summary = f"Imported {len(pois)} of {len(records)} POIs"
+        style = self.style.SUCCESS if not errors else self.style.WARNING
+        self.stdout.write(style(summary))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from pois.feed_store import BATCH_SIZE, rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the materialized feeds from the follow graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild the feed of this user id (repeatable)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of feed entries inserted per batch",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_feeds(options["user_ids"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt feeds with {count} entries"))
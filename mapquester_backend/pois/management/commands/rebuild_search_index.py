@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from pois.search import BATCH_SIZE, rebuild_index, uses_full_text
+from users import user_search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the POI search term and username trigram indexes "
+        "(PostgreSQL maintains its own)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of POIs or users indexed per batch",
+        )
+
+    def handle(self, *args, **options):
+        if uses_full_text():
+            self.stdout.write("The search indexes are maintained by PostgreSQL")
+            return
+        count = rebuild_index(options["batch_size"])
+        grams = user_search.rebuild_index(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the search index with {count} terms "
+                f"and {grams} username trigrams"
+            )
+        )
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import boto3
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import close_old_connections, connection, transaction
+from django.utils.module_loading import import_string
+from django.utils.text import get_valid_filename
+
+from health.instrumentation import timed
+from .models import POI, PoiAttachment
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024  # Larger uploads are spooled to a temporary file
+
+
+class S3MediaBackend:
+    """
+    Stores attachments in the configured S3 bucket.
+    """
+
+    def __init__(self):
+        self.client = boto3.client(
+            "s3",
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_S3_REGION_NAME,
+        )
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+
+    def upload(self, fileobj, key):
+        with timed("s3"):
+            self.client.upload_fileobj(fileobj, self.bucket, key)
+
+    def url(self, key, expires_in):
+        with timed("s3"):
+            return self.client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self.bucket, "Key": key},
+                ExpiresIn=expires_in,
+            )
+
+
+class FileSystemMediaBackend:
+    """
+    Stores attachments under MEDIA_ROOT. Used for local development and as the
+    S3 stand-in in tests.
+    """
+
+    def upload(self, fileobj, key):
+        root = os.path.realpath(settings.MEDIA_ROOT)
+        path = os.path.realpath(os.path.join(root, key))
+        if not path.startswith(root + os.sep):
+            raise SuspiciousFileOperation(f"Attachment key outside MEDIA_ROOT: {key}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as destination:
+            shutil.copyfileobj(fileobj, destination, CHUNK_SIZE)
+
+    def url(self, key, expires_in):
+        return settings.MEDIA_URL + key
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_media_backend():
+    return _load_backend(settings.POI_MEDIA_BACKEND)
+
+
+# Uploads run on a bounded pool; each POI's bookkeeping runs as one background job
+_upload_pool = ThreadPoolExecutor(
+    max_workers=settings.POI_MEDIA_UPLOAD_WORKERS, thread_name_prefix="poi-upload"
+)
+_job_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="poi-media-job")
+
+
+def _spool(fileobj):
+    # Copy the upload in chunks into a file we own, since the request's uploaded
+    # files are closed (and temporary files removed) once the response is sent
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    shutil.copyfileobj(fileobj, spooled, CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+def read_attachments(request):
+    """
+    Collect (filename, file) pairs from a request: streamed multipart files sent as
+    "content", or the legacy JSON list of {"filename", "data": <base64>} objects.
+    Raises ValueError when a legacy attachment is not valid base64.
+    """
+    files = [(upload.name, upload) for upload in request.FILES.getlist("content")]
+    legacy = request.data.get("content", []) if not files else []
+    if isinstance(legacy, list):
+        for item in legacy:
+            try:
+                data = base64.b64decode(item["data"], validate=True)
+            except (TypeError, binascii.Error) as e:
+                raise ValueError(f"Invalid base64 attachment data: {e}") from e
+            files.append((item["filename"], io.BytesIO(data)))
+    return files
+
+
+def attachment_key(poi_id, file_name):
+    """
+    Object key of an attachment: the client's file name reduced to a safe base
+    name, behind a random component so attachments with the same name do not
+    overwrite each other.
+    """
+    name = os.path.basename(str(file_name).replace("\\", "/"))
+    try:
+        name = get_valid_filename(name)
+    except SuspiciousFileOperation:  # Empty, "." or ".."
+        name = "attachment"
+    return f"poi_attachments/{poi_id}/{uuid.uuid4().hex[:12]}-{name}"
+
+
+def _upload(backend, key, fileobj):
+    try:
+        backend.upload(fileobj, key)
+    finally:
+        fileobj.close()
+
+
+def process_attachments(poi_id, uploads):
+    """
+    Upload a POI's pending attachments concurrently, then record the outcome in a
+    single transaction. uploads is a list of (attachment id, key, file).
+    """
+    backend = get_media_backend()
+    futures = {
+        attachment_id: _upload_pool.submit(_upload, backend, key, fileobj)
+        for attachment_id, key, fileobj in uploads
+    }
+    ready, failed = [], {}
+    for attachment_id, future in futures.items():
+        try:
+            future.result()
+            ready.append(attachment_id)
+        except Exception as e:
+            failed[attachment_id] = str(e)
+
+    with transaction.atomic():
+        PoiAttachment.objects.filter(id__in=ready).update(status=PoiAttachment.READY)
+        for attachment_id, error in failed.items():
+            PoiAttachment.objects.filter(id=attachment_id).update(
+                status=PoiAttachment.FAILED, error=error
+            )
+        # Lock the POI so concurrent jobs do not overwrite each other's content
+        poi = POI.objects.select_for_update().get(id=poi_id)
+        keys = PoiAttachment.objects.filter(
+            poiId=poi_id, status=PoiAttachment.READY
+        ).order_by("id")
+        # Object keys only, URLs are signed on read (see url_signing.py)
+        poi.content = list(keys.values_list("key", flat=True))
+        poi.save(update_fields=["content"])
+
+
+def _run_job(poi_id, uploads):
+    close_old_connections()
+    try:
+        process_attachments(poi_id, uploads)
+    finally:
+        connection.close()
+
+
+def schedule_attachments(poi, files):
+    """
+    Register files as pending attachments of the POI and upload them in the
+    background (or inline when POI_MEDIA_ASYNC is off). Returns the attachments.
+    """
+    if not files:
+        return []
+    attachments = PoiAttachment.objects.bulk_create(
+        [
+            PoiAttachment(poiId=poi, key=attachment_key(poi.id, file_name))
+            for file_name, _ in files
+        ]
+    )
+    uploads = [
+        (attachment.id, attachment.key, _spool(fileobj))
+        for attachment, (_, fileobj) in zip(attachments, files)
+    ]
+    if settings.POI_MEDIA_ASYNC:
+        # Start once the POI and its attachments are committed and visible
+        transaction.on_commit(lambda: _job_pool.submit(_run_job, poi.id, uploads))
+    else:
+        process_attachments(poi.id, uploads)
+    return attachments
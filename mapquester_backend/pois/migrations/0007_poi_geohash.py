@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:04
+
+from django.db import migrations, models
+
+from pois.spatial_index import encode
+
+
+def backfill_geohash(apps, schema_editor):
+    POI = apps.get_model("pois", "POI")
+    batch = []
+    for poi in POI.objects.only("id", "latitude", "longitude").iterator():
+        poi.geohash = encode(poi.latitude, poi.longitude)
+        batch.append(poi)
+        if len(batch) >= 1000:
+            POI.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    if batch:
+        POI.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pois", "0006_rename_poi_poiinteractions_poiid_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="poi",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=12
+            ),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
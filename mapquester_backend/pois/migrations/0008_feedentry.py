@@ -0,0 +1,86 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_feeds(apps, schema_editor):
+    POI = apps.get_model("pois", "POI")
+    FeedEntry = apps.get_model("pois", "FeedEntry")
+    rows = POI.objects.filter(isPublic=True, isDeleted=False).values_list(
+        "userId__followers__follower", "id", "userId", "createdAt"
+    )
+    batch = []
+    for follower_id, poi_id, author_id, created_at in rows.iterator():
+        if follower_id is None:
+            continue
+        batch.append(
+            FeedEntry(
+                userId_id=follower_id,
+                poiId_id=poi_id,
+                authorId_id=author_id,
+                createdAt=created_at,
+            )
+        )
+        if len(batch) >= 1000:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pois", "0007_poi_geohash"),
+        ("users", "0003_follow"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("createdAt", models.DateTimeField()),
+                (
+                    "authorId",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "poiId",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to="pois.poi",
+                    ),
+                ),
+                (
+                    "userId",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["userId", "-createdAt", "-poiId"],
+                        name="feed_user_created_idx",
+                    ),
+                    models.Index(
+                        fields=["userId", "authorId"], name="feed_user_author_idx"
+                    ),
+                ],
+                "unique_together": {("userId", "poiId")},
+            },
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
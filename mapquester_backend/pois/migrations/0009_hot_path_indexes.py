@@ -0,0 +1,51 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pois", "0008_feedentry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="poi",
+            index=models.Index(
+                condition=models.Q(("isDeleted", False)),
+                fields=["userId", "-createdAt", "-id"],
+                name="poi_user_live_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="poi",
+            index=models.Index(
+                condition=models.Q(("isDeleted", False)),
+                fields=["userId", "tag"],
+                name="poi_user_live_tag_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="poi",
+            index=models.Index(
+                fields=["isPublic", "userId", "-createdAt"],
+                name="poi_public_user_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="poiinteractions",
+            index=models.Index(
+                fields=["userId", "poiId", "interactionType"],
+                name="interaction_toggle_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="poiinteractions",
+            index=models.Index(
+                fields=["poiId", "-createdAt"], name="interaction_poi_created_idx"
+            ),
+        ),
+    ]
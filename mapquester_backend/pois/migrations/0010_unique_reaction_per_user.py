@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_reactions(apps, schema_editor):
+    # Keep the oldest reaction of each (user, POI) pair before enforcing uniqueness
+    PoiInteractions = apps.get_model("pois", "PoiInteractions")
+    reactions = PoiInteractions.objects.filter(interactionType="reaction")
+    duplicates = (
+        reactions.values("userId", "poiId")
+        .annotate(count=Count("id"), keep=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        reactions.filter(userId=duplicate["userId"], poiId=duplicate["poiId"]).exclude(
+            id=duplicate["keep"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pois", "0009_hot_path_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="poiinteractions",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("interactionType", "reaction")),
+                fields=("userId", "poiId"),
+                name="unique_reaction_per_user",
+            ),
+        ),
+    ]
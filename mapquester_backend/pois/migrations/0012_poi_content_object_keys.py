@@ -0,0 +1,37 @@
+from urllib.parse import unquote, urlparse
+
+from django.db import migrations
+
+KEY_PREFIX = "poi_attachments/"
+
+
+def urls_to_keys(apps, schema_editor):
+    # POI.content used to hold presigned URLs, which expire; keep the object keys
+    # instead and sign them on read
+    POI = apps.get_model("pois", "POI")
+    batch = []
+    for poi in POI.objects.exclude(content=[]).exclude(content=None).iterator():
+        keys = []
+        for value in poi.content:
+            path = unquote(urlparse(value).path) if "://" in value else value
+            start = path.find(KEY_PREFIX)
+            keys.append(path[start:] if start >= 0 else value)
+        if keys != poi.content:
+            poi.content = keys
+            batch.append(poi)
+        if len(batch) >= 1000:
+            POI.objects.bulk_update(batch, ["content"])
+            batch = []
+    if batch:
+        POI.objects.bulk_update(batch, ["content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pois", "0011_poiattachment"),
+    ]
+
+    operations = [
+        migrations.RunPython(urls_to_keys, migrations.RunPython.noop),
+    ]
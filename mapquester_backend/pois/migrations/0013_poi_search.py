@@ -0,0 +1,81 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from pois.search import SEARCH_VECTOR_SQL, document_terms
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        # Generated column, so the database keeps it current on every write
+        schema_editor.execute(
+            "ALTER TABLE pois_poi ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX poi_search_vector_idx ON pois_poi USING GIN (search_vector)"
+        )
+        return
+
+    POI = apps.get_model("pois", "POI")
+    PoiSearchTerm = apps.get_model("pois", "PoiSearchTerm")
+    batch = []
+    pois = POI.objects.only("id", "title", "tag", "description").iterator()
+    for poi in pois:
+        batch.extend(
+            PoiSearchTerm(poiId_id=poi.id, term=term, weight=weight)
+            for term, weight in document_terms(
+                poi.title, poi.tag, poi.description
+            ).items()
+        )
+        if len(batch) >= 1000:
+            PoiSearchTerm.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PoiSearchTerm.objects.bulk_create(batch)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS poi_search_vector_idx")
+        schema_editor.execute(
+            "ALTER TABLE pois_poi DROP COLUMN IF EXISTS search_vector"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pois", "0012_poi_content_object_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PoiSearchTerm",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("term", models.CharField(max_length=64)),
+                ("weight", models.PositiveSmallIntegerField()),
+                (
+                    "poiId",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="pois.poi",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["term", "poiId"], name="search_term_poi_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("poiId", "term"), name="search_poi_term"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from users.models import User
 from django.utils.timezone import now
 
+from .spatial_index import encode as geohash_encode
+
 
 class POI(models.Model):
     id = models.AutoField(primary_key=True)
@@ -24,10 +26,51 @@ class POI(models.Model):
     content = models.JSONField(
         blank=True, null=True
     )  # Storing S3 URLs as a list of strings
+    geohash = models.CharField(
+        max_length=12, blank=True, default="", db_index=True
+    )  # Spatial index key derived from latitude/longitude, see spatial_index.py
+
+    class Meta:
+        indexes = [
+            # Owner's live POIs, newest first (get_pois list and cursor paging)
+            models.Index(
+                fields=["userId", "-createdAt", "-id"],
+                name="poi_user_live_created_idx",
+                condition=models.Q(isDeleted=False),
+            ),
+            # Owner's live POIs filtered by tag__in
+            models.Index(
+                fields=["userId", "tag"],
+                name="poi_user_live_tag_idx",
+                condition=models.Q(isDeleted=False),
+            ),
+            # Public POIs per author, newest first (feed fan-out and rebuilds)
+            models.Index(
+                fields=["isPublic", "userId", "-createdAt"],
+                name="poi_public_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def is_feed_visible(self):
+        # Coerce form/JSON values ("True", 1, ...) the same way the database would
+        is_public = self._meta.get_field("isPublic").to_python(self.isPublic)
+        is_deleted = self._meta.get_field("isDeleted").to_python(self.isDeleted)
+        return is_public and not is_deleted
+
+    def assign_geohash(self):
+        # Keep the spatial index key in sync with the coordinates
+        self.geohash = geohash_encode(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.assign_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "geohash" not in update_fields:
+            kwargs["update_fields"] = list(update_fields) + ["geohash"]
+        super().save(*args, **kwargs)
+
 
 class PoiInteractions(models.Model):
     INTERACTION_TYPES = [
@@ -47,5 +90,104 @@ class PoiInteractions(models.Model):
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Reaction toggle lookup in create_interaction
+            models.Index(
+                fields=["userId", "poiId", "interactionType"],
+                name="interaction_toggle_idx",
+            ),
+            # Interactions of a POI, newest first (list_interactions)
+            models.Index(
+                fields=["poiId", "-createdAt"], name="interaction_poi_created_idx"
+            ),
+        ]
+        constraints = [
+            # One reaction per user and POI, makes reaction toggles idempotent
+            models.UniqueConstraint(
+                fields=["userId", "poiId"],
+                condition=models.Q(interactionType="reaction"),
+                name="unique_reaction_per_user",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.userId} {self.interactionType} on POI {self.poiId}"
+
+
+class PoiAttachment(models.Model):
+    """
+    Media file attached to a POI, uploaded in the background (see media.py).
+    """
+
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    poiId = models.ForeignKey(POI, on_delete=models.CASCADE, related_name="attachments")
+    key = models.CharField(max_length=512)  # Object key in the media storage
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    error = models.TextField(blank=True, default="")  # Set when the upload failed
+    createdAt = models.DateTimeField(auto_now_add=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
+
+
+class FeedEntry(models.Model):
+    """
+    Materialized feed row, one per (follower, POI) pair, written on fan-out.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    userId = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries"
+    )  # Owner of the feed
+    poiId = models.ForeignKey(
+        POI, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    authorId = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    createdAt = models.DateTimeField()  # Copy of the POI's createdAt for ordering
+
+    class Meta:
+        unique_together = ("userId", "poiId")
+        indexes = [
+            models.Index(
+                fields=["userId", "-createdAt", "-poiId"], name="feed_user_created_idx"
+            ),
+            models.Index(fields=["userId", "authorId"], name="feed_user_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"POI {self.poiId_id} in feed of {self.userId_id}"
+
+
+class PoiSearchTerm(models.Model):
+    """
+    Inverted index row for POI search on databases without full-text search
+    (see search.py): one per distinct word of a POI's title, tag and description.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    term = models.CharField(max_length=64)
+    poiId = models.ForeignKey(POI, on_delete=models.CASCADE, related_name="+")
+    weight = models.PositiveSmallIntegerField()  # Of the best field holding the term
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["poiId", "term"], name="search_poi_term"),
+        ]
+        indexes = [
+            # Term lookups and prefix range scans
+            models.Index(fields=["term", "poiId"], name="search_term_poi_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} in POI {self.poiId_id}"
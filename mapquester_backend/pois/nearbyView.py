@@ -0,0 +1,66 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from .models import POI
+from .nearby import nearest
+from .projections import NEARBY_POI_FIELDS, project
+from mapquester.renderers import JsonResponse
+
+DEFAULT_K = 10
+MAX_K = 100
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 500.0
+
+
+@api_view(["GET"])
+def nearby_pois_view(request):
+    """
+    API to get the public POIs nearest to a point, nearest first.
+    Query Parameters:
+    - `lat`, `lon`: the point
+    - `radius_km`: only POIs within this great-circle distance, at most MAX_RADIUS_KM
+    - `k`: number of POIs per page, at most MAX_K
+    - `tags`: only POIs with one of these tags (repeatable)
+    - `cursor`: next_cursor of the previous page, absent for the first page
+    """
+    try:
+        latitude = float(request.GET["lat"])
+        longitude = float(request.GET["lon"])
+        radius_km = float(request.GET.get("radius_km", DEFAULT_RADIUS_KM))
+        k = int(request.GET.get("k", DEFAULT_K))
+    except (KeyError, ValueError):
+        return Response(
+            {"error": "Please provide a valid lat, lon, radius_km and k"}, status=400
+        )
+    if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+        return Response({"error": "lat or lon is out of range"}, status=400)
+    if not (0 < radius_km <= MAX_RADIUS_KM):
+        return Response(
+            {"error": f"radius_km must be between 0 and {MAX_RADIUS_KM:g}"}, status=400
+        )
+    if not (1 <= k <= MAX_K):
+        return Response({"error": f"k must be between 1 and {MAX_K}"}, status=400)
+
+    pois_query = POI.objects.filter(isPublic=True, isDeleted=False)
+    tags = request.GET.getlist("tags")
+    if tags:
+        pois_query = pois_query.filter(tag__in=tags)
+
+    try:
+        page, next_cursor = nearest(
+            pois_query, latitude, longitude, radius_km, k, request.GET.get("cursor")
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    # Full fields of the page only, in distance order
+    distances = {pk: distance for distance, pk in page}
+    pois = project(pois_query.filter(id__in=distances), NEARBY_POI_FIELDS)
+    for poi in pois:
+        poi["distance_km"] = round(distances[poi["id"]], 4)
+    pois.sort(key=lambda poi: (distances[poi["id"]], poi["id"]))
+    return JsonResponse(
+        {
+            "pois": pois,
+            "pagination": {"k": k, "next_cursor": next_cursor},
+        }
+    )
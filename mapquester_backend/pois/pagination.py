@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(created_at, pk):
+    """
+    Build an opaque cursor pointing just after the row keyed by (created_at, pk).
+    """
+    payload = json.dumps([created_at.isoformat(), pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor back into (created_at, pk). Raises ValueError if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def cursor_q(cursor, created_field="createdAt", id_field="id"):
+    """
+    Keyset predicate selecting rows after the cursor in (-created_field, -id_field)
+    order. An empty cursor selects from the first row. Combine it with the rest of
+    the filter in a single filter() call so joins on multi-valued relations are reused.
+    """
+    if not cursor:
+        return Q()
+    created_at, pk = decode_cursor(cursor)
+    return Q(**{f"{created_field}__lt": created_at}) | Q(
+        **{created_field: created_at, f"{id_field}__lt": pk}
+    )
+
+
+def cursor_page(items, page_size, key):
+    """
+    Split the page_size + 1 rows fetched for a page into the page itself and the
+    cursor of the next page (None on the last page). key(item) -> (created_at, pk).
+    """
+    items = list(items)
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(*key(items[-1]))
+
+
+def parse_page_size(params, default=10):
+    page_size = int(params.get("page_size", default))
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+    return page_size
@@ -1,8 +1,12 @@
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from .counters import change_reactions
 from .models import PoiInteractions, POI
+from .projections import INTERACTION_FIELDS, project
+from .response_cache import cached_response
 from users.models import User
 
 
@@ -30,35 +34,39 @@ def create_interaction(request):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Check if the user already has a reaction for the same POI
-        existing_reaction = PoiInteractions.objects.filter(
-            userId=user, poiId=poi, interactionType="reaction"
-        ).first()
-
         if interactionType == "reaction":
-            if existing_reaction:
-                # Remove the reaction
-                existing_reaction.delete()
-                poi.reactions = max(0, poi.reactions - 1)
-                poi.save()
+            reactions = PoiInteractions.objects.filter(
+                userId=user, poiId=poi, interactionType="reaction"
+            )
+            # Toggle off: deleting first means only one of several concurrent
+            # toggles can observe the reaction and decrement the counter
+            with transaction.atomic():
+                removed, _ = reactions.delete()
+                if removed:
+                    change_reactions(poi.id, -1)
+            if removed:
                 return Response(
                     {"message": "Reaction removed successfully"},
                     status=status.HTTP_200_OK,
                 )
-            else:
-                # Create a new reaction
-                interaction = PoiInteractions.objects.create(
-                    userId=user, poiId=poi, interactionType=interactionType
-                )
-                poi.reactions += 1
-                poi.save()
-                return Response(
-                    {
-                        "message": "Reaction added successfully",
-                        "interaction_id": interaction.id,
-                    },
-                    status=status.HTTP_201_CREATED,
-                )
+
+            # Toggle on: the unique constraint rejects a concurrent duplicate
+            try:
+                with transaction.atomic():
+                    interaction = PoiInteractions.objects.create(
+                        userId=user, poiId=poi, interactionType=interactionType
+                    )
+                    change_reactions(poi.id, 1)
+            except IntegrityError:
+                # Another request by the same user added the reaction first
+                interaction = reactions.first()
+            return Response(
+                {
+                    "message": "Reaction added successfully",
+                    "interaction_id": interaction.id if interaction else None,
+                },
+                status=status.HTTP_201_CREATED,
+            )
 
         interaction = PoiInteractions.objects.create(
             userId=user, poiId=poi, interactionType=interactionType, content=content
@@ -79,6 +87,7 @@ def create_interaction(request):
         )
 
 
+@cached_response(lambda request, poi_id: ["users", f"interactions:{poi_id}"])
 @api_view(["GET"])
 def list_interactions(request, poi_id):
     """
@@ -87,18 +96,8 @@ def list_interactions(request, poi_id):
     try:
         poi = get_object_or_404(POI, id=poi_id)
         interactions = PoiInteractions.objects.filter(poiId=poi).order_by("-createdAt")
-        response_data = [
-            {
-                "id": interaction.id,
-                "userId": interaction.userId.id,
-                "username": interaction.userId.username,  # Added username field
-                "interactionType": interaction.interactionType,
-                "content": interaction.content,
-                "createdAt": interaction.createdAt,
-                "updatedAt": interaction.updatedAt,
-            }
-            for interaction in interactions
-        ]
+        # Username is joined in the same query (see projections.py)
+        response_data = project(interactions, INTERACTION_FIELDS)
         return Response(response_data, status=status.HTTP_200_OK)
 
     except POI.DoesNotExist:
@@ -0,0 +1,91 @@
+# Projection-based serialization: each endpoint declares the columns it ships as
+# {response key: queryset lookup}, and project() fetches exactly those columns in a
+# single query (joining related tables through the lookups) instead of loading model
+# instances and touching foreign keys row by row. Attachment object keys stored in
+# POI.content are turned into presigned URLs for the whole page at once.
+
+from itertools import islice
+
+from .url_signing import sign_rows
+
+
+class Signed(str):
+    """
+    Marks a lookup whose value is a list of attachment object keys to be signed.
+    """
+
+
+# Owner's own POIs (get_pois), keys match the model's .values() output
+POI_FIELDS = {
+    "id": "id",
+    "userId_id": "userId",
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "isPublic": "isPublic",
+    "isDeleted": "isDeleted",
+    "title": "title",
+    "tag": "tag",
+    "description": "description",
+    "reactions": "reactions",
+    "createdAt": "createdAt",
+    "updatedAt": "updatedAt",
+    "content": Signed("content"),
+}
+
+# POIs of followed users (get_feed), including the author's username
+FEED_POI_FIELDS = {
+    "id": "id",
+    "user_id": "userId",
+    "user": "userId__username",
+    "title": "title",
+    "description": "description",
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "tag": "tag",
+    "created_at": "createdAt",
+    "updated_at": "updatedAt",
+    "content_urls": Signed("content"),
+}
+
+# Search results (search_pois_view), best match first
+SEARCH_POI_FIELDS = {**FEED_POI_FIELDS, "rank": "rank"}
+
+# Nearby POIs (nearby_pois_view), the view adds distance_km
+NEARBY_POI_FIELDS = FEED_POI_FIELDS
+
+# Comments and reactions on a POI (list_interactions)
+INTERACTION_FIELDS = {
+    "id": "id",
+    "userId": "userId",
+    "username": "userId__username",
+    "interactionType": "interactionType",
+    "content": "content",
+    "createdAt": "createdAt",
+    "updatedAt": "updatedAt",
+}
+
+
+def _to_dicts(rows, fields):
+    keys = list(fields)
+    rows = [dict(zip(keys, row)) for row in rows]
+    for key, lookup in fields.items():
+        if isinstance(lookup, Signed):
+            sign_rows(rows, key)
+    return rows
+
+
+def project(queryset, fields):
+    """
+    Evaluate the queryset as a list of dicts keyed by the projection's response keys.
+    """
+    return _to_dicts(queryset.values_list(*fields.values()), fields)
+
+
+def project_chunks(queryset, fields, chunk_size):
+    """
+    Like project(), but walk the queryset with a server-side cursor and yield the
+    dicts in lists of chunk_size rows, so only one chunk is held in memory.
+    """
+    rows = queryset.values_list(*fields.values()).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield _to_dicts(chunk, fields)
@@ -0,0 +1,285 @@
+# Versioned response cache for the read endpoints. Every cached response belongs to
+# one or more scopes ("pois:<user>", "feed:<user>", "interactions:<poi>", ...). Each
+# scope has a version token stored in the cache, and the tokens are part of the
+# response's cache key and ETag. Writes bump the versions of the scopes they touch,
+# so stale entries are never read again (they simply age out) and no TTL has to
+# guess how long a response stays valid.
+
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from users.models import Follow, User
+from .clustering import MAX_ZOOM
+from .models import POI, FeedEntry, PoiInteractions
+from .url_signing import refresh_margin
+from .vector_tiles import tile_for
+
+VERSION_PREFIX = "rcv:"
+RESPONSE_PREFIX = "rc:"
+
+
+def _new_token():
+    return uuid.uuid4().hex[:12]
+
+
+def get_versions(scopes):
+    """
+    Return the current version token of each scope, creating missing ones.
+    """
+    keys = [VERSION_PREFIX + scope for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() keeps the token of a concurrent reader that got there first
+            cache.add(key, _new_token(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(scopes):
+    cache.set_many({VERSION_PREFIX + scope: _new_token() for scope in scopes}, None)
+
+
+def invalidate(*scopes):
+    """
+    Bump the versions of the given scopes. Inside a transaction the bump is repeated
+    on commit, as a concurrent reader may have cached the old rows in between.
+    """
+    scopes = set(scopes)
+    if not scopes or not settings.RESPONSE_CACHE_ENABLED:
+        return
+    _bump(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def feed_scopes(user_ids):
+    return [f"feed:{user_id}" for user_id in user_ids]
+
+
+def poi_tile_scopes(poi):
+    """
+    Scopes of the vector tiles containing the POI at every zoom level: the owner's
+    tile and the shared tile that feed tiles depend on.
+    """
+    scopes = []
+    for zoom in range(MAX_ZOOM + 1):
+        x, y = tile_for(poi.latitude, poi.longitude, zoom)
+        scopes += [f"tile:{poi.userId_id}:{zoom}/{x}/{y}", f"tile:{zoom}/{x}/{y}"]
+    return scopes
+
+
+def invalidate_poi(poi, include_feeds=True):
+    """
+    Invalidate the owner's POI lists, the tiles the POI is in and every feed
+    currently holding the POI.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return
+    scopes = [f"pois:{poi.userId_id}"] + poi_tile_scopes(poi)
+    if include_feeds:
+        scopes += feed_scopes(
+            FeedEntry.objects.filter(poiId=poi.id).values_list("userId", flat=True)
+        )
+    invalidate(*scopes)
+
+
+def invalidate_new_pois(pois):
+    """
+    Invalidate the owners' POI lists and tiles after a bulk insert, which sends no
+    signals. Tiles shared by many of the POIs are bumped once.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return
+    scopes = set()
+    for poi in pois:
+        scopes.add(f"pois:{poi.userId_id}")
+        scopes.update(poi_tile_scopes(poi))
+    invalidate(*scopes)
+
+
+def invalidate_poi_owners(poi_ids):
+    """
+    Invalidate the owners' POI lists after a bulk UPDATE, which sends no signals.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return
+    owners = POI.objects.filter(id__in=poi_ids).values_list("userId", flat=True)
+    invalidate(*(f"pois:{owner}" for owner in set(owners)))
+
+
+def signed_url_period():
+    """
+    Lifetime of a cached response holding presigned URLs. A response is built with
+    URLs valid for at least refresh_margin() seconds, so it is dropped, and its
+    ETag changed, halfway through.
+    """
+    return max(refresh_margin() // 2, 1)
+
+
+def _cache_key(request, versions, epoch=None):
+    params = sorted(
+        (key, value) for key in request.GET for value in request.GET.getlist(key)
+    )
+    raw = repr((request.path, params, versions, epoch))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison
+    tags = [tag.removeprefix("W/") for tag in parse_etags(header)]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def cached_response(scopes, signed_urls=False):
+    """
+    Cache successful GET responses of a view under the versions of
+    scopes(request, **view_kwargs), keyed by the exact query parameters. Requests
+    whose If-None-Match matches the current ETag get a 304 without running the
+    view or reading the cached body. With signed_urls (responses holding presigned
+    attachment URLs) entries and ETags only last signed_url_period() seconds, so
+    clients never keep a body whose URLs have expired.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "GET" or not settings.RESPONSE_CACHE_ENABLED:
+                return view(request, *args, **kwargs)
+
+            # Versions are read before the view runs, so a write that lands while
+            # the response is built leaves it under an already outdated version
+            timeout, epoch = settings.RESPONSE_CACHE_TIMEOUT, None
+            if signed_urls:
+                period = signed_url_period()
+                timeout, epoch = min(timeout, period), int(time.time() // period)
+            key = _cache_key(request, get_versions(scopes(request, **kwargs)), epoch)
+            etag = f'W/"{key}"'
+            if _etag_matches(request, etag):
+                response = HttpResponseNotModified()
+                response["ETag"] = etag
+                return response
+
+            cached = cache.get(RESPONSE_PREFIX + key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response["X-Cache"] = "HIT"
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                if hasattr(response, "render"):
+                    response.render()  # DRF responses are rendered lazily
+                cache.set(
+                    RESPONSE_PREFIX + key,
+                    (response.content, response["Content-Type"]),
+                    timeout,
+                )
+                response["X-Cache"] = "MISS"
+            response["ETag"] = etag
+            # Let clients keep the body but revalidate it on every use
+            response["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# Write paths that go through model save()/delete(). Bulk writes (feed fan-out,
+# reaction counters) call invalidate() themselves.
+
+
+def _invalidate_deleted(origin, instance, scopes):
+    # Rows removed by a cascade or a queryset delete collect their scopes on the
+    # origin of the delete: each distinct scope is bumped once, and the whole
+    # batch once more on commit
+    if origin is None or origin is instance:
+        invalidate(*scopes)
+        return
+    batch = getattr(origin, "_invalidated_scopes", None)
+    if batch is None:
+        batch = origin._invalidated_scopes = set()
+        transaction.on_commit(lambda: _bump(batch))
+    scopes = set(scopes) - batch
+    if scopes:
+        _bump(scopes)
+        batch.update(scopes)
+
+
+@receiver(post_save, sender=POI)
+def _poi_saved(sender, instance, created, **kwargs):
+    # A new POI is in no feed yet, fan-out invalidates the feeds it is pushed to
+    invalidate_poi(instance, include_feeds=not created)
+
+
+@receiver(pre_delete, sender=POI)
+def _poi_deleted(sender, instance, origin=None, **kwargs):
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return
+    if origin is None or origin is instance:
+        # Before the cascade removes the feed entries that tell us which feeds
+        # hold it
+        invalidate_poi(instance)
+        return
+    # Many POIs at once: every feed and all of each owner's tiles, rather than a
+    # feed entry query and the tiles of every zoom level per POI
+    owner = instance.userId_id
+    _invalidate_deleted(origin, instance, [f"pois:{owner}", f"tiles:{owner}", "feeds"])
+
+
+@receiver(post_save, sender=PoiInteractions)
+def _interaction_saved(sender, instance, **kwargs):
+    invalidate(f"interactions:{instance.poiId_id}")
+
+
+@receiver(post_delete, sender=PoiInteractions)
+def _interaction_deleted(sender, instance, origin=None, **kwargs):
+    if settings.RESPONSE_CACHE_ENABLED:
+        _invalidate_deleted(origin, instance, [f"interactions:{instance.poiId_id}"])
+
+
+def _follow_scopes(follow):
+    return [
+        f"followers:{follow.following_id}",
+        f"followings:{follow.follower_id}",
+        f"feed:{follow.follower_id}",
+    ]
+
+
+@receiver(post_save, sender=Follow)
+def _follow_saved(sender, instance, **kwargs):
+    invalidate(*_follow_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def _follow_deleted(sender, instance, origin=None, **kwargs):
+    if settings.RESPONSE_CACHE_ENABLED:
+        _invalidate_deleted(origin, instance, _follow_scopes(instance))
+
+
+@receiver(post_save, sender=User)
+def _user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Usernames and emails are joined into feeds, comments and follower lists.
+    # Logins only save last_login and are ignored.
+    if not created and not (update_fields and set(update_fields) <= {"last_login"}):
+        invalidate("users")
+
+
+@receiver(post_delete, sender=User)
+def _user_deleted(sender, instance, **kwargs):
+    invalidate("users", "feeds")
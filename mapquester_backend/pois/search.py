@@ -0,0 +1,234 @@
+# POI search over title, tag and description, with ranking and prefix matching.
+# Every query word must match (as a word prefix); results are ranked with title
+# matches above tag matches above description matches.
+#
+# Two backends maintain the index:
+# - PostgreSQL: a generated tsvector column (pois_poi.search_vector, weights A/B/C
+#   for title/tag/description) with a GIN index, see migration 0013. The database
+#   keeps it current on every write, bulk_create and COPY included. Ranked with
+#   ts_rank_cd.
+# - elsewhere (SQLite): the PoiSearchTerm inverted index, one row per distinct
+#   word of a POI with the weight of its best field. Prefixes are index range
+#   scans on (term, poi); the longest query word drives the lookup and the others
+#   are checked per candidate. Kept current by the POI post_save signal and by
+#   index_pois() for bulk writes.
+
+import re
+import sys
+import unicodedata
+
+from django.db import connection
+from django.db.models import (
+    BooleanField,
+    Case,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import POI, PoiSearchTerm
+
+BATCH_SIZE = 1000
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+# Field weights of the term index (PostgreSQL uses setweight A/B/C)
+FIELD_WEIGHTS = {"title": 4, "tag": 2, "description": 1}
+SEARCH_FIELDS = tuple(FIELD_WEIGHTS)
+# Matching a whole word counts double compared to a prefix match
+EXACT_BONUS = 2
+TS_CONFIG = "simple"  # No stemming or stop words, tags and names are multilingual
+# Expression of the pois_poi.search_vector generated column
+SEARCH_VECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(\"{field}\", '')), '{label}')"
+    for field, label in (("title", "A"), ("tag", "B"), ("description", "C"))
+)
+
+_WORD = re.compile(r"\w+")
+
+
+def uses_full_text():
+    return connection.vendor == "postgresql"
+
+
+def _fold(text):
+    # Lowercase without accents, so "Café" and "cafe" match
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text, fold=True):
+    text = _fold(text or "") if fold else (text or "").lower()
+    return [word[:MAX_TERM_LENGTH] for word in _WORD.findall(text)]
+
+
+def parse_query(q, fold=True):
+    """
+    Distinct words of a search query, in order, at most MAX_QUERY_TERMS.
+    """
+    words = []
+    for word in tokenize(q, fold):
+        if word not in words:
+            words.append(word)
+    return words[:MAX_QUERY_TERMS]
+
+
+def document_terms(title, tag, description):
+    """
+    {term: weight} of a POI, each term with the weight of its best field.
+    """
+    terms = {}
+    for field, text in (("title", title), ("tag", tag), ("description", description)):
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            if terms.get(term, 0) < weight:
+                terms[term] = weight
+    return terms
+
+
+def index_pois(pois, batch_size=BATCH_SIZE):
+    """
+    (Re)build the term index of the given POIs. A no-op on PostgreSQL.
+    """
+    if uses_full_text():
+        return 0
+    pois = list(pois)
+    PoiSearchTerm.objects.filter(poiId__in=[poi.id for poi in pois]).delete()
+    rows = [
+        PoiSearchTerm(poiId_id=poi.id, term=term, weight=weight)
+        for poi in pois
+        for term, weight in document_terms(poi.title, poi.tag, poi.description).items()
+    ]
+    PoiSearchTerm.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def index_queryset(queryset, batch_size=BATCH_SIZE):
+    """
+    Index the POIs of a queryset in batches. Returns the number of terms written.
+    """
+    if uses_full_text():
+        return 0
+    count = 0
+    batch = []
+    pois = queryset.only("id", *SEARCH_FIELDS).iterator(chunk_size=batch_size)
+    for poi in pois:
+        batch.append(poi)
+        if len(batch) >= batch_size:
+            count += index_pois(batch, batch_size)
+            batch = []
+    return count + (index_pois(batch, batch_size) if batch else 0)
+
+
+def rebuild_index(batch_size=BATCH_SIZE):
+    """
+    Index every POI from scratch. Returns the number of terms written.
+    """
+    if uses_full_text():
+        return 0
+    PoiSearchTerm.objects.all().delete()
+    return index_queryset(POI.objects.all(), batch_size)
+
+
+@receiver(post_save, sender=POI)
+def _poi_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_pois([instance])
+
+
+def term_successor(term):
+    """
+    The smallest string after every string starting with term: its last code
+    point moves to the next one (skipping surrogates), carrying over trailing
+    U+10FFFF. None when there is none. Under the binary ordering of UTF-8 text
+    (SQLite's default collation) this bounds the prefix for any next character.
+    """
+    term = term.rstrip(chr(sys.maxunicode))
+    if not term:
+        return None
+    code = ord(term[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000
+    return term[:-1] + chr(code)
+
+
+def _term_q(term, prefix="term"):
+    # Prefix match as a range scan: term <= x < successor
+    q = Q(**{f"{prefix}__gte": term})
+    successor = term_successor(term)
+    if successor:
+        q &= Q(**{f"{prefix}__lt": successor})
+    return q
+
+
+def _search_terms(queryset, words):
+    driving = max(words, key=len)
+    queryset = queryset.filter(
+        id__in=PoiSearchTerm.objects.filter(_term_q(driving)).values("poiId")
+    )
+    rank = Value(0.0)
+    for word in words:
+        matches = PoiSearchTerm.objects.filter(_term_q(word), poiId=OuterRef("pk"))
+        if word != driving:
+            queryset = queryset.filter(Exists(matches))
+        # Best weight among the matching terms, doubled for a whole word match
+        score = (
+            matches.annotate(
+                score=Case(
+                    When(term=word, then=F("weight") * EXACT_BONUS),
+                    default=F("weight"),
+                    output_field=FloatField(),
+                )
+            )
+            .values("poiId")
+            .annotate(best=Max("score"))
+            .values("best")
+        )
+        rank = rank + Coalesce(Subquery(score), Value(0.0))
+    return queryset.annotate(rank=ExpressionWrapper(rank, output_field=FloatField()))
+
+
+def _search_full_text(queryset, words):
+    # Words only hold \w characters, so they are safe tsquery lexemes
+    query = " & ".join(f"{word}:*" for word in words)
+    return queryset.filter(
+        RawSQL(
+            f"pois_poi.search_vector @@ to_tsquery('{TS_CONFIG}', %s)",
+            (query,),
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        rank=RawSQL(
+            f"ts_rank_cd(pois_poi.search_vector, to_tsquery('{TS_CONFIG}', %s))",
+            (query,),
+            output_field=FloatField(),
+        )
+    )
+
+
+def search_pois(queryset, q):
+    """
+    Filter a POI queryset to the matches of a search query, annotated with
+    `rank` and ordered best first (newest first among equal ranks). Raises
+    ValueError when the query has no words.
+    """
+    # The PostgreSQL "simple" configuration keeps accents
+    words = parse_query(q, fold=not uses_full_text())
+    if not words:
+        raise ValueError("Search query must contain at least one word")
+    if uses_full_text():
+        queryset = _search_full_text(queryset, words)
+    else:
+        queryset = _search_terms(queryset, words)
+    return queryset.order_by("-rank", "-createdAt", "-id")
@@ -0,0 +1,66 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from .models import POI
+from .pagination import parse_page_size
+from .projections import SEARCH_POI_FIELDS, project
+from .search import search_pois
+from .spatial_index import filter_bbox, parse_bbox
+from mapquester.renderers import JsonResponse
+
+BBOX_PARAMS = ("min_lat", "max_lat", "min_lon", "max_lon")
+
+
+@api_view(["GET"])
+def search_pois_view(request):
+    """
+    API to search POIs by title, tag and description, best match first.
+    Query Parameters:
+    - `q`: search words, each matching the start of a word
+    - `tags`: only POIs with one of these tags (repeatable)
+    - `min_lat`, `max_lat`, `min_lon`, `max_lon`: only POIs in this bounding box
+    - `userId`: search this user's POIs instead of all public POIs
+    - `page`, `page_size`: pagination
+    """
+    tags = request.GET.getlist("tags")
+    user_id = request.GET.get("userId")
+
+    try:
+        page = int(request.GET.get("page", 1))
+        page_size = parse_page_size(request.GET)
+        if page < 1:
+            raise ValueError("page must be positive")
+    except ValueError:
+        return Response({"error": "Invalid pagination parameters"}, status=400)
+
+    # Same visibility as get_pois for a user's POIs, public POIs otherwise
+    if user_id:
+        pois_query = POI.objects.filter(userId=user_id, isDeleted=False)
+    else:
+        pois_query = POI.objects.filter(isPublic=True, isDeleted=False)
+    if tags:
+        pois_query = pois_query.filter(tag__in=tags)
+    if any(param in request.GET for param in BBOX_PARAMS):
+        try:
+            bbox = parse_bbox(request.GET)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        pois_query = filter_bbox(pois_query, *bbox)
+
+    try:
+        pois_query = search_pois(pois_query, request.GET.get("q", ""))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    # Fetch one extra row to know whether there is a next page, no COUNT needed
+    offset = (page - 1) * page_size
+    pois = project(pois_query[offset : offset + page_size + 1], SEARCH_POI_FIELDS)
+    return JsonResponse(
+        {
+            "pois": pois[:page_size],
+            "pagination": {
+                "page": page,
+                "page_size": page_size,
+                "has_next": len(pois) > page_size,
+            },
+        }
+    )
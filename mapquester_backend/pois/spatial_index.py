@@ -0,0 +1,184 @@
+from django.db.models import Q
+
+# Geohash alphabet (base32 without a, i, l, o)
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12  # ~3.7cm x 1.9cm cells, more than DecimalField(6) resolution
+MAX_PREFIX_CELLS = 16  # upper bound on OR'd prefixes for a viewport query
+
+
+def _bits(precision):
+    # Geohash interleaves bits starting with longitude, so longitude gets the extra bit
+    total = 5 * precision
+    return (total + 1) // 2, total // 2  # (lon_bits, lat_bits)
+
+
+def _cell_index(value, low, high, bits):
+    # Index of the cell containing value when [low, high] is split into 2**bits cells
+    cells = 1 << bits
+    index = int((value - low) / (high - low) * cells)
+    return min(max(index, 0), cells - 1)
+
+
+def _hash_from_indexes(lon_index, lat_index, precision):
+    lon_bits, lat_bits = _bits(precision)
+    chars = []
+    value = 0
+    for bit in range(5 * precision):
+        if bit % 2 == 0:
+            lon_bits -= 1
+            value = (value << 1) | ((lon_index >> lon_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((lat_index >> lat_bits) & 1)
+        if bit % 5 == 4:
+            chars.append(BASE32[value])
+            value = 0
+    return "".join(chars)
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encode a coordinate as a geohash string of the given precision.
+    """
+    lon_bits, lat_bits = _bits(precision)
+    lon_index = _cell_index(float(longitude), -180.0, 180.0, lon_bits)
+    lat_index = _cell_index(float(latitude), -90.0, 90.0, lat_bits)
+    return _hash_from_indexes(lon_index, lat_index, precision)
+
+
+def decode_bounds(geohash):
+    """
+    Return (min_lat, max_lat, min_lon, max_lon) of the cell named by geohash.
+    """
+    min_lat, max_lat, min_lon, max_lon = -90.0, 90.0, -180.0, 180.0
+    is_lon = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if is_lon:
+                mid = (min_lon + max_lon) / 2
+                if bit:
+                    min_lon = mid
+                else:
+                    max_lon = mid
+            else:
+                mid = (min_lat + max_lat) / 2
+                if bit:
+                    min_lat = mid
+                else:
+                    max_lat = mid
+            is_lon = not is_lon
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def cells_for_bbox(min_lat, max_lat, min_lon, max_lon, precision):
+    """
+    List every geohash cell of the given precision that intersects the bounding box.
+    """
+    lon_bits, lat_bits = _bits(precision)
+    lat_low = _cell_index(min_lat, -90.0, 90.0, lat_bits)
+    lat_high = _cell_index(max_lat, -90.0, 90.0, lat_bits)
+    lon_low = _cell_index(min_lon, -180.0, 180.0, lon_bits)
+    lon_high = _cell_index(max_lon, -180.0, 180.0, lon_bits)
+    return [
+        _hash_from_indexes(lon_index, lat_index, precision)
+        for lat_index in range(lat_low, lat_high + 1)
+        for lon_index in range(lon_low, lon_high + 1)
+    ]
+
+
+def _cell_count(min_lat, max_lat, min_lon, max_lon, precision):
+    lon_bits, lat_bits = _bits(precision)
+    rows = (
+        _cell_index(max_lat, -90.0, 90.0, lat_bits)
+        - _cell_index(min_lat, -90.0, 90.0, lat_bits)
+        + 1
+    )
+    columns = (
+        _cell_index(max_lon, -180.0, 180.0, lon_bits)
+        - _cell_index(min_lon, -180.0, 180.0, lon_bits)
+        + 1
+    )
+    return rows * columns
+
+
+def bbox_prefixes(min_lat, max_lat, min_lon, max_lon, max_cells=MAX_PREFIX_CELLS):
+    """
+    Plan a viewport query: pick the finest geohash precision whose cells cover the
+    bounding box in at most max_cells prefixes. Returns None when even the coarsest
+    cells need more than max_cells prefixes (the box is too large to be worth pruning).
+    """
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        if _cell_count(min_lat, max_lat, min_lon, max_lon, precision) > max_cells:
+            break
+        best = precision
+    if best is None:
+        return None
+    return cells_for_bbox(min_lat, max_lat, min_lon, max_lon, best)
+
+
+def parse_bbox(params):
+    """
+    Read and validate min_lat/max_lat/min_lon/max_lon from request query params.
+    Raises ValueError when a value is missing, malformed or out of range.
+    """
+    min_lat = float(params.get("min_lat", -90))
+    max_lat = float(params.get("max_lat", 90))
+    min_lon = float(params.get("min_lon", -180))
+    max_lon = float(params.get("max_lon", 180))
+
+    # Validate coordinate ranges
+    if not (-90 <= min_lat <= 90) or not (-90 <= max_lat <= 90):
+        raise ValueError("Latitude must be between -90 and 90 degrees")
+
+    if not (-180 <= min_lon <= 180) or not (-180 <= max_lon <= 180):
+        raise ValueError("Longitude must be between -180 and 180 degrees")
+
+    # Additional validation for min/max relationship
+    if min_lat > max_lat:
+        raise ValueError("min_lat cannot be greater than max_lat")
+
+    if min_lon > max_lon:
+        raise ValueError("min_lon cannot be greater than max_lon")
+
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def prefix_successor(prefix):
+    """
+    The smallest geohash after every geohash starting with prefix: the last
+    character moves to the next base32 one, carrying over trailing "z"s. None
+    when there is none (the prefix is all "z"s).
+    """
+    prefix = prefix.rstrip(BASE32[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + BASE32[BASE32.index(prefix[-1]) + 1]
+
+
+def filter_bbox(queryset, min_lat, max_lat, min_lon, max_lon):
+    """
+    Restrict a POI queryset to a bounding box. The geohash prefixes let the database
+    use the geohash index; the exact range predicates trim the cells' edges.
+    """
+    prefixes = bbox_prefixes(min_lat, max_lat, min_lon, max_lon)
+    if prefixes:
+        cells = Q()
+        for prefix in prefixes:
+            # A range rather than LIKE 'prefix%', which SQLite cannot serve from
+            # the index. Both bounds are geohashes, so the range holds under any
+            # collation
+            cell = Q(geohash__gte=prefix)
+            successor = prefix_successor(prefix)
+            if successor:
+                cell &= Q(geohash__lt=successor)
+            cells |= cell
+        queryset = queryset.filter(cells)
+    return queryset.filter(
+        latitude__gte=min_lat,
+        latitude__lte=max_lat,
+        longitude__gte=min_lon,
+        longitude__lte=max_lon,
+    )
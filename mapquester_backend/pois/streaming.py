@@ -0,0 +1,48 @@
+# Streaming responses for result sets that can be as large as a user's whole POI
+# history (e.g. the map view with the default world bounding box). Rows are read
+# from a server-side cursor and written out chunk by chunk, so memory per request
+# stays flat and the first bytes leave before the last rows are read.
+
+from django.http import StreamingHttpResponse
+
+from mapquester.renderers import dumps
+from .projections import project_chunks
+
+CHUNK_SIZE = 500
+
+# Values of the "stream" query parameter
+STREAM_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json_body(key, chunks):
+    # Same document as the buffered response: {"<key>": [row, row, ...]}
+    yield b"{" + dumps(key) + b":["
+    separator = b""
+    for chunk in chunks:
+        if chunk:
+            yield separator + b",".join(dumps(row) for row in chunk)
+            separator = b","
+    yield b"]}"
+
+
+def _ndjson_body(chunks):
+    # One row per line, clients can render rows as they arrive
+    for chunk in chunks:
+        if chunk:
+            yield b"".join(dumps(row) + b"\n" for row in chunk)
+
+
+def streaming_response(queryset, fields, stream_format, key="pois"):
+    """
+    Stream the projected rows of a queryset as a JSON document ({key: [...]}) or as
+    NDJSON, one line per row.
+    """
+    chunks = project_chunks(queryset, fields, CHUNK_SIZE)
+    if stream_format == "ndjson":
+        body = _ndjson_body(chunks)
+    else:
+        body = _json_body(key, chunks)
+    return StreamingHttpResponse(body, content_type=STREAM_FORMATS[stream_format])
@@ -0,0 +1,400 @@
+# Synthetic datasets for benchmarks, sized from thousands to millions of rows.
+# Everything is drawn from one seeded random.Random, so the same arguments produce
+# the same rows:
+# - POIs cluster around city hotspots (gaussian spread around each city, cities
+#   weighted by size), with a share scattered uniformly
+# - follows follow a power law: each user follows a heavy-tailed number of
+#   accounts, picked by a Zipf-like popularity rank, so a few celebrities end up
+#   with a large share of all users as followers
+# - authorship and interactions are Zipf distributed as well, most POIs get
+#   nothing and a few get most of the reactions and comments
+# Rows get explicit ids following the current maximum, so the dataset can be
+# streamed in batches without reading ids back. They are written with COPY on
+# PostgreSQL and bulk_create elsewhere; the id sequences are reset afterwards.
+
+import io
+import json
+import math
+import random
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import CASCADE, SET_NULL, Count, Max, OuterRef, Q, Subquery
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.functions import Coalesce
+
+from users import user_search
+from users.follow_counts import recount_follow_counts
+from users.models import Follow, User
+from .models import POI, PoiInteractions
+from .response_cache import invalidate
+from .search import index_queryset
+from .spatial_index import encode as geohash_encode
+
+BATCH_SIZE = 5000
+# Timestamps are spread over the year before this date, not before now(), so
+# that runs are reproducible
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# (latitude, longitude, relative size)
+CITIES = [
+    (40.7128, -74.0060, 20),  # New York
+    (34.0522, -118.2437, 13),  # Los Angeles
+    (51.5074, -0.1278, 14),  # London
+    (48.8566, 2.3522, 11),  # Paris
+    (35.6762, 139.6503, 37),  # Tokyo
+    (19.4326, -99.1332, 22),  # Mexico City
+    (-23.5505, -46.6333, 22),  # Sao Paulo
+    (28.6139, 77.2090, 32),  # Delhi
+    (31.2304, 121.4737, 28),  # Shanghai
+    (30.0444, 31.2357, 21),  # Cairo
+    (41.8781, -87.6298, 9),  # Chicago
+    (43.6532, -79.3832, 6),  # Toronto
+    (52.5200, 13.4050, 4),  # Berlin
+    (40.4168, -3.7038, 7),  # Madrid
+    (-33.8688, 151.2093, 5),  # Sydney
+    (1.3521, 103.8198, 6),  # Singapore
+    (37.5665, 126.9780, 10),  # Seoul
+    (6.5244, 3.3792, 15),  # Lagos
+    (-34.6037, -58.3816, 15),  # Buenos Aires
+    (41.0082, 28.9784, 15),  # Istanbul
+]
+HOTSPOT_SPREAD = 0.08  # Standard deviation around a city, in degrees (~9 km)
+HOTSPOT_SHARE = 0.85  # Share of POIs placed around a city
+TAGS = ["food", "event", "school", "photo", "music", "park", "museum", "shop"]
+COMMENTS = [
+    "Great spot!",
+    "Love this place!",
+    "Must visit!",
+    "Amazing view!",
+    "Thanks for sharing!",
+]
+
+
+def zipf_rank(rng, n, skew):
+    """
+    Draw a rank in [0, n) with probability roughly proportional to
+    1 / (rank + 1) ** skew, in constant time (inverse CDF of the continuous
+    power law, so no n sized weight table is needed).
+    """
+    u = rng.random()
+    if skew == 1:
+        x = (n + 1) ** u
+    else:
+        x = (((n + 1) ** (1 - skew) - 1) * u + 1) ** (1 / (1 - skew))
+    return min(int(x) - 1, n - 1)
+
+
+def _shuffled(rng, n):
+    # Maps popularity ranks to row numbers, so popular users are spread over the ids
+    order = list(range(n))
+    rng.shuffle(order)
+    return order
+
+
+def _copy_value(value):
+    # PostgreSQL COPY text format
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, (list, dict)):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy(model, objs):
+    fields = model._meta.concrete_fields
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    sql = (
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+        "FROM STDIN"
+    )
+    data = "".join(
+        "\t".join(_copy_value(field.pre_save(obj, True)) for field in fields) + "\n"
+        for obj in objs
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy"):  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(data)
+        else:  # psycopg2
+            raw.copy_expert(sql, io.StringIO(data))
+
+
+def write_rows(model, objs, batch_size=BATCH_SIZE, use_copy=None):
+    """
+    Insert model instances in batches, with COPY on PostgreSQL. Returns the count.
+    """
+    if use_copy is None:
+        use_copy = connection.vendor == "postgresql"
+    count = 0
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            count += _write_batch(model, batch, batch_size, use_copy)
+            batch = []
+    if batch:
+        count += _write_batch(model, batch, batch_size, use_copy)
+    return count
+
+
+def _write_batch(model, batch, batch_size, use_copy):
+    if use_copy:
+        _copy(model, batch)
+    else:
+        model.objects.bulk_create(batch, batch_size=batch_size)
+    return len(batch)
+
+
+def _bulk_delete(queryset):
+    # One DELETE per table, children first, without loading the rows or sending
+    # signals: the collector behind QuerySet.delete() takes a query per batch of
+    # rows and a counter UPDATE per follow
+    count = 0
+    for relation in get_candidate_relations_to_delete(queryset.model._meta):
+        related = relation.related_model._base_manager.filter(
+            **{f"{relation.field.name}__in": queryset.values("pk")}
+        )
+        if relation.on_delete is CASCADE:
+            count += _bulk_delete(related)
+        elif relation.on_delete is SET_NULL:
+            related.update(**{relation.field.name: None})
+    return count + queryset._raw_delete(queryset.db)
+
+
+def _reaction_counts():
+    return (
+        PoiInteractions.objects.filter(poiId=OuterRef("pk"), interactionType="reaction")
+        .values("poiId")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+
+def delete_dataset(prefix):
+    """
+    Delete the users of an earlier run with this prefix, and everything they own.
+    Returns the number of rows deleted.
+    """
+    users = User.objects.filter(username__regex=rf"^{re.escape(prefix)}_[0-9]+$")
+    with transaction.atomic():
+        # Counters of the other users and POIs the dataset's rows point to
+        others = User.objects.exclude(id__in=users.values("id"))
+        followed = list(
+            others.filter(
+                Q(followers__follower__in=users.values("id"))
+                | Q(following__following__in=users.values("id"))
+            ).values_list("id", flat=True)
+        )
+        reacted = list(
+            POI.objects.exclude(userId__in=users.values("id"))
+            .filter(interactions__userId__in=users.values("id"))
+            .values_list("id", flat=True)
+        )
+
+        count = _bulk_delete(users)
+        recount_follow_counts(User.objects.filter(id__in=followed))
+        POI.objects.filter(id__in=reacted).update(
+            reactions=Coalesce(Subquery(_reaction_counts()), 0)
+        )
+        invalidate("users", "feeds")
+    return count
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+
+
+def _reset_sequences(models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+class SyntheticDataset:
+    """
+    Generates users, POIs, follows and interactions. Users are named
+    "{prefix}_{n}"; all of them share one password.
+    """
+
+    def __init__(
+        self,
+        users=10000,
+        pois=100000,
+        follows_per_user=20,
+        interactions=200000,
+        hotspots=len(CITIES),
+        follow_skew=0.75,
+        activity_skew=0.75,
+        popularity_skew=1.0,
+        seed=0,
+        prefix="bench",
+        password="benchmark",
+    ):
+        self.users = users
+        self.pois = pois
+        self.follows_per_user = follows_per_user
+        self.interactions = interactions
+        self.cities = CITIES[: max(hotspots, 0)]
+        self.city_weights = [size for _, _, size in self.cities]
+        self.follow_skew = follow_skew
+        self.activity_skew = activity_skew
+        self.popularity_skew = popularity_skew
+        self.prefix = prefix
+        self.password = password
+        self.rng = random.Random(seed)
+
+    def _timestamp(self):
+        return EPOCH - timedelta(seconds=self.rng.uniform(0, 365 * 24 * 3600))
+
+    def _location(self):
+        rng = self.rng
+        if self.cities and rng.random() < HOTSPOT_SHARE:
+            latitude, longitude, _ = rng.choices(self.cities, self.city_weights)[0]
+            latitude += rng.gauss(0, HOTSPOT_SPREAD)
+            longitude += rng.gauss(0, HOTSPOT_SPREAD / math.cos(math.radians(latitude)))
+        else:
+            latitude = rng.uniform(-60, 70)
+            longitude = rng.uniform(-180, 180)
+        return (
+            round(min(max(latitude, -90), 90), 6),
+            round((longitude + 180) % 360 - 180, 6),
+        )
+
+    def generate_users(self, first_id):
+        password = make_password(self.password)
+        for n in range(self.users):
+            yield User(
+                id=first_id + n,
+                username=f"{self.prefix}_{n}",
+                email=f"{self.prefix}_{n}@example.com",
+                password=password,
+                date_joined=self._timestamp(),
+            )
+
+    def generate_follows(self, first_id, first_user_id):
+        # Out-degree is Pareto distributed (alpha 1.5, mean follows_per_user),
+        # followed accounts are picked by popularity rank
+        rng = self.rng
+        n = self.users
+        if n < 2 or self.follows_per_user <= 0:
+            return
+        popular = _shuffled(rng, n)
+        follow_id = first_id
+        for follower in range(n):
+            degree = int(rng.paretovariate(1.5) * self.follows_per_user / 3)
+            degree = min(max(degree, 1), n - 1)
+            following = set()
+            for _ in range(degree * 3):
+                if len(following) >= degree:
+                    break
+                target = popular[zipf_rank(rng, n, self.follow_skew)]
+                if target != follower:
+                    following.add(target)
+            for target in sorted(following):
+                yield Follow(
+                    id=follow_id,
+                    follower_id=first_user_id + follower,
+                    following_id=first_user_id + target,
+                )
+                follow_id += 1
+
+    def generate_pois(self, first_id, first_user_id):
+        rng = self.rng
+        authors = _shuffled(rng, self.users)
+        for n in range(self.pois):
+            latitude, longitude = self._location()
+            created_at = self._timestamp()
+            yield POI(
+                id=first_id + n,
+                userId_id=first_user_id
+                + authors[zipf_rank(rng, self.users, self.activity_skew)],
+                latitude=latitude,
+                longitude=longitude,
+                geohash=geohash_encode(latitude, longitude),
+                isPublic=rng.random() < 0.8,
+                title=f"{self.prefix} POI {n}",
+                tag=rng.choice(TAGS),
+                description=f"Synthetic POI number {n}",
+                createdAt=created_at,
+                updatedAt=created_at,
+                content=[],
+            )
+
+    def generate_interactions(self, first_id, first_poi_id, first_user_id):
+        # At most one reaction per user and POI, a repeated pair becomes a comment
+        rng = self.rng
+        if not self.pois:
+            return
+        popular = _shuffled(rng, self.pois)
+        reacted = set()
+        for n in range(self.interactions):
+            poi = popular[zipf_rank(rng, self.pois, self.popularity_skew)]
+            user = rng.randrange(self.users)
+            interaction_type = "reaction" if rng.random() < 0.7 else "comment"
+            if interaction_type == "reaction":
+                if (user, poi) in reacted:
+                    interaction_type = "comment"
+                else:
+                    reacted.add((user, poi))
+            yield PoiInteractions(
+                id=first_id + n,
+                userId_id=first_user_id + user,
+                poiId_id=first_poi_id + poi,
+                interactionType=interaction_type,
+                content=rng.choice(COMMENTS) if interaction_type == "comment" else None,
+            )
+
+    def write(self, batch_size=BATCH_SIZE, use_copy=None, log=None):
+        """
+        Write the dataset. Returns {table: rows written}; log(table, count) is
+        called as each table is done.
+        """
+        counts = {}
+
+        def run(name, model, objs):
+            counts[name] = write_rows(model, objs, batch_size, use_copy)
+            if log:
+                log(name, counts[name])
+
+        with transaction.atomic():
+            first_user = _next_id(User)
+            first_poi = _next_id(POI)
+            run("users", User, self.generate_users(first_user))
+            # Search indexes of databases other than PostgreSQL (see search.py
+            # and users/user_search.py), no-ops on PostgreSQL
+            user_search.index_queryset(
+                User.objects.filter(id__gte=first_user), batch_size
+            )
+            run("follows", Follow, self.generate_follows(_next_id(Follow), first_user))
+            run("pois", POI, self.generate_pois(first_poi, first_user))
+            index_queryset(POI.objects.filter(id__gte=first_poi), batch_size)
+            run(
+                "interactions",
+                PoiInteractions,
+                self.generate_interactions(
+                    _next_id(PoiInteractions), first_poi, first_user
+                ),
+            )
+            _reset_sequences([User, Follow, POI, PoiInteractions])
+            # Follows were written without signals, count them in one UPDATE
+            recount_follow_counts(User.objects.filter(id__gte=first_user))
+
+            # Reaction counters of the new POIs, in one UPDATE
+            POI.objects.filter(id__gte=first_poi).update(
+                reactions=Coalesce(Subquery(_reaction_counts()), 0)
+            )
+        return counts
@@ -0,0 +1,78 @@
+from django.test import SimpleTestCase
+from benchmarks.compare import diff_reports, failed
+from benchmarks.runner import Fixtures, percentile, summarize
+from benchmarks.scenarios import AFTER_RESPONSE, SCENARIOS
+import random
+
+FIXTURES = Fixtures(
+    readers=[(1, "bench_0"), (2, "bench_1"), (3, "bench_2")],
+    authors=[(2, "bench_1")],
+    celebrities=[(3, "bench_2")],
+    pois=[10, 11],
+    centers=[(40.7, -74.0)],
+)
+
+
+def report(p95, queries, errors=0):
+    return {
+        "meta": {"revision": "abc"},
+        "scenarios": {
+            "feed_list": {
+                "requests": 100,
+                "errors": errors,
+                "throughput_rps": 100.0,
+                "latency_ms": {"p50": 10.0, "p95": p95, "p99": 30.0},
+                "queries_per_request": {"mean": queries, "max": queries},
+            }
+        },
+    }
+
+
+class BenchmarkSuiteTests(SimpleTestCase):
+    def test_summary(self):
+        """Test the percentiles, throughput and query counts of a scenario"""
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99)], [50, 95, 99])
+        summary = summarize([(200, i / 1000, 2) for i in values] + [(500, 0.5, 4)], 2)
+        self.assertEqual(summary["requests"], 101)
+        self.assertEqual(summary["errors"], 1)
+        self.assertFalse(summary["valid"])
+        self.assertEqual(summary["throughput_rps"], 50.5)
+        # The failed request is left out of the latencies and query counts
+        self.assertEqual(summary["latency_ms"]["max"], 100)
+        self.assertEqual(summary["queries_per_request"]["max"], 2)
+
+    def test_scenarios(self):
+        """Test that scenarios build reproducible requests and follow cursors"""
+        for name, build in SCENARIOS.items():
+            first = build(random.Random(1), FIXTURES, {})
+            self.assertEqual(first, build(random.Random(1), FIXTURES, {}), name)
+            self.assertTrue(first.path.startswith("/api/v1/"))
+        state = {}
+        SCENARIOS["list_paging"](random.Random(1), FIXTURES, state)
+        AFTER_RESPONSE["list_paging"](state, {"pagination": {"next_cursor": "abc"}})
+        request = SCENARIOS["list_paging"](random.Random(1), FIXTURES, state)
+        self.assertEqual(request.params["cursor"], "abc")
+
+    def test_regressions(self):
+        """Test that slower p95, extra queries and errors are regressions"""
+        self.assertEqual(diff_reports(report(20, 2), report(21, 2))["regressed"], [])
+        for head in (report(30, 2), report(20, 3)):
+            self.assertEqual(
+                diff_reports(report(20, 2), head)["regressed"], ["feed_list"]
+            )
+        self.assertFalse(failed(diff_reports(report(20, 2), report(21, 2))))
+        # Failed requests make the comparison invalid, more of them on head are a
+        # regression too
+        diff = diff_reports(report(20, 2), report(30, 2, errors=1))
+        self.assertEqual(diff["regressed"], ["feed_list"])
+        self.assertEqual(diff["invalid"], ["feed_list"])
+        diff = diff_reports(report(20, 2, errors=3), report(20, 2, errors=1))
+        self.assertEqual(diff["regressed"], [])
+        self.assertTrue(failed(diff))
+        # A scenario head did not run fails the comparison
+        head = report(20, 2)
+        head["scenarios"] = {}
+        diff = diff_reports(report(20, 2), head)
+        self.assertEqual(diff["missing"], ["feed_list"])
+        self.assertTrue(failed(diff))
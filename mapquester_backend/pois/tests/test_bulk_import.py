@@ -0,0 +1,232 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.bulk_import import import_pois, parse_records
+from pois.feed_store import add_follow
+from pois.models import POI, FeedEntry
+from pois.spatial_index import encode
+from users.models import Follow
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+import json
+import os
+import tempfile
+
+User = get_user_model()
+
+CSV = (
+    "name,description,category,lat,lng,isPublic\n"
+    "Pizza,Best slice,food,40.7128,-74.0060,true\n"
+    "Gig,Live music,music,40.7306,-73.9352,no\n"
+    "Nowhere,Bad row,food,91,-74.0,true\n"
+)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="testpass123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+
+    def record(self, i, **fields):
+        return dict(
+            {
+                "title": f"POI {i}",
+                "description": "Test Description",
+                "tag": "food",
+                "latitude": 40.7 + i / 1000,
+                "longitude": -74.0,
+            },
+            **fields,
+        )
+
+    def test_formats(self):
+        """Test that every format parses to the same records"""
+        expected = {"title": "Pizza", "latitude": 40.5, "longitude": -74.0}
+        documents = {
+            "json": json.dumps({"pois": [expected]}),
+            "ndjson": json.dumps(expected) + "\n\n",
+            "csv": "title,latitude,longitude\nPizza,40.5,-74.0\n",
+            "geojson": json.dumps(
+                {
+                    "type": "FeatureCollection",
+                    "features": [
+                        {
+                            "type": "Feature",
+                            "geometry": {"type": "Point", "coordinates": [-74.0, 40.5]},
+                            "properties": {"title": "Pizza"},
+                        }
+                    ],
+                }
+            ),
+        }
+        for fmt, content in documents.items():
+            records = parse_records(content.encode(), fmt)
+            self.assertEqual(len(records), 1)
+            self.assertEqual(
+                {key: str(value) for key, value in records[0].items()},
+                {key: str(value) for key, value in expected.items()},
+            )
+        with self.assertRaises(ValueError):
+            parse_records("{", "json")
+
+    def test_row_errors(self):
+        """Test that invalid rows are reported and the rest are imported"""
+        records = parse_records(CSV, "csv") + [
+            "not an object",
+            self.record(5, userId=999999),
+        ]
+        pois, errors = import_pois(records, user_id=self.author.id)
+        self.assertEqual([poi.title for poi in pois], ["Pizza", "Gig"])
+        self.assertEqual(
+            errors,
+            [
+                {
+                    "row": 3,
+                    "errors": {"latitude": "Must be between -90 and 90 degrees."},
+                },
+                {"row": 4, "errors": {"record": "Expected an object."}},
+                {
+                    "row": 5,
+                    "errors": {"userId": "User with ID 999999 does not exist."},
+                },
+            ],
+        )
+        pizza = POI.objects.get(title="Pizza")
+        self.assertEqual(pizza.userId, self.author)
+        self.assertEqual(pizza.latitude, Decimal("40.712800"))
+        self.assertEqual(pizza.tag, "food")
+        self.assertEqual(pizza.geohash, encode(pizza.latitude, pizza.longitude))
+        self.assertFalse(POI.objects.get(title="Gig").isPublic)
+
+    def test_strict_and_dry_run(self):
+        """Test that strict imports are all or nothing and dry runs write nothing"""
+        records = [self.record(1), self.record(2, latitude="north")]
+        pois, errors = import_pois(records, user_id=self.author.id, strict=True)
+        self.assertEqual((pois, len(errors)), ([], 1))
+        pois, errors = import_pois(records[:1], user_id=self.author.id, dry_run=True)
+        self.assertEqual((pois, errors), ([], []))
+        self.assertFalse(POI.objects.exists())
+
+    def test_batches_and_fan_out(self):
+        """Test that rows are inserted in batches and pushed to followers' feeds"""
+        Follow.objects.create(follower=self.reader, following=self.author)
+        add_follow(self.reader.id, self.author.id)
+        records = [self.record(i, isPublic=i % 2 == 0) for i in range(10)]
+        with mock.patch.object(
+            POI.objects, "bulk_create", wraps=POI.objects.bulk_create
+        ) as bulk_create:
+            pois, errors = import_pois(records, user_id=self.author.id, batch_size=4)
+        bulk_create.assert_called_once()
+        self.assertEqual(bulk_create.call_args.kwargs["batch_size"], 4)
+        self.assertEqual(errors, [])
+        self.assertTrue(all(poi.id for poi in pois))
+        self.assertEqual(
+            set(
+                FeedEntry.objects.filter(userId=self.reader).values_list(
+                    "poiId", flat=True
+                )
+            ),
+            {poi.id for poi in pois if poi.isPublic},
+        )
+
+    def test_endpoint(self):
+        """Test the bulk endpoint with JSON and GeoJSON bodies and a file upload"""
+        url = reverse("bulk_create_pois")
+        response = self.client.post(
+            url,
+            data=json.dumps(
+                {
+                    "userId": self.author.id,
+                    "pois": [self.record(1), self.record(2, tag="")],
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(response.json()["errors"][0]["row"], 2)
+
+        response = self.client.post(
+            url,
+            data=json.dumps(
+                {
+                    "type": "FeatureCollection",
+                    "userId": self.author.id,
+                    "features": [
+                        {
+                            "type": "Feature",
+                            "geometry": {"type": "Point", "coordinates": [-74.0, 40.5]},
+                            "properties": self.record(3),
+                        },
+                        {"type": "Feature", "geometry": {"type": "LineString"}},
+                        {
+                            "type": "Feature",
+                            "geometry": {"type": "Point", "coordinates": 1},
+                            "properties": self.record(4),
+                        },
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual([e["row"] for e in response.json()["errors"]], [2, 3])
+        self.assertEqual(
+            POI.objects.get(id=response.json()["poi_ids"][0]).latitude, Decimal("40.5")
+        )
+        POI.objects.filter(id__in=response.json()["poi_ids"]).delete()
+
+        upload = SimpleUploadedFile("pois.csv", CSV.encode(), "text/csv")
+        response = self.client.post(
+            url + "?strict=true", {"file": upload, "userId": self.author.id}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["created"], 0)
+        self.assertEqual(POI.objects.count(), 1)
+
+        response = self.client.post(
+            url,
+            data=json.dumps({"userId": self.author.id}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        # Bodies that are not an object, and features that are not objects
+        for body in (
+            [self.record(1)],
+            "pois",
+            {"type": "FeatureCollection", "features": ["nope"]},
+            {"type": "FeatureCollection", "features": {"type": "Feature"}},
+        ):
+            response = self.client.post(
+                url, data=json.dumps(body), content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn("error", response.json())
+        with mock.patch("pois.bulkImportView.MAX_BULK_POIS", 1):
+            response = self.client.post(
+                url,
+                data=json.dumps(
+                    {"userId": self.author.id, "pois": [self.record(1)] * 2}
+                ),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        """Test the import_pois management command"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(CSV)
+        self.addCleanup(os.remove, f.name)
+        out, err = StringIO(), StringIO()
+        call_command("import_pois", f.name, user=self.author.id, stdout=out, stderr=err)
+        self.assertIn("Imported 2 of 3 POIs", out.getvalue())
+        self.assertIn("Row 3: latitude", err.getvalue())
+        self.assertEqual(POI.objects.filter(userId=self.author).count(), 2)
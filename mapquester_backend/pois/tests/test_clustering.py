@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.models import POI
+from pois.clustering import zoom_to_precision
+from pois.feed_store import add_follow
+from users.models import Follow
+
+User = get_user_model()
+
+
+class ClusterViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        # Two dense groups of POIs: New York and London
+        for i in range(6):
+            POI.objects.create(
+                userId=self.user,
+                title=f"NYC {i}",
+                description="Test Description",
+                tag="food" if i % 3 else "music",
+                latitude=40.71 + i * 0.001,
+                longitude=-74.00 + i * 0.001,
+            )
+        for i in range(4):
+            POI.objects.create(
+                userId=self.user,
+                title=f"London {i}",
+                description="Test Description",
+                tag="photo",
+                latitude=51.50 + i * 0.001,
+                longitude=-0.12 + i * 0.001,
+            )
+
+    def test_zoom_to_precision_bounds(self):
+        """Test that every zoom level maps to a valid geohash precision"""
+        self.assertEqual(zoom_to_precision(0), 1)
+        self.assertTrue(all(1 <= zoom_to_precision(z) <= 12 for z in range(23)))
+
+    def test_get_pois_clusters(self):
+        """Test grid-aggregated buckets for a zoomed-out viewport"""
+        response = self.client.get(
+            reverse("get_pois", args=[self.user.id]),
+            {"viewType": "clusters", "zoom": 3},
+        )
+        self.assertEqual(response.status_code, 200)
+        clusters = response.json()["clusters"]
+        self.assertEqual(sorted(c["count"] for c in clusters), [4, 6])
+        nyc = max(clusters, key=lambda c: c["count"])
+        self.assertAlmostEqual(nyc["latitude"], 40.7125, places=4)
+        self.assertEqual(nyc["top_tags"][0], {"tag": "food", "count": 4})
+        self.assertEqual(len(nyc["sample_ids"]), 3)
+
+    def test_get_pois_clusters_requires_zoom(self):
+        """Test clusters view without a zoom level"""
+        response = self.client.get(
+            reverse("get_pois", args=[self.user.id]), {"viewType": "clusters"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_feed_clusters(self):
+        """Test clusters view over the feed of followed users"""
+        follower = User.objects.create_user(
+            username="follower", email="follower@example.com", password="testpass123"
+        )
+        Follow.objects.create(follower=follower, following=self.user)
+        add_follow(follower.id, self.user.id)
+        response = self.client.get(
+            reverse("get_feed", args=[follower.id]),
+            {"viewType": "clusters", "zoom": 3, "min_lat": 50, "max_lat": 52},
+        )
+        self.assertEqual(response.status_code, 200)
+        clusters = response.json()["clusters"]
+        self.assertEqual([c["count"] for c in clusters], [4])
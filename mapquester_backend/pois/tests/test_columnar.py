@@ -0,0 +1,145 @@
+import struct
+from array import array
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.feed_store import add_follow
+from pois.models import POI
+from users.models import Follow
+
+User = get_user_model()
+
+MAP = {
+    "viewType": "map",
+    "min_lat": 40.0,
+    "max_lat": 41.0,
+    "min_lon": -75.0,
+    "max_lon": -73.0,
+}
+
+
+def decode_binary(data):
+    """Parse the format=binary layout documented in pois/columnar.py"""
+    assert data[:4] == b"MQP1"
+    count, tag_count, _ = struct.unpack_from("<IHH", data, 4)
+    pos = 12
+    tags = []
+    for _ in range(tag_count):
+        length = data[pos]
+        tags.append(data[pos + 1 : pos + 1 + length].decode())
+        pos += 1 + length
+    pos += -pos % 4
+    columns = []
+    for typecode in "IIffHB":
+        column = array(typecode)
+        size = column.itemsize * count
+        column.frombytes(data[pos : pos + size])
+        columns.append(list(column))
+        pos += size
+    assert pos == len(data)
+    return tags, columns
+
+
+class ColumnarFormatTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="testpass123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+        Follow.objects.create(follower=self.reader, following=self.author)
+        for i in range(50):
+            POI.objects.create(
+                userId=self.author,
+                title=f"POI {i}",
+                description="A longer description that map markers never show",
+                tag=["food", "music", "photo"][i % 3],
+                latitude=40.5 + i / 1000,
+                longitude=-74.0 - i / 1000,
+                isPublic=i % 5 != 0,
+            )
+        add_follow(self.reader.id, self.author.id)
+
+    def get_map(self, name, user_id, **params):
+        return self.client.get(reverse(name, args=[user_id]), dict(MAP, **params))
+
+    def test_columnar_matches_map_view(self):
+        """Test that the parallel arrays hold the same POIs as the map view"""
+        pois = self.get_map("get_pois", self.author.id).json()["pois"]
+        data = self.get_map("get_pois", self.author.id, format="columnar").json()
+        self.assertEqual(data["count"], 50)
+        columns = data["columns"]
+        rows = {
+            poi_id: (lat, lon, data["tags"][tag], public)
+            for poi_id, lat, lon, tag, public in zip(
+                columns["id"],
+                columns["latitude"],
+                columns["longitude"],
+                columns["tag"],
+                columns["isPublic"],
+            )
+        }
+        self.assertEqual(
+            rows,
+            {
+                poi["id"]: (
+                    poi["latitude"],
+                    poi["longitude"],
+                    poi["tag"],
+                    poi["isPublic"],
+                )
+                for poi in pois
+            },
+        )
+        self.assertEqual(set(columns["user_id"]), {self.author.id})
+
+    def test_binary_feed(self):
+        """Test the packed buffer of the feed map view"""
+        response = self.get_map("get_feed", self.reader.id, format="binary")
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        tags, (ids, user_ids, lats, lons, codes, flags) = decode_binary(
+            response.content
+        )
+        expected = POI.objects.filter(isPublic=True)
+        self.assertEqual(sorted(ids), sorted(expected.values_list("id", flat=True)))
+        self.assertEqual(set(user_ids), {self.author.id})
+        self.assertEqual(set(flags), {1})
+        self.assertEqual(sorted(tags), ["food", "music", "photo"])
+        poi = expected.get(id=ids[0])
+        self.assertAlmostEqual(lats[0], float(poi.latitude), places=5)
+        self.assertAlmostEqual(lons[0], float(poi.longitude), places=5)
+        self.assertEqual(tags[codes[0]], poi.tag)
+
+    def test_long_tag(self):
+        """Test that tag names are cut to 255 bytes on a character boundary"""
+        tag = "a" + "\u20ac" * 99
+        POI.objects.filter(tag="food").update(tag=tag)
+        response = self.get_map("get_pois", self.author.id, format="binary")
+        tags, _ = decode_binary(response.content)
+        self.assertIn("a" + "\u20ac" * 84, tags)
+
+    def test_payload_size(self):
+        """Test that the compact formats are much smaller than JSON objects"""
+        full = len(self.get_map("get_pois", self.author.id).content)
+        columnar = len(
+            self.get_map("get_pois", self.author.id, format="columnar").content
+        )
+        binary = len(self.get_map("get_pois", self.author.id, format="binary").content)
+        self.assertLess(columnar * 4, full)
+        self.assertLess(binary * 10, full)
+
+    def test_empty_and_invalid(self):
+        """Test an empty viewport and an unknown format"""
+        response = self.get_map(
+            "get_pois", self.author.id, format="binary", max_lat=40.1
+        )
+        self.assertEqual(decode_binary(response.content), ([], [[]] * 6))
+        data = self.get_map("get_pois", self.author.id, format="columnar", max_lat=40.1)
+        self.assertEqual(data.json()["count"], 0)
+        for name, user_id in [
+            ("get_pois", self.author.id),
+            ("get_feed", self.reader.id),
+        ]:
+            response = self.get_map(name, user_id, format="xml")
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,17 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from pois.models import POI
+
+
+class ExplainHotQueriesTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        """Test that no hot endpoint query plans a sequential scan"""
+        out = StringIO()
+        call_command("explain_hot_queries", seed=2000, users=20, stdout=out)
+        self.assertIn("All hot queries use an index", out.getvalue())
+
+    def test_seed_is_rolled_back(self):
+        """Test that seeded rows do not outlive the command"""
+        call_command("explain_hot_queries", seed=100, users=5, stdout=StringIO())
+        self.assertFalse(POI.objects.exists())
@@ -0,0 +1,114 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.models import POI, FeedEntry
+from users.models import Follow
+from io import StringIO
+import json
+
+User = get_user_model()
+
+
+class FeedStoreTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="testpass123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+        self.poi = POI.objects.create(
+            userId=self.author,
+            title="Existing",
+            description="Test Description",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+
+    def follow(self):
+        return self.client.post(
+            reverse("follow_user"),
+            data=json.dumps(
+                {"followerId": self.reader.id, "followingId": self.author.id}
+            ),
+            content_type="application/json",
+        )
+
+    def feed_ids(self):
+        response = self.client.get(
+            reverse("get_feed", args=[self.reader.id]), {"viewType": "list"}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [poi["id"] for poi in response.json()["pois"]]
+
+    def test_follow_backfills_feed(self):
+        """Test that following a user backfills their POIs into the feed"""
+        self.assertEqual(self.follow().status_code, 201)
+        self.assertEqual(self.feed_ids(), [self.poi.id])
+
+    def test_unfollow_clears_feed(self):
+        """Test that unfollowing removes the user's POIs from the feed"""
+        self.follow()
+        self.assertEqual(self.follow().status_code, 200)
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_create_poi_fans_out(self):
+        """Test that new public POIs are pushed to followers' feeds"""
+        self.follow()
+        response = self.client.post(
+            reverse("create_poi"),
+            data={
+                "userId": self.author.id,
+                "title": "New",
+                "description": "Test Description",
+                "tag": "food",
+                "latitude": 40.7,
+                "longitude": -74.0,
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.feed_ids(), [response.json()["poi_id"], self.poi.id])
+
+    def test_private_poi_not_fanned_out(self):
+        """Test that private POIs stay out of followers' feeds"""
+        self.follow()
+        self.client.post(
+            reverse("create_poi"),
+            data={
+                "userId": self.author.id,
+                "title": "Private",
+                "description": "Test Description",
+                "tag": "food",
+                "latitude": 40.7,
+                "longitude": -74.0,
+                "isPublic": "False",
+            },
+        )
+        self.assertEqual(self.feed_ids(), [self.poi.id])
+
+    def test_delete_and_visibility_retract(self):
+        """Test that deleted or privatized POIs leave the feed"""
+        self.follow()
+        self.client.patch(
+            reverse("update_poi", args=[self.poi.id]),
+            data=json.dumps({"isPublic": False}),
+            content_type="application/json",
+        )
+        self.assertEqual(self.feed_ids(), [])
+        self.client.patch(
+            reverse("update_poi", args=[self.poi.id]),
+            data=json.dumps({"isPublic": True}),
+            content_type="application/json",
+        )
+        self.assertEqual(self.feed_ids(), [self.poi.id])
+        self.client.patch(reverse("delete_poi", args=[self.poi.id]))
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_rebuild_feeds_command(self):
+        """Test rebuilding feeds from the follow graph"""
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        call_command("rebuild_feeds", stdout=StringIO())
+        self.assertEqual(self.feed_ids(), [self.poi.id])
@@ -0,0 +1,153 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.models import POI, PoiAttachment
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="poi-media-test-")
+
+
+class FailingBackend:
+    def upload(self, fileobj, key):
+        raise IOError("Storage unavailable")
+
+    def url(self, key, expires_in):
+        return key
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    POI_MEDIA_BACKEND="pois.media.FileSystemMediaBackend",
+    POI_MEDIA_ASYNC=False,
+)
+class MediaPipelineTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.poi_data = {
+            "userId": self.user.id,
+            "title": "Test Location",
+            "description": "Test Description",
+            "tag": "restaurant",
+            "latitude": 40.7128,
+            "longitude": -74.0060,
+        }
+
+    def stored(self, key):
+        with open(os.path.join(MEDIA_ROOT, key), "rb") as f:
+            return f.read()
+
+    def test_multipart_upload(self):
+        """Test uploading several multipart files without base64"""
+        files = [
+            SimpleUploadedFile(f"photo{i}.jpg", f"image {i}".encode() * 1000)
+            for i in range(3)
+        ]
+        response = self.client.post(
+            reverse("create_poi"), data=dict(self.poi_data, content=files)
+        )
+        self.assertEqual(response.status_code, 201)
+        poi = POI.objects.get(id=response.json()["poi_id"])
+        keys = response.json()["content_urls"]
+        for i, key in enumerate(keys):
+            self.assertTrue(key.startswith(f"poi_attachments/{poi.id}/"), key)
+            self.assertTrue(key.endswith(f"-photo{i}.jpg"), key)
+        self.assertEqual(self.stored(keys[2]), b"image 2" * 1000)
+        statuses = poi.attachments.values_list("status", flat=True)
+        self.assertEqual(list(statuses), [PoiAttachment.READY] * 3)
+        self.assertEqual(poi.content, keys)
+
+    def test_legacy_base64_upload(self):
+        """Test the JSON body with base64 encoded attachments"""
+        content = [
+            {"filename": "note.txt", "data": base64.b64encode(b"hello").decode()}
+        ]
+        response = self.client.post(
+            reverse("create_poi"),
+            data=json.dumps(dict(self.poi_data, content=content)),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        key = response.json()["content_urls"][0]
+        self.assertEqual(self.stored(key), b"hello")
+
+    def test_unsafe_and_duplicate_file_names(self):
+        """Test that file names cannot escape MEDIA_ROOT or overwrite each other"""
+        content = [
+            {"filename": name, "data": base64.b64encode(data).decode()}
+            for name, data in [
+                ("../../escape.txt", b"one"),
+                ("..", b"two"),
+                ("note.txt", b"three"),
+                ("note.txt", b"four"),
+            ]
+        ]
+        response = self.client.post(
+            reverse("create_poi"),
+            data=json.dumps(dict(self.poi_data, content=content)),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        keys = response.json()["content_urls"]
+        poi_id = response.json()["poi_id"]
+        self.assertEqual(len(set(keys)), 4)
+        for key in keys:
+            self.assertEqual(os.path.dirname(key), f"poi_attachments/{poi_id}")
+        self.assertTrue(keys[0].endswith("-escape.txt"))
+        self.assertEqual(
+            [self.stored(key) for key in keys], [b"one", b"two", b"three", b"four"]
+        )
+        self.assertFalse(
+            os.path.exists(os.path.join(MEDIA_ROOT, "..", "..", "escape.txt"))
+        )
+
+    def test_invalid_base64_is_rejected(self):
+        """Test that undecodable attachment data is a client error"""
+        content = [{"filename": "note.txt", "data": "not base64!"}]
+        response = self.client.post(
+            reverse("create_poi"),
+            data=json.dumps(dict(self.poi_data, content=content)),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(POI.objects.exists())
+
+    @override_settings(POI_MEDIA_BACKEND="pois.tests.test_media.FailingBackend")
+    def test_failed_upload_is_recorded(self):
+        """Test that a failed upload marks the attachment failed"""
+        response = self.client.post(
+            reverse("create_poi"),
+            data=dict(self.poi_data, content=[SimpleUploadedFile("a.jpg", b"data")]),
+        )
+        self.assertEqual(response.status_code, 201)
+        attachment = PoiAttachment.objects.get()
+        self.assertEqual(attachment.status, PoiAttachment.FAILED)
+        self.assertIn("Storage unavailable", attachment.error)
+        self.assertEqual(attachment.poiId.content, [])
+
+    @override_settings(POI_MEDIA_ASYNC=True)
+    def test_async_returns_pending(self):
+        """Test that the POI is returned before attachments are uploaded"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                reverse("create_poi"),
+                data=dict(self.poi_data, content=[SimpleUploadedFile("a.jpg", b"x")]),
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["attachments"][0]["status"], "pending")
+        # The upload job waits for the commit (next to the cache invalidations)
+        self.assertTrue(callbacks)
+        self.assertEqual(PoiAttachment.objects.get().status, PoiAttachment.PENDING)
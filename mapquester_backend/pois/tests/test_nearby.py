@@ -0,0 +1,101 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.models import POI
+from pois.nearby import circle_bboxes, haversine_km
+
+User = get_user_model()
+
+
+class NearbyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="explorer", email="explorer@example.com", password="testpass123"
+        )
+        # Roughly 0, 0.55, 1.1, 2.2, 4.4, 8.9 and 111 km north of the point
+        for title, offset in [
+            ("here", 0.0),
+            ("a", 0.005),
+            ("b", 0.01),
+            ("c", 0.02),
+            ("d", 0.04),
+            ("e", 0.08),
+            ("far", 1.0),
+        ]:
+            self.create_poi(title, 40.7 + offset, -74.0)
+        self.create_poi("private", 40.7, -74.0, isPublic=False)
+        self.create_poi("park", 40.7001, -74.0, tag="park")
+
+    def create_poi(self, title, latitude, longitude, tag="food", **fields):
+        return POI.objects.create(
+            userId=self.user,
+            latitude=latitude,
+            longitude=longitude,
+            title=title,
+            description="Test Description",
+            tag=tag,
+            content=[],
+            **fields,
+        )
+
+    def nearby(self, **params):
+        response = self.client.get(
+            reverse("nearby_pois"), {"lat": 40.7, "lon": -74.0, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_haversine(self):
+        """Test great-circle distances and boxes across the antimeridian"""
+        self.assertAlmostEqual(
+            haversine_km(40.7128, -74.0060, 51.5074, -0.1278), 5570.2, delta=1
+        )
+        self.assertAlmostEqual(haversine_km(0, 179.9, 0, -179.9), 22.24, delta=0.01)
+        boxes = circle_bboxes(0, 179.9, 50)
+        self.assertEqual(len(boxes), 2)
+        self.assertEqual(boxes[1][2], -180.0)
+        self.assertEqual(circle_bboxes(89.9, 0, 50)[0][2:], (-180.0, 180.0))
+
+    def test_nearest_first(self):
+        """Test ordering by distance, the radius, tags and public POIs only"""
+        data = self.nearby(k=4)
+        self.assertEqual(
+            [poi["title"] for poi in data["pois"]], ["here", "park", "a", "b"]
+        )
+        distances = [poi["distance_km"] for poi in data["pois"]]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[2], 0.556, delta=0.001)
+
+        # Expands past the first rings, but not past the radius
+        titles = [poi["title"] for poi in self.nearby(k=20, radius_km=50)["pois"]]
+        self.assertEqual(titles, ["here", "park", "a", "b", "c", "d", "e"])
+        self.assertEqual(
+            [poi["title"] for poi in self.nearby(tags="park")["pois"]], ["park"]
+        )
+
+    def test_cursor_paging(self):
+        """Test paging through every POI by distance"""
+        titles, cursor = [], None
+        for _ in range(4):
+            params = {"k": 2, "radius_km": 200}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.nearby(**params)
+            titles += [poi["title"] for poi in data["pois"]]
+            cursor = data["pagination"]["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(titles, ["here", "park", "a", "b", "c", "d", "e", "far"])
+        self.assertIsNone(cursor)
+
+    def test_invalid_parameters(self):
+        """Test that bad points, radii, k and cursors are rejected"""
+        url = reverse("nearby_pois")
+        for params in [
+            {"lat": 40.7},
+            {"lat": 91, "lon": 0},
+            {"lat": 40.7, "lon": -74.0, "radius_km": 0},
+            {"lat": 40.7, "lon": -74.0, "k": 500},
+            {"lat": 40.7, "lon": -74.0, "cursor": "nope"},
+        ]:
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
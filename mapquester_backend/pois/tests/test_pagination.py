@@ -0,0 +1,82 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils.timezone import now
+from pois.models import POI
+from pois.feed_store import add_follow
+from pois.pagination import decode_cursor, encode_cursor
+from users.models import Follow
+
+User = get_user_model()
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        start = now()
+        self.pois = [
+            POI.objects.create(
+                userId=self.user,
+                title=f"POI {i}",
+                description="Test Description",
+                tag="food",
+                latitude=40.7128,
+                longitude=-74.0060,
+                # Two POIs share each timestamp to exercise the id tie-breaker
+                createdAt=start - timedelta(minutes=i // 2),
+            )
+            for i in range(7)
+        ]
+        self.expected = [
+            poi.id
+            for poi in sorted(
+                self.pois, key=lambda p: (p.createdAt, p.id), reverse=True
+            )
+        ]
+
+    def walk(self, url):
+        ids = []
+        cursor = ""
+        while cursor is not None:
+            response = self.client.get(
+                url, {"viewType": "list", "cursor": cursor, "page_size": 3}
+            )
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn("total_pois", data["pagination"])
+            ids.extend(poi["id"] for poi in data["pois"])
+            cursor = data["pagination"]["next_cursor"]
+        return ids
+
+    def test_cursor_roundtrip(self):
+        """Test that cursors decode back to their key"""
+        created_at = now()
+        self.assertEqual(decode_cursor(encode_cursor(created_at, 42)), (created_at, 42))
+
+    def test_get_pois_cursor_walk(self):
+        """Test walking every page of the POI list with cursors"""
+        self.assertEqual(
+            self.walk(reverse("get_pois", args=[self.user.id])), self.expected
+        )
+
+    def test_get_feed_cursor_walk(self):
+        """Test walking every page of the feed with cursors"""
+        reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+        Follow.objects.create(follower=reader, following=self.user)
+        add_follow(reader.id, self.user.id)
+        self.assertEqual(
+            self.walk(reverse("get_feed", args=[reader.id])), self.expected
+        )
+
+    def test_invalid_cursor(self):
+        """Test list view with a malformed cursor"""
+        response = self.client.get(
+            reverse("get_pois", args=[self.user.id]),
+            {"viewType": "list", "cursor": "not-a-cursor"},
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,90 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from health.profiling import NPlusOneAssertionsMixin
+from pois.models import POI, PoiInteractions
+from pois.feed_store import add_follow
+from users.models import Follow
+
+User = get_user_model()
+
+MAP_BBOX = {"min_lat": 40.0, "max_lat": 41.0, "min_lon": -75.0, "max_lon": -73.0}
+
+
+class QueryCountTests(NPlusOneAssertionsMixin, TestCase):
+    """
+    Query-count regression harness: every endpoint must issue the same number of
+    queries whatever the size of its result. Each case is run against a small and
+    a large dataset and both runs are held to the expected count.
+    """
+
+    # (url name, params, expected queries)
+    CASES = {
+        "pois_list": ("get_pois", {"viewType": "list", "page_size": 50}, 2),
+        "pois_list_cursor": (
+            "get_pois",
+            {"viewType": "list", "cursor": "", "page_size": 50},
+            1,
+        ),
+        "pois_map": ("get_pois", dict(MAP_BBOX, viewType="map"), 1),
+        "feed_list": ("get_feed", {"viewType": "list", "page_size": 50}, 3),
+        "feed_list_cursor": (
+            "get_feed",
+            {"viewType": "list", "cursor": "", "page_size": 50},
+            2,
+        ),
+        "feed_map": ("get_feed", dict(MAP_BBOX, viewType="map"), 2),
+        "interactions": ("list_interactions", {}, 2),
+    }
+
+    def setUp(self):
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+        self.authors = []
+        self.poi = None
+
+    def grow(self, authors, pois_per_author):
+        # Every author gets POIs, a follower and comments from distinct users
+        for a in range(authors):
+            author = User.objects.create_user(
+                username=f"author{len(self.authors)}", password="testpass123"
+            )
+            self.authors.append(author)
+            Follow.objects.create(follower=self.reader, following=author)
+            for i in range(pois_per_author):
+                poi = POI.objects.create(
+                    userId=author,
+                    title=f"POI {i}",
+                    description="Test Description",
+                    tag="food",
+                    latitude=40.7128,
+                    longitude=-74.0060,
+                )
+                self.poi = self.poi or poi
+            add_follow(self.reader.id, author.id)
+            PoiInteractions.objects.create(
+                userId=author,
+                poiId=self.poi,
+                interactionType="comment",
+                content="Great spot!",
+            )
+
+    def request(self, case):
+        name, params, _ = self.CASES[case]
+        if name == "list_interactions":
+            args = [self.poi.id]
+        elif name == "get_pois":
+            args = [self.authors[0].id]
+        else:
+            args = [self.reader.id]
+        return self.client.get(reverse(name, args=args), params)
+
+    def test_query_counts_independent_of_result_size(self):
+        for authors, pois_per_author in [(1, 1), (5, 8)]:
+            self.grow(authors, pois_per_author)
+            for case, (_, _, expected) in self.CASES.items():
+                with self.subTest(case=case, authors=len(self.authors)):
+                    with self.assertNumQueries(expected), self.assertNoNPlusOne():
+                        response = self.request(case)
+                    self.assertEqual(response.status_code, 200)
@@ -0,0 +1,186 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.client import Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.models import POI, PoiInteractions
+from pois.counters import ReactionBuffer, change_reactions
+import threading
+import time
+
+User = get_user_model()
+
+
+def make_poi(user):
+    return POI.objects.create(
+        userId=user,
+        title="Viral",
+        description="Test Description",
+        tag="food",
+        latitude=40.7128,
+        longitude=-74.0060,
+    )
+
+
+class ReactionToggleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.poi = make_poi(self.user)
+
+    def toggle(self):
+        return self.client.post(
+            reverse("create_interaction"),
+            data={
+                "userId": self.user.id,
+                "poiId": self.poi.id,
+                "interactionType": "reaction",
+            },
+        )
+
+    def test_toggle_on_and_off(self):
+        """Test that a second reaction toggle removes the first"""
+        self.assertEqual(self.toggle().status_code, 201)
+        self.poi.refresh_from_db()
+        self.assertEqual(self.poi.reactions, 1)
+        self.assertEqual(self.toggle().status_code, 200)
+        self.poi.refresh_from_db()
+        self.assertEqual(self.poi.reactions, 0)
+        self.assertFalse(PoiInteractions.objects.exists())
+
+    def test_counter_never_negative(self):
+        """Test that decrements stop at zero"""
+        change_reactions(self.poi.id, -3)
+        self.poi.refresh_from_db()
+        self.assertEqual(self.poi.reactions, 0)
+
+    @override_settings(REACTION_COUNTER_MODE="buffered", REACTION_FLUSH_INTERVAL=60)
+    def test_buffered_increments_flush(self):
+        """Test that buffered increments are written on flush"""
+        buffer = ReactionBuffer(interval=60)
+        for _ in range(5):
+            buffer.add(self.poi.id, 1)
+        buffer.add(self.poi.id, -1)
+        self.poi.refresh_from_db()
+        self.assertEqual(self.poi.reactions, 0)
+        self.assertEqual(buffer.pending(self.poi.id), 4)
+        buffer.flush()
+        self.poi.refresh_from_db()
+        self.assertEqual(self.poi.reactions, 4)
+        self.assertEqual(buffer.pending(self.poi.id), 0)
+
+    @override_settings(REACTION_COUNTER_MODE="buffered")
+    def test_buffered_after_commit(self):
+        """Test that buffered deltas are only kept once their transaction commits"""
+        buffer = ReactionBuffer(interval=60)
+        with mock.patch("pois.counters.get_reaction_buffer", return_value=buffer):
+            with self.captureOnCommitCallbacks(execute=True):
+                change_reactions(self.poi.id, 2)
+                self.assertEqual(buffer.pending(self.poi.id), 0)
+            self.assertEqual(buffer.pending(self.poi.id), 2)
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(DatabaseError):
+                    with transaction.atomic():
+                        change_reactions(self.poi.id, 5)
+                        raise DatabaseError
+        self.assertEqual(buffer.pending(self.poi.id), 2)
+
+    def test_failed_flush_keeps_deltas(self):
+        """Test that a failed flush keeps its deltas without raising"""
+        buffer = ReactionBuffer(interval=60)
+        buffer.add(self.poi.id, 3)
+        with mock.patch(
+            "pois.counters.apply_reaction_delta", side_effect=DatabaseError
+        ), self.assertLogs("pois.counters", "ERROR"):
+            buffer.flush()
+        self.assertEqual(buffer.pending(self.poi.id), 3)
+        buffer.flush()
+        self.poi.refresh_from_db()
+        self.assertEqual(self.poi.reactions, 3)
+
+
+class ConcurrentReactionTests(TransactionTestCase):
+    USERS = 200
+
+    def setUp(self):
+        User.objects.bulk_create(
+            [User(username=f"user{i}", password="!") for i in range(self.USERS)]
+        )
+        self.users = list(User.objects.order_by("id"))
+        self.poi = make_poi(self.users[0])
+
+    def increment(self, _):
+        try:
+            change_reactions(self.poi.id, 1)
+        finally:
+            connection.close()
+
+    def toggle(self, user, barrier=None):
+        data = {"userId": user.id, "poiId": self.poi.id, "interactionType": "reaction"}
+        client = Client()
+        try:
+            if barrier:
+                barrier.wait()
+            return client.post(reverse("create_interaction"), data).status_code
+        finally:
+            connection.close()
+
+    def test_parallel_increments_are_not_lost(self):
+        """Test that concurrent counter updates never overwrite each other"""
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(self.increment, range(300)))
+        self.poi.refresh_from_db()
+        self.assertEqual(self.poi.reactions, 300)
+
+    def test_background_flush(self):
+        """Test that buffered deltas are written without further reactions"""
+        buffer = ReactionBuffer(interval=0.05)
+        buffer.add(self.poi.id, 3)
+        buffer.start()
+        try:
+            for _ in range(100):
+                self.poi.refresh_from_db()
+                if self.poi.reactions == 3:
+                    break
+                time.sleep(0.05)
+        finally:
+            buffer.stop()
+        self.assertEqual(self.poi.reactions, 3)
+        self.assertEqual(buffer.pending(self.poi.id), 0)
+
+    def test_parallel_toggles_keep_count_consistent(self):
+        """Test hundreds of parallel toggles against one POI"""
+        # Every user reacts once, then half of them toggle their reaction off again
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            added = list(pool.map(self.toggle, self.users))
+        self.assertEqual(added, [201] * self.USERS)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            removed = list(pool.map(self.toggle, self.users[::2]))
+        self.assertEqual(removed, [200] * (self.USERS // 2))
+
+        self.poi.refresh_from_db()
+        reactions = PoiInteractions.objects.filter(
+            poiId=self.poi, interactionType="reaction"
+        ).count()
+        self.assertEqual(reactions, self.USERS // 2)
+        self.assertEqual(self.poi.reactions, reactions)
+
+    def test_same_user_parallel_toggles(self):
+        """Test that concurrent toggles by one user never double count"""
+        user = self.users[1]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for _ in range(25):
+                barrier = threading.Barrier(2)
+                statuses = sorted(pool.map(self.toggle, [user] * 2, [barrier] * 2))
+                rows = PoiInteractions.objects.filter(
+                    userId=user, poiId=self.poi, interactionType="reaction"
+                ).count()
+                self.poi.refresh_from_db()
+                # Two adds racing leave one reaction, otherwise one toggle
+                # removes the reaction the other one finds or adds
+                self.assertIn(statuses, ([200, 201], [201, 201]))
+                self.assertLessEqual(rows, 1)
+                self.assertEqual(self.poi.reactions, rows)
@@ -0,0 +1,78 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from mapquester.renderers import BACKENDS, format_datetime, get_backend
+from pois.models import POI
+
+User = get_user_model()
+
+ROW = {
+    "id": 7,
+    "latitude": Decimal("40.712800"),
+    "longitude": Decimal("-74.0060004"),
+    "isPublic": True,
+    "title": "Café ☕",
+    "content": ["poi_attachments/7/a.jpg"],
+    "description": None,
+    "createdAt": datetime(2024, 11, 5, 9, 30, 1, 123456, tzinfo=timezone.utc),
+    "updatedAt": datetime(2024, 11, 5, 9, 30, tzinfo=timezone.utc),
+    "nested": {"count": 1.5, 3: [Decimal("1.1")]},
+}
+
+
+class RendererTests(TestCase):
+    @override_settings(JSON_DECIMAL_PLACES=6)
+    def test_backends_produce_identical_output(self):
+        """Test that orjson and the standard library encoder agree byte for byte"""
+        outputs = {name: get_backend(name)(ROW) for name in BACKENDS}
+        self.assertEqual(len(set(outputs.values())), 1)
+
+        data = json.loads(outputs["python"])
+        self.assertEqual(data["latitude"], 40.7128)
+        self.assertEqual(data["longitude"], -74.006)
+        self.assertEqual(data["title"], "Café ☕")
+        self.assertEqual(data["nested"], {"count": 1.5, "3": [1.1]})
+
+    def test_datetime_format(self):
+        """Test that timestamps are RFC 3339 with Z for UTC"""
+        self.assertEqual(
+            format_datetime(ROW["createdAt"]), "2024-11-05T09:30:01.123456Z"
+        )
+        self.assertEqual(format_datetime(ROW["updatedAt"]), "2024-11-05T09:30:00Z")
+        for name in BACKENDS:
+            self.assertEqual(
+                json.loads(get_backend(name)(ROW))["createdAt"],
+                "2024-11-05T09:30:01.123456Z",
+            )
+
+    def test_unsupported_type(self):
+        """Test that unknown types are rejected by both backends"""
+        for name in BACKENDS:
+            with self.assertRaises(TypeError):
+                get_backend(name)({"value": object()})
+
+    def test_views_use_renderer(self):
+        """Test that JsonResponse and DRF views send coordinates as numbers"""
+        user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        poi = POI.objects.create(
+            userId=user,
+            title="Test POI",
+            description="Test Description",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+        for backend in BACKENDS:
+            with self.settings(JSON_RENDERER_BACKEND=backend):
+                response = self.client.get(
+                    reverse("get_pois", args=[user.id]), {"viewType": "list"}
+                )
+                self.assertEqual(response.json()["pois"][0]["latitude"], 40.7128)
+                response = self.client.get(reverse("list_interactions", args=[poi.id]))
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertEqual(response.json(), [])
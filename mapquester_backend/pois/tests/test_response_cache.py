@@ -0,0 +1,254 @@
+import json
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.checks import response_cache_backend
+from pois.feed_store import retract_poi
+from pois.models import POI
+from pois import response_cache
+from pois.response_cache import signed_url_period
+from unittest import mock
+from users.models import Follow
+
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="testpass123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+        self.client.post(
+            reverse("follow_user"),
+            data=json.dumps(
+                {"followerId": self.reader.id, "followingId": self.author.id}
+            ),
+            content_type="application/json",
+        )
+        self.poi = self.create_poi("First POI")
+
+    def create_poi(self, title, latitude=40.7128, longitude=-74.0060):
+        response = self.client.post(
+            reverse("create_poi"),
+            data={
+                "userId": self.author.id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "title": title,
+                "tag": "food",
+                "description": "Test Description",
+            },
+            format="multipart",
+        )
+        return POI.objects.get(id=response.json()["poi_id"])
+
+    def get(self, name, arg, params=None, **headers):
+        return self.client.get(reverse(name, args=[arg]), params or {}, **headers)
+
+    def titles(self, response):
+        return [poi["title"] for poi in response.json()["pois"]]
+
+    def test_repeated_read_is_served_from_cache(self):
+        """Test that an unchanged list is served without touching the database"""
+        params = {"viewType": "list"}
+        first = self.get("get_pois", self.author.id, params)
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.get("get_pois", self.author.id, params)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+
+    def test_writes_invalidate_pois_and_feed(self):
+        """Test that creating, editing and reacting to a POI invalidate both views"""
+        params = {"viewType": "list"}
+        self.get("get_pois", self.author.id, params)
+        self.get("get_feed", self.reader.id, params)
+
+        self.create_poi("Second POI")
+        response = self.get("get_pois", self.author.id, params)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(self.titles(response), ["Second POI", "First POI"])
+        response = self.get("get_feed", self.reader.id, params)
+        self.assertEqual(self.titles(response), ["Second POI", "First POI"])
+
+        self.client.patch(
+            reverse("update_poi", args=[self.poi.id]),
+            data={"title": "Renamed"},
+            content_type="application/json",
+        )
+        response = self.get("get_feed", self.reader.id, params)
+        self.assertEqual(self.titles(response), ["Second POI", "Renamed"])
+
+        self.client.post(
+            reverse("create_interaction"),
+            data={
+                "userId": self.reader.id,
+                "poiId": self.poi.id,
+                "interactionType": "reaction",
+            },
+            content_type="application/json",
+        )
+        response = self.get("get_pois", self.author.id, params)
+        self.assertEqual(response.json()["pois"][1]["reactions"], 1)
+
+    def test_unfollow_invalidates_feed_and_followers(self):
+        """Test that unfollowing empties the feed and the follower list"""
+        self.get("get_feed", self.reader.id, {"viewType": "list"})
+        self.get("get_followers_or_followings", self.author.id, {"mode": "followers"})
+
+        self.client.post(
+            reverse("follow_user"),
+            data=json.dumps(
+                {"followerId": self.reader.id, "followingId": self.author.id}
+            ),
+            content_type="application/json",
+        )
+        self.assertFalse(Follow.objects.exists())
+        response = self.get("get_feed", self.reader.id, {"viewType": "list"})
+        self.assertEqual(response.json()["pois"], [])
+        response = self.get(
+            "get_followers_or_followings", self.author.id, {"mode": "followers"}
+        )
+        self.assertEqual(response.json()["followers"], [])
+
+    def test_retract_invalidates_feeds(self):
+        """Test that a feed cached between a POI's save and its retraction is dropped"""
+        params = {"viewType": "list"}
+        # The POI is saved private, then the feed is read before the retraction
+        POI.objects.filter(id=self.poi.id).update(isPublic=False)
+        self.assertEqual(
+            self.titles(self.get("get_feed", self.reader.id, params)), ["First POI"]
+        )
+        retract_poi(self.poi)
+        response = self.get("get_feed", self.reader.id, params)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(self.titles(response), [])
+
+        self.client.patch(reverse("delete_poi", args=[self.create_poi("Other").id]))
+        self.assertEqual(self.titles(self.get("get_feed", self.reader.id, params)), [])
+
+    def test_comment_invalidates_interactions(self):
+        """Test that a new comment shows up in the interaction list"""
+        self.assertEqual(self.get("list_interactions", self.poi.id).json(), [])
+        self.client.post(
+            reverse("create_interaction"),
+            data={
+                "userId": self.reader.id,
+                "poiId": self.poi.id,
+                "interactionType": "comment",
+                "content": "Nice place",
+            },
+            content_type="application/json",
+        )
+        response = self.get("list_interactions", self.poi.id)
+        self.assertEqual(response.json()[0]["content"], "Nice place")
+
+    def test_if_none_match_returns_304(self):
+        """Test that a matching ETag gets an empty 304 until the data changes"""
+        params = {"viewType": "list"}
+        etag = self.get("get_pois", self.author.id, params)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.get(
+                "get_pois", self.author.id, params, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self.create_poi("Second POI")
+        response = self.get("get_pois", self.author.id, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_viewports_are_not_widened(self):
+        """Test that a cached map response holds only the requested viewport"""
+        # Inside the tile-snapped box the cache used to widen viewports to
+        self.create_poi("North POI", latitude=40.755)
+        params = {"viewType": "map", "min_lat": 40.70, "max_lat": 40.75}
+        for min_lon, max_lon in [(-74.03, -73.98), (-74.02, -73.97)]:
+            response = self.get(
+                "get_pois",
+                self.author.id,
+                dict(params, min_lon=min_lon, max_lon=max_lon),
+            )
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertEqual(self.titles(response), ["First POI"])
+
+    @override_settings(AWS_S3_PRESIGNED_URL_TIME=3600)
+    def test_signed_urls_are_refreshed(self):
+        """Test that bodies with presigned URLs expire well before the URLs do"""
+        period = signed_url_period()
+        self.assertEqual(period, 180)
+        params = {"viewType": "list"}
+        with mock.patch("pois.response_cache.time.time", return_value=period * 10):
+            first = self.get("get_feed", self.reader.id, params)
+            etag = first["ETag"]
+            response = self.get(
+                "get_feed", self.reader.id, params, HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, 304)
+        with mock.patch("pois.response_cache.time.time", return_value=period * 11 + 1):
+            response = self.get(
+                "get_feed", self.reader.id, params, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_bulk_deletes_are_invalidated_once(self):
+        """Test that POIs deleted together are invalidated in one batch"""
+        for i in range(5):
+            self.create_poi(f"POI {i}", latitude=40 + i, longitude=-74 - i)
+        params = {"viewType": "list"}
+        self.get("get_feed", self.reader.id, params)
+        with mock.patch.object(
+            response_cache, "_bump", wraps=response_cache._bump
+        ) as bump, CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                POI.objects.filter(userId=self.author).delete()
+        scopes = {frozenset(call.args[0]) for call in bump.call_args_list}
+        owner = self.author.id
+        self.assertEqual(
+            scopes, {frozenset({f"pois:{owner}", f"tiles:{owner}", "feeds"})}
+        )
+        # No feed entry lookup per POI
+        self.assertFalse(
+            any("pois_feedentry" in q["sql"] and "SELECT" in q["sql"] for q in queries)
+        )
+        self.assertEqual(self.titles(self.get("get_feed", self.reader.id, params)), [])
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled_cache_skips_invalidation(self):
+        """Test that writes do no invalidation work when the cache is off"""
+        with mock.patch.object(response_cache, "_bump") as bump, CaptureQueriesContext(
+            connection
+        ) as queries:
+            self.poi.title = "Renamed"
+            self.poi.save()
+            self.poi.delete()
+        bump.assert_not_called()
+        self.assertFalse(
+            any("pois_feedentry" in q["sql"] and "SELECT" in q["sql"] for q in queries)
+        )
+
+    def test_per_process_cache_warning(self):
+        """Test the system check against a cache that is not shared"""
+        self.assertEqual(
+            [warning.id for warning in response_cache_backend(None)], ["pois.W001"]
+        )
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        with self.settings(CACHES=redis):
+            self.assertEqual(response_cache_backend(None), [])
+
+    def test_errors_are_not_cached(self):
+        """Test that failed requests are passed through"""
+        response = self.get("get_pois", self.author.id, {"viewType": "unknown"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,178 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.bulk_import import import_pois
+from pois.models import POI, PoiSearchTerm
+from pois.search import document_terms, parse_query, search_pois, term_successor
+from io import StringIO
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="searcher", email="searcher@example.com", password="testpass123"
+        )
+
+    def create_poi(self, title, description="", tag="food", **fields):
+        return POI.objects.create(
+            userId=self.user,
+            latitude=fields.pop("latitude", 40.7128),
+            longitude=fields.pop("longitude", -74.0060),
+            title=title,
+            description=description,
+            tag=tag,
+            content=[],
+            **fields,
+        )
+
+    def search(self, q, **params):
+        response = self.client.get(reverse("search_pois"), {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def titles(self, q, **params):
+        return [poi["title"] for poi in self.search(q, **params)["pois"]]
+
+    def test_tokenize(self):
+        """Test that queries and documents are folded to lowercase ascii words"""
+        self.assertEqual(
+            parse_query("Café, CAFE & crème-brûlée"),
+            [
+                "cafe",
+                "creme",
+                "brulee",
+            ],
+        )
+        self.assertEqual(
+            document_terms("Pizza Place", "food", "Best pizza"),
+            {"pizza": 4, "place": 4, "food": 2, "best": 1},
+        )
+
+    def test_prefix_and_all_words(self):
+        """Test that every query word must match the start of a word"""
+        self.create_poi("Joe's Pizza", "Best slice in town")
+        self.create_poi("Pizzeria Roma", "Wood fired oven")
+        self.create_poi("Sushi Bar", "Fresh fish, no pizza")
+
+        self.assertCountEqual(
+            self.titles("pizz"), ["Joe's Pizza", "Pizzeria Roma", "Sushi Bar"]
+        )
+        self.assertEqual(self.titles("pizz slice"), ["Joe's Pizza"])
+        self.assertEqual(self.titles("izza"), [])
+        self.assertEqual(self.titles("CAFÉ"), [])
+
+    def test_ranking(self):
+        """Test that title matches rank above tag and description matches"""
+        self.create_poi("Corner shop", "Sells music records", tag="shop")
+        self.create_poi("Open air", "Concert", tag="music")
+        self.create_poi("Music Hall", "Concerts", tag="event")
+        self.create_poi("Musical Theatre", "Shows", tag="event")
+
+        results = self.search("music")["pois"]
+        self.assertEqual(
+            [poi["title"] for poi in results],
+            ["Music Hall", "Musical Theatre", "Open air", "Corner shop"],
+        )
+        ranks = [poi["rank"] for poi in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_accents(self):
+        """Test that accents are ignored on both sides"""
+        self.create_poi("Café de Flore", tag="food")
+        self.assertEqual(self.titles("cafe"), ["Café de Flore"])
+        self.assertEqual(self.titles("CAFÉ flo"), ["Café de Flore"])
+
+    def test_astral_prefix(self):
+        """Test that prefixes match words continuing past the BMP"""
+        self.create_poi("\u4e2d\U00020000 market")
+        self.assertEqual(self.titles("\u4e2d"), ["\u4e2d\U00020000 market"])
+        self.assertEqual(term_successor("ab"), "ac")
+        self.assertEqual(term_successor("a\ud7ff"), "a\ue000")
+        self.assertEqual(term_successor("a\U0010ffff"), "b")
+        self.assertIsNone(term_successor("\U0010ffff"))
+
+    def test_filters(self):
+        """Test that search combines with visibility, tag and bounding box filters"""
+        self.create_poi("Park Cafe", tag="food")
+        self.create_poi("Cafe Tokyo", tag="food", latitude=35.6762, longitude=139.6)
+        self.create_poi("Cafe Concert", tag="music")
+        self.create_poi("Private Cafe", tag="food", isPublic=False)
+        self.create_poi("Deleted Cafe", tag="food", isDeleted=True)
+
+        self.assertCountEqual(
+            self.titles("cafe"), ["Park Cafe", "Cafe Tokyo", "Cafe Concert"]
+        )
+        self.assertCountEqual(
+            self.titles("cafe", tags="food"), ["Park Cafe", "Cafe Tokyo"]
+        )
+        bbox = {"min_lat": 40, "max_lat": 41, "min_lon": -75, "max_lon": -73}
+        self.assertCountEqual(self.titles("cafe", tags="food", **bbox), ["Park Cafe"])
+        self.assertCountEqual(
+            self.titles("cafe", tags="food", userId=self.user.id),
+            ["Park Cafe", "Cafe Tokyo", "Private Cafe"],
+        )
+
+    def test_index_maintenance(self):
+        """Test that edits, bulk imports and rebuilds keep the index current"""
+        poi = self.create_poi("Old Name")
+        self.client.patch(
+            reverse("update_poi", args=[poi.id]),
+            {"title": "New Name"},
+            content_type="application/json",
+        )
+        self.assertEqual(self.titles("old"), [])
+        self.assertEqual(self.titles("new"), ["New Name"])
+
+        import_pois(
+            [
+                {
+                    "title": f"Imported {i}",
+                    "description": "From a file",
+                    "tag": "food",
+                    "latitude": 40.0,
+                    "longitude": -74.0,
+                }
+                for i in range(3)
+            ],
+            user_id=self.user.id,
+        )
+        self.assertEqual(len(self.titles("imported")), 3)
+
+        PoiSearchTerm.objects.all().delete()
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self.titles("imported")), 3)
+        self.assertEqual(self.titles("name"), ["New Name"])
+
+    def test_pagination_and_errors(self):
+        """Test pagination, invalid parameters and the query count"""
+        for i in range(5):
+            self.create_poi(f"Garden {i}")
+
+        first = self.search("garden", page_size=2)
+        self.assertEqual(len(first["pois"]), 2)
+        self.assertTrue(first["pagination"]["has_next"])
+        last = self.search("garden", page_size=2, page=3)
+        self.assertEqual(len(last["pois"]), 1)
+        self.assertFalse(last["pagination"]["has_next"])
+        seen = [
+            poi["id"]
+            for page in (1, 2, 3)
+            for poi in self.search("garden", page_size=2, page=page)["pois"]
+        ]
+        self.assertEqual(len(set(seen)), 5)
+
+        url = reverse("search_pois")
+        self.assertEqual(self.client.get(url, {"q": " !? "}).status_code, 400)
+        self.assertEqual(
+            self.client.get(url, {"q": "garden", "page": 0}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(url, {"q": "garden", "min_lat": 95}).status_code, 400
+        )
+        with self.assertRaises(ValueError):
+            search_pois(POI.objects.all(), "")
+        with self.assertNumQueries(1):
+            self.search("garden 1")
@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.models import POI
+from pois import spatial_index
+
+User = get_user_model()
+
+
+class GeohashTests(TestCase):
+    def test_encode_known_value(self):
+        """Test geohash encoding against a reference value"""
+        self.assertEqual(spatial_index.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_decode_bounds_contains_point(self):
+        """Test that a cell's bounds contain the encoded point"""
+        min_lat, max_lat, min_lon, max_lon = spatial_index.decode_bounds(
+            spatial_index.encode(40.7128, -74.0060, 7)
+        )
+        self.assertTrue(min_lat <= 40.7128 <= max_lat)
+        self.assertTrue(min_lon <= -74.0060 <= max_lon)
+
+    def test_bbox_prefixes_cover_box(self):
+        """Test that the planned prefixes cover every point in the box"""
+        prefixes = spatial_index.bbox_prefixes(40.5, 40.9, -74.1, -73.8)
+        self.assertTrue(0 < len(prefixes) <= spatial_index.MAX_PREFIX_CELLS)
+        for lat, lon in [(40.5, -74.1), (40.9, -73.8), (40.7, -73.95)]:
+            geohash = spatial_index.encode(lat, lon)
+            self.assertTrue(any(geohash.startswith(p) for p in prefixes))
+
+    def test_bbox_prefixes_world(self):
+        """Test that a world-sized box skips prefix pruning"""
+        self.assertIsNone(spatial_index.bbox_prefixes(-90, 90, -180, 180))
+
+    def test_prefix_successor(self):
+        """Test the exclusive upper bound of the geohashes under a prefix"""
+        self.assertEqual(spatial_index.prefix_successor("dr5"), "dr6")
+        self.assertEqual(spatial_index.prefix_successor("dr9"), "drb")
+        self.assertEqual(spatial_index.prefix_successor("drz"), "ds")
+        self.assertEqual(spatial_index.prefix_successor("dzz"), "e")
+        self.assertIsNone(spatial_index.prefix_successor("zz"))
+        successor = spatial_index.prefix_successor("drz")
+        self.assertTrue("drz" <= "drzzzzzzzzzz" < successor <= "ds0000000000")
+
+
+class SpatialIndexQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.inside = POI.objects.create(
+            userId=self.user,
+            title="Inside",
+            description="Inside the box",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+        self.outside = POI.objects.create(
+            userId=self.user,
+            title="Outside",
+            description="Outside the box",
+            tag="food",
+            latitude=51.5074,
+            longitude=-0.1278,
+        )
+
+    def test_geohash_kept_current(self):
+        """Test that the geohash follows coordinate changes on save"""
+        self.assertEqual(self.inside.geohash, spatial_index.encode(40.7128, -74.0060))
+        self.inside.latitude = 34.0522
+        self.inside.longitude = -118.2437
+        self.inside.save()
+        self.inside.refresh_from_db()
+        self.assertEqual(self.inside.geohash, spatial_index.encode(34.0522, -118.2437))
+
+    def test_map_view_uses_bbox(self):
+        """Test that the map view only returns POIs inside the box"""
+        response = self.client.get(
+            reverse("get_pois", args=[self.user.id]),
+            {
+                "viewType": "map",
+                "min_lat": 40.0,
+                "max_lat": 41.0,
+                "min_lon": -75.0,
+                "max_lon": -73.0,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        ids = [poi["id"] for poi in response.json()["pois"]]
+        self.assertEqual(ids, [self.inside.id])
@@ -0,0 +1,84 @@
+import json
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.feed_store import add_follow
+from pois.models import POI
+from pois.url_signing import reset_signing_cache
+from users.models import Follow
+
+User = get_user_model()
+
+
+@override_settings(POI_MEDIA_BACKEND="pois.media.FileSystemMediaBackend")
+@mock.patch("pois.streaming.CHUNK_SIZE", 2)
+class StreamingTests(TestCase):
+    def setUp(self):
+        reset_signing_cache()
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="testpass123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+        Follow.objects.create(follower=self.reader, following=self.author)
+        # Spans several chunks of 2 rows
+        for i in range(5):
+            POI.objects.create(
+                userId=self.author,
+                title=f"POI {i}",
+                description="Test Description",
+                tag="food",
+                latitude=40.7128,
+                longitude=-74.0060,
+                content=[f"poi_attachments/{i}/a.jpg"],
+            )
+        add_follow(self.reader.id, self.author.id)
+
+    def get_map(self, name, user_id, **params):
+        return self.client.get(
+            reverse(name, args=[user_id]), dict(params, viewType="map")
+        )
+
+    def test_streamed_json_matches_buffered(self):
+        """Test that the streamed document equals the buffered response"""
+        for name, user_id in [
+            ("get_pois", self.author.id),
+            ("get_feed", self.reader.id),
+        ]:
+            response = self.get_map(name, user_id, stream="json")
+            self.assertTrue(response.streaming)
+            self.assertEqual(response["Content-Type"], "application/json")
+            streamed = json.loads(b"".join(response.streaming_content))
+            buffered = self.get_map(name, user_id).json()
+            self.assertEqual(streamed, buffered)
+            self.assertEqual(len(streamed["pois"]), 5)
+
+    def test_ndjson(self):
+        """Test that NDJSON has one signed row per line"""
+        response = self.get_map("get_pois", self.author.id, stream="ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(
+            {tuple(row["content"]) for row in rows},
+            {(f"/media/poi_attachments/{i}/a.jpg",) for i in range(5)},
+        )
+
+    def test_empty_result(self):
+        """Test that an empty viewport streams a valid document"""
+        response = self.get_map(
+            "get_pois", self.author.id, stream="json", min_lat=0, max_lat=1
+        )
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), {"pois": []})
+
+    def test_invalid_stream_format(self):
+        """Test that an unknown stream format is rejected"""
+        for name, user_id in [
+            ("get_pois", self.author.id),
+            ("get_feed", self.reader.id),
+        ]:
+            response = self.get_map(name, user_id, stream="xml")
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,132 @@
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+from pois.models import POI, PoiInteractions, FeedEntry
+from pois.synthetic_data import CITIES, SyntheticDataset, delete_dataset, zipf_rank
+from users.models import Follow, User
+from collections import Counter
+from io import StringIO
+import random
+
+SMALL = dict(users=200, pois=1000, follows_per_user=10, interactions=2000)
+
+
+def rows(dataset):
+    users = [(u.id, u.username) for u in dataset.generate_users(1)]
+    follows = [(f.follower_id, f.following_id) for f in dataset.generate_follows(1, 1)]
+    pois = [
+        (p.userId_id, p.latitude, p.longitude, p.tag, p.isPublic, p.createdAt)
+        for p in dataset.generate_pois(1, 1)
+    ]
+    return users, follows, pois
+
+
+class SyntheticDataTests(TestCase):
+    def test_seeded(self):
+        """Test that the same seed produces the same rows"""
+        first = rows(SyntheticDataset(seed=7, **SMALL))
+        self.assertEqual(first, rows(SyntheticDataset(seed=7, **SMALL)))
+        self.assertNotEqual(first, rows(SyntheticDataset(seed=8, **SMALL)))
+
+    def test_zipf_rank(self):
+        """Test that ranks stay in range and low ranks dominate"""
+        rng = random.Random(0)
+        counts = Counter(zipf_rank(rng, 1000, 1.0) for _ in range(20000))
+        self.assertTrue(set(counts) <= set(range(1000)))
+        self.assertGreater(counts[0], 10 * counts.get(500, 1))
+
+    def test_write(self):
+        """Test the generated tables and their distributions"""
+        counts = SyntheticDataset(seed=1, **SMALL).write(batch_size=300)
+        self.assertEqual(counts["users"], User.objects.count())
+        self.assertEqual(counts["pois"], POI.objects.count())
+        self.assertEqual(counts["interactions"], PoiInteractions.objects.count())
+        self.assertEqual(counts["follows"], Follow.objects.count())
+
+        # Power-law follower counts: the top account has far more than average
+        followers = sorted(
+            Follow.objects.values("following")
+            .annotate(count=Count("id"))
+            .values_list("count", flat=True),
+            reverse=True,
+        )
+        self.assertGreater(followers[0], 5 * counts["follows"] / 200)
+        self.assertEqual(
+            sorted(User.objects.values_list("followers_count", flat=True)),
+            sorted(followers + [0] * (counts["users"] - len(followers))),
+        )
+        self.assertFalse(Follow.objects.filter(follower=F("following")).exists())
+
+        # Most POIs are around the hotspots, with the geohash set
+        near = sum(
+            any(
+                abs(float(poi.latitude) - lat) < 1
+                and abs(float(poi.longitude) - lon) < 1
+                for lat, lon, _ in CITIES
+            )
+            for poi in POI.objects.all()
+        )
+        self.assertGreater(near, 700)
+        self.assertFalse(POI.objects.filter(geohash="").exists())
+
+        # Reaction counters match the interactions, one reaction per user and POI
+        reactions = Counter(
+            PoiInteractions.objects.filter(interactionType="reaction").values_list(
+                "poiId", flat=True
+            )
+        )
+        self.assertEqual(
+            dict(POI.objects.filter(reactions__gt=0).values_list("id", "reactions")),
+            dict(reactions),
+        )
+
+        # New rows after the generated ones get fresh ids
+        user = User.objects.create_user(username="after", password="x")
+        self.assertGreater(user.id, 200)
+
+    def test_command(self):
+        """Test the generate_benchmark_data command, run twice with --clear"""
+        for _ in range(2):
+            call_command(
+                "generate_benchmark_data",
+                users=50,
+                pois=200,
+                interactions=300,
+                clear=True,
+                stdout=StringIO(),
+            )
+        self.assertEqual(User.objects.filter(username__startswith="bench_").count(), 50)
+        self.assertEqual(POI.objects.count(), 200)
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_delete_dataset(self):
+        """Test that clearing a dataset takes a fixed number of queries"""
+        SyntheticDataset(seed=1, **SMALL).write()
+        other = User.objects.create_user(username="other", password="x")
+        poi = POI.objects.create(
+            userId=other,
+            title="Mine",
+            description="x",
+            tag="food",
+            latitude=1,
+            longitude=1,
+        )
+        bench = list(User.objects.filter(username__startswith="bench_")[:2])
+        Follow.objects.create(follower=other, following=bench[0])
+        Follow.objects.create(follower=bench[1], following=other)
+        PoiInteractions.objects.create(
+            userId=bench[0], poiId=poi, interactionType="reaction"
+        )
+        POI.objects.filter(id=poi.id).update(reactions=1)
+
+        with self.assertNumQueries(24):
+            delete_dataset("bench")
+        self.assertEqual(
+            list(User.objects.values_list("username", flat=True)), ["other"]
+        )
+        self.assertEqual(list(POI.objects.values_list("id", flat=True)), [poi.id])
+        self.assertFalse(Follow.objects.exists() or PoiInteractions.objects.exists())
+        other.refresh_from_db()
+        poi.refresh_from_db()
+        self.assertEqual((other.followers_count, other.following_count), (0, 0))
+        self.assertEqual(poi.reactions, 0)
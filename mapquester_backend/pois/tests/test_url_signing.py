@@ -0,0 +1,105 @@
+import time
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.models import POI
+from pois.url_signing import (
+    SignedUrlCache,
+    get_signing_cache,
+    reset_signing_cache,
+    sign_keys,
+)
+
+User = get_user_model()
+
+
+class CountingBackend:
+    calls = []
+
+    def upload(self, fileobj, key):
+        pass
+
+    def url(self, key, expires_in):
+        CountingBackend.calls.append(key)
+        return f"https://signed.example.com/{key}?expires={expires_in}"
+
+
+@override_settings(POI_MEDIA_BACKEND="pois.tests.test_url_signing.CountingBackend")
+class UrlSigningTests(TestCase):
+    def setUp(self):
+        reset_signing_cache()
+        CountingBackend.calls = []
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        for i in range(3):
+            POI.objects.create(
+                userId=self.user,
+                title=f"POI {i}",
+                description="Test Description",
+                tag="food",
+                latitude=40.7128,
+                longitude=-74.0060,
+                content=[f"poi_attachments/{i}/a.jpg", f"poi_attachments/{i}/b.jpg"],
+            )
+        # A POI created before keys were stored keeps its full URL
+        POI.objects.create(
+            userId=self.user,
+            title="Legacy",
+            description="Test Description",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+            content=["https://bucket.s3.amazonaws.com/poi_attachments/9/old.jpg"],
+        )
+
+    def get_list(self):
+        response = self.client.get(
+            reverse("get_pois", args=[self.user.id]), {"viewType": "list"}
+        )
+        self.assertEqual(response.status_code, 200)
+        return {poi["title"]: poi["content"] for poi in response.json()["pois"]}
+
+    def test_list_signs_keys_in_batch(self):
+        """Test that a page of POIs is signed and cached"""
+        content = self.get_list()
+        self.assertEqual(
+            content["POI 1"][0],
+            "https://signed.example.com/poi_attachments/1/a.jpg?expires=3600",
+        )
+        self.assertEqual(
+            content["Legacy"],
+            ["https://bucket.s3.amazonaws.com/poi_attachments/9/old.jpg"],
+        )
+        self.assertEqual(len(CountingBackend.calls), 6)
+
+        # The second read is served from the cache
+        self.get_list()
+        self.assertEqual(len(CountingBackend.calls), 6)
+        stats = get_signing_cache().stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (6, 6))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_entries_expire_before_urls(self):
+        """Test that cached URLs are re-signed once their TTL has passed"""
+        cache = SignedUrlCache(max_entries=10, ttl=0.01)
+        cache.set_many({"a": "url-a"}, 0.0)
+        self.assertEqual(cache.get_many(["a"]), ({"a": "url-a"}, []))
+        time.sleep(0.02)
+        self.assertEqual(cache.get_many(["a"]), ({}, ["a"]))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = SignedUrlCache(max_entries=2, ttl=60)
+        cache.set_many({"a": "url-a", "b": "url-b"}, 0.0)
+        cache.get_many(["a"])
+        cache.set_many({"c": "url-c"}, 0.0)
+        found, missing = cache.get_many(["a", "b", "c"])
+        self.assertEqual(set(found), {"a", "c"})
+        self.assertEqual(missing, ["b"])
+
+    def test_sign_keys_deduplicates(self):
+        """Test that repeated keys in a batch are signed once"""
+        urls = sign_keys(["x", "x", "y"])
+        self.assertEqual(set(urls), {"x", "y"})
+        self.assertEqual(sorted(CountingBackend.calls), ["x", "y"])
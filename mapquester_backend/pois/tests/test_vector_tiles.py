@@ -0,0 +1,181 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from pois.feed_store import add_follow
+from pois.models import POI
+from pois.vector_tiles import tile_bounds, tile_for
+from users.models import Follow
+
+User = get_user_model()
+
+NYC = (40.7128, -74.0060)
+LONDON = (51.5074, -0.1278)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def read_message(data):
+    """Decode a protobuf message into {field: [values]} (varints and bytes only)"""
+    fields = {}
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 1:
+            value, pos = data[pos : pos + 8], pos + 8
+        else:
+            length, pos = read_varint(data, pos)
+            value, pos = data[pos : pos + length], pos + length
+        fields.setdefault(field, []).append(value)
+    return fields
+
+
+def read_packed(data):
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def decode_tile(data):
+    """Return {layer name: [(feature id, {property: value}, geometry)]}"""
+    layers = {}
+    for raw_layer in read_message(data).get(3, []):
+        layer = read_message(raw_layer)
+        keys = [key.decode() for key in layer.get(3, [])]
+        values = []
+        for raw_value in layer.get(4, []):
+            value = read_message(raw_value)
+            values.append(value[1][0].decode() if 1 in value else value[5][0])
+        features = []
+        for raw_feature in layer.get(2, []):
+            feature = read_message(raw_feature)
+            tags = read_packed(feature[2][0])
+            properties = {
+                keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)
+            }
+            features.append((feature[1][0], properties, read_packed(feature[4][0])))
+        assert (layer[15][0], layer[5][0]) == (2, 4096)  # version, extent
+        layers[layer[1][0].decode()] = features
+    return layers
+
+
+class VectorTileTests(TestCase):
+    ZOOM = 12
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="testpass123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="testpass123"
+        )
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.poi = self.create_poi("Downtown", *NYC)
+        self.create_poi("Abroad", *LONDON)
+        add_follow(self.reader.id, self.author.id)
+
+    def create_poi(self, title, latitude, longitude, **fields):
+        return POI.objects.create(
+            userId=self.author,
+            title=title,
+            description="Test Description",
+            tag="food",
+            latitude=latitude,
+            longitude=longitude,
+            **fields,
+        )
+
+    def get_tile(self, point=NYC, zoom=ZOOM, **params):
+        x, y = tile_for(*point, zoom)
+        params.setdefault("userId", self.author.id)
+        return self.client.get(reverse("get_tile", args=[zoom, x, y]), params)
+
+    def test_tile_math(self):
+        """Test that a point lies within the bounds of its tile"""
+        for zoom in [0, 5, 12, 22]:
+            min_lat, max_lat, min_lon, max_lon = tile_bounds(
+                zoom, *tile_for(*NYC, zoom)
+            )
+            self.assertTrue(min_lat <= NYC[0] <= max_lat)
+            self.assertTrue(min_lon <= NYC[1] <= max_lon)
+        self.assertEqual(tile_for(*NYC, 0), (0, 0))
+
+    def test_tile_contains_pois_in_tile(self):
+        """Test that a tile holds the POIs inside it as point features"""
+        response = self.get_tile()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/vnd.mapbox-vector-tile")
+        features = decode_tile(response.content)["pois"]
+        self.assertEqual(len(features), 1)
+        feature_id, properties, geometry = features[0]
+        self.assertEqual(feature_id, self.poi.id)
+        self.assertEqual(properties["title"], "Downtown")
+        self.assertEqual(properties["user_id"], self.author.id)
+        # One MoveTo with tile coordinates inside the extent
+        self.assertEqual(geometry[0], 9)
+        self.assertTrue(all(0 <= value // 2 <= 4096 for value in geometry[1:]))
+
+    def test_world_tile_and_filters(self):
+        """Test the zoom 0 tile and the private, deleted and tag filters"""
+        self.create_poi("Gone", *NYC, isDeleted=True)
+        self.create_poi("Hidden", *NYC, isPublic=False)
+        response = self.get_tile(zoom=0)
+        titles = {f[1]["title"] for f in decode_tile(response.content)["pois"]}
+        self.assertEqual(titles, {"Downtown", "Abroad", "Hidden"})
+
+        response = self.get_tile(zoom=0, tags="music")
+        self.assertEqual(response.content, b"")
+
+    def test_feed_tile(self):
+        """Test that feed tiles hold the followed users' public POIs"""
+        self.create_poi("Hidden", *NYC, isPublic=False)
+        response = self.get_tile(userId=self.reader.id, source="feed")
+        titles = [f[1]["title"] for f in decode_tile(response.content)["pois"]]
+        self.assertEqual(titles, ["Downtown"])
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_writes_only_invalidate_touched_tiles(self):
+        """Test that a new POI invalidates its tiles and leaves the others cached"""
+        cache.clear()
+        self.get_tile()
+        self.get_tile(point=LONDON)
+        self.get_tile(userId=self.reader.id, source="feed")
+
+        self.create_poi("Second", NYC[0] + 0.001, NYC[1] + 0.001)
+        self.assertEqual(self.get_tile(point=LONDON)["X-Cache"], "HIT")
+        response = self.get_tile()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(decode_tile(response.content)["pois"]), 2)
+        response = self.get_tile(userId=self.reader.id, source="feed")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    @mock.patch("pois.tileView.MAX_TILE_POINTS", 1)
+    def test_dense_tiles_are_clustered(self):
+        """Test that tiles over the point limit are sent as clusters"""
+        self.create_poi("Second", NYC[0] + 0.001, NYC[1] + 0.001)
+        layers = decode_tile(self.get_tile().content)
+        self.assertNotIn("pois", layers)
+        self.assertEqual(sum(f[1]["count"] for f in layers["clusters"]), 2)
+
+    def test_invalid_requests(self):
+        """Test that invalid tiles, sources and users are rejected"""
+        self.assertEqual(self.client.get("/api/v1/pois/tiles/1/2/0/").status_code, 400)
+        self.assertEqual(self.get_tile(zoom=23).status_code, 400)
+        self.assertEqual(self.get_tile(source="everything").status_code, 400)
+        self.assertEqual(self.get_tile(userId="abc").status_code, 400)
+        self.assertEqual(self.get_tile(userId=9999).status_code, 404)
@@ -0,0 +1,116 @@
+from django.http import HttpResponse
+from mapquester.renderers import JsonResponse
+from .clustering import MAX_ZOOM, cluster_pois
+from .models import POI
+from .response_cache import cached_response
+from .spatial_index import filter_bbox
+from .vector_tiles import (
+    CONTENT_TYPE,
+    encode_layer,
+    encode_tile,
+    is_valid_tile,
+    tile_bounds,
+)
+from users.models import User
+
+# Tiles with more POIs than this are sent as clusters instead of points
+MAX_TILE_POINTS = 1000
+
+
+def tile_scopes(request, z, x, y):
+    """
+    Cache scopes of a tile. A user's own tiles depend on their POIs in the tile,
+    and on all of them for bulk deletes, feed tiles on every POI in the tile and
+    on whom the user follows.
+    """
+    user_id = request.GET.get("userId")
+    if request.GET.get("source") == "feed":
+        return ["feeds", f"followings:{user_id}", f"tile:{z}/{x}/{y}"]
+    return [f"tiles:{user_id}", f"tile:{user_id}:{z}/{x}/{y}"]
+
+
+# Vector tile of a user's POIs, or of their feed with source=feed
+@cached_response(tile_scopes)
+def get_tile(request, z, x, y):
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+
+    if not is_valid_tile(z, x, y, MAX_ZOOM):
+        return JsonResponse(
+            {"error": f"Invalid tile, zoom must be between 0 and {MAX_ZOOM}"},
+            status=400,
+        )
+
+    source = request.GET.get("source", "pois")
+    if source not in ["pois", "feed"]:
+        return JsonResponse(
+            {"error": "Invalid source. Use 'pois' or 'feed'."}, status=400
+        )
+
+    try:
+        user = User.objects.get(id=int(request.GET["userId"]))
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "Please provide a valid userId"}, status=400)
+    except User.DoesNotExist:
+        return JsonResponse(
+            {"error": f"User with ID {request.GET['userId']} does not exist."},
+            status=404,
+        )
+
+    if source == "feed":
+        pois = POI.objects.filter(feed_entries__userId=user)
+    else:
+        pois = POI.objects.filter(userId=user, isDeleted=False)
+    tags = request.GET.getlist("tags")
+    if tags:
+        pois = pois.filter(tag__in=tags)
+    pois = filter_bbox(pois, *tile_bounds(z, x, y))
+
+    rows = list(
+        pois.values_list("id", "latitude", "longitude", "userId", "title", "tag")[
+            : MAX_TILE_POINTS + 1
+        ]
+    )
+    if len(rows) <= MAX_TILE_POINTS:
+        layer = encode_layer(
+            "pois",
+            (
+                (
+                    poi_id,
+                    latitude,
+                    longitude,
+                    {"user_id": user_id, "title": title, "tag": tag},
+                )
+                for poi_id, latitude, longitude, user_id, title, tag in rows
+            ),
+            z,
+            x,
+            y,
+        )
+    else:
+        clusters = cluster_pois(pois, z)["clusters"]
+        layer = encode_layer(
+            "clusters",
+            (
+                (
+                    index + 1,
+                    cluster["latitude"],
+                    cluster["longitude"],
+                    {
+                        "count": cluster["count"],
+                        "geohash": cluster["geohash"],
+                        "tag": (
+                            cluster["top_tags"][0]["tag"]
+                            if cluster["top_tags"]
+                            else None
+                        ),
+                    },
+                )
+                for index, cluster in enumerate(clusters)
+            ),
+            z,
+            x,
+            y,
+        )
+
+    return HttpResponse(encode_tile([layer]), content_type=CONTENT_TYPE)
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .media import get_media_backend
+
+
+class SignedUrlCache:
+    """
+    Thread-safe LRU cache of presigned URLs. Entries expire `ttl` seconds after
+    signing, which is kept shorter than the URL's own expiry so a cached URL always
+    has some validity left when it reaches the client.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (url, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.signed = 0
+        self.signing_seconds = 0.0
+
+    def get_many(self, keys):
+        """
+        Return ({key: url} for fresh entries, [keys that must be signed]).
+        """
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def set_many(self, urls, signing_seconds):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, url in urls.items():
+                self._entries[key] = (url, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.signed += len(urls)
+            self.signing_seconds += signing_seconds
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "signed": self.signed,
+                "signing_seconds": self.signing_seconds,
+                "avg_signing_ms": (
+                    self.signing_seconds * 1000 / self.signed if self.signed else 0.0
+                ),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def refresh_margin():
+    """
+    Seconds of validity that a URL handed out by the signing cache has left at
+    least: a tenth of the lifetime (at least 30 seconds, at most the lifetime).
+    """
+    expiry = settings.AWS_S3_PRESIGNED_URL_TIME
+    return min(max(expiry // 10, 30), expiry)
+
+
+def get_signing_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            expiry = settings.AWS_S3_PRESIGNED_URL_TIME
+            _cache = SignedUrlCache(
+                settings.PRESIGNED_URL_CACHE_SIZE, max(expiry - refresh_margin(), 0)
+            )
+        return _cache
+
+
+def reset_signing_cache():
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def is_object_key(value):
+    # POIs created before keys were stored hold full URLs, which are passed through
+    return isinstance(value, str) and not value.startswith(("http://", "https://", "/"))
+
+
+def sign_keys(keys):
+    """
+    Return {key: presigned URL} for a batch of object keys, signing only the keys
+    that are not cached.
+    """
+    cache = get_signing_cache()
+    urls, missing = cache.get_many(set(keys))
+    if missing:
+        backend = get_media_backend()
+        start = time.perf_counter()
+        signed = {
+            key: backend.url(key, settings.AWS_S3_PRESIGNED_URL_TIME) for key in missing
+        }
+        cache.set_many(signed, time.perf_counter() - start)
+        urls.update(signed)
+    return urls
+
+
+def sign_rows(rows, field):
+    """
+    Replace the object keys in rows[i][field] with presigned URLs, signing the
+    whole page of rows in one batch.
+    """
+    keys = [
+        value
+        for row in rows
+        for value in (row.get(field) or [])
+        if is_object_key(value)
+    ]
+    if not keys:
+        return rows
+    urls = sign_keys(keys)
+    for row in rows:
+        if row.get(field):
+            row[field] = [
+                urls[value] if is_object_key(value) else value for value in row[field]
+            ]
+    return rows
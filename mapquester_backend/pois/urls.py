@@ -3,12 +3,19 @@ from django.urls import path
 from . import views
 from . import poiInteractionView
 from . import getFeedView
+from . import tileView
+from . import bulkImportView
+from . import searchView
+from . import nearbyView
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     # Define the paths for POI management
     path("create/", views.create_poi, name="create_poi"),
+    path("bulk/", bulkImportView.bulk_create_pois, name="bulk_create_pois"),
+    path("search/", searchView.search_pois_view, name="search_pois"),
+    path("nearby/", nearbyView.nearby_pois_view, name="nearby_pois"),
     path("update/<int:poi_id>/", views.update_poi, name="update_poi"),
     path("get/<int:user_id>/", views.get_pois, name="get_pois"),
     path("delete/<int:poi_id>/", views.delete_poi, name="delete_poi"),
@@ -23,6 +30,7 @@ urlpatterns = [
         name="list_interactions",
     ),
     path("feed/<int:user_id>/", getFeedView.get_feed, name="get_feed"),
+    path("tiles/<int:z>/<int:x>/<int:y>/", tileView.get_tile, name="get_tile"),
 ]
 
 if settings.DEBUG:
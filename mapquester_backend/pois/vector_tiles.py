@@ -0,0 +1,148 @@
+# Mapbox Vector Tile (MVT 2.1) encoding of POIs. Tiles use the Web Mercator
+# z/x/y scheme of the map frontend, and each POI is a point feature. The protobuf
+# messages are small and fixed (Tile > Layer > Feature/Value), so they are written
+# by hand instead of pulling in a protobuf dependency.
+# Spec: https://github.com/mapbox/vector-tile-spec/tree/master/2.1
+
+import math
+import struct
+
+EXTENT = 4096  # Tile coordinate resolution
+MAX_LATITUDE = 85.0511287798  # Web Mercator cuts off the poles
+MVT_VERSION = 2
+POINT = 1  # GeomType
+MOVE_TO = 1  # Geometry command
+CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+def _tile_position(latitude, longitude, zoom):
+    # Fractional tile coordinates of a point at the given zoom
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, float(latitude)))
+    n = 1 << zoom
+    lat = math.radians(latitude)
+    x = (float(longitude) + 180) / 360 * n
+    y = (1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2 * n
+    return x, y
+
+
+def tile_for(latitude, longitude, zoom):
+    """
+    Return the (x, y) of the tile containing a point at the given zoom.
+    """
+    n = 1 << zoom
+    x, y = _tile_position(latitude, longitude, zoom)
+    return min(int(x), n - 1), min(int(y), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Return the (min_lat, max_lat, min_lon, max_lon) covered by a tile.
+    """
+    n = 1 << zoom
+
+    def latitude(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return latitude(y + 1), latitude(y), x / n * 360 - 180, (x + 1) / n * 360 - 180
+
+
+def is_valid_tile(zoom, x, y, max_zoom):
+    return 0 <= zoom <= max_zoom and 0 <= x < (1 << zoom) and 0 <= y < (1 << zoom)
+
+
+# Protobuf wire format
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field, payload):
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(field, value):
+    return _key(field, 0) + _varint(value)
+
+
+def _packed_field(field, values):
+    return _bytes_field(field, b"".join(_varint(value) for value in values))
+
+
+def _value(value):
+    # Layer value message, typed by the Python value
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _uint_field(5, value)
+        return _uint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode())
+
+
+def encode_layer(name, features, zoom, x, y, extent=EXTENT):
+    """
+    Encode one layer of point features. features is an iterable of
+    (id, latitude, longitude, {property: value}); properties set to None are left
+    out. Keys and values are deduplicated across the layer as the spec requires.
+    Returns b"" when there are no features.
+    """
+    keys, values = {}, {}
+    encoded = []
+    for feature_id, latitude, longitude, properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            # Values of different types must not collapse, e.g. 1 and True
+            tags.append(values.setdefault((type(value), value), len(values)))
+
+        px, py = _tile_position(latitude, longitude, zoom)
+        geometry = [
+            MOVE_TO | (1 << 3),
+            _zigzag(round((px - x) * extent)),
+            _zigzag(round((py - y) * extent)),
+        ]
+        encoded.append(
+            _bytes_field(
+                2,
+                _uint_field(1, feature_id)
+                + _packed_field(2, tags)
+                + _uint_field(3, POINT)
+                + _packed_field(4, geometry),
+            )
+        )
+
+    if not encoded:
+        return b""
+    return (
+        _uint_field(15, MVT_VERSION)
+        + _bytes_field(1, name.encode())
+        + b"".join(encoded)
+        + b"".join(_bytes_field(3, key.encode()) for key in keys)
+        + b"".join(_bytes_field(4, _value(value)) for _, value in values)
+        + _uint_field(5, extent)
+    )
+
+
+def encode_tile(layers):
+    """
+    Assemble a tile from encoded layers. Empty layers are dropped.
+    """
+    return b"".join(_bytes_field(3, layer) for layer in layers if layer)
@@ -1,36 +1,36 @@
-import base64
 import json
+import logging
 
-# FIXME: need to add to requirements
-import os
-import boto3
-from django.conf import settings
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser, JSONParser
 from rest_framework import status
 from .models import POI
+from .clustering import MAX_ZOOM, cluster_pois
+from .columnar import FORMATS, binary_payload, columnar_payload
+from .counters import change_reactions
+from .feed_store import fan_out_poi, retract_poi, sync_poi
+from .media import read_attachments, schedule_attachments
+from .pagination import cursor_page, cursor_q, parse_page_size
+from .projections import POI_FIELDS, project
+from .response_cache import cached_response
+from .spatial_index import filter_bbox, parse_bbox
+from .streaming import STREAM_FORMATS, streaming_response
 from users.models import User
-from django.http import JsonResponse
+from django.http import HttpResponse
+from mapquester.renderers import JsonResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils.timezone import now
 
-# Initialize S3 client
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_S3_REGION_NAME,
-)
+logger = logging.getLogger(__name__)
 
 
 @api_view(["POST"])
 @parser_classes([MultiPartParser, JSONParser])  # Add MultiPartParser to handle files
 def create_poi(request):
     data = request.data
-    print("Data : ", data)
+    logger.debug("Data : %s", data)
 
     # Step 1: Extract and validate data
     try:
@@ -43,100 +43,59 @@ def create_poi(request):
         tag = data["tag"]
         description = data["description"]
         reactions = data.get("reactions", 0)
-        content_files = data.get("content", [])
-        print("Content: ", content_files)
+        content_files = read_attachments(request)
+        logger.debug("Content: %s", [file_name for file_name, _ in content_files])
     except KeyError as e:
-        print(str(e))
+        logger.debug("Missing field in create_poi: %s", e)
         return Response(
             {"error": f"Missing required field: {str(e)}"},
             status=status.HTTP_400_BAD_REQUEST,
         )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # Step 2: Create POI entry in the database (initially with empty content field)
-    poi = POI.objects.create(
-        userId=user,
-        latitude=latitude,
-        longitude=longitude,
-        isPublic=is_public,
-        isDeleted=is_deleted,
-        title=title,
-        tag=tag,
-        description=description,
-        reactions=reactions,
-        content=[],  # This will be updated after uploading files
-    )
-
-    # Step 3: Upload files to S3 and collect URLs
-    local_urls = []
-    # for content_file in content_files:
-    #     try:
-    #         file_name = content_file['filename']
-    #         file_path = f"poi_attachments/{poi.id}/{file_name}"
-    #
-    #         # Ensure the directory exists
-    #         os.makedirs(os.path.dirname(os.path.join(settings.MEDIA_ROOT, file_path)), exist_ok=True)
-    #
-    #         # Save file using Django's storage system
-    #         image_data = base64.b64decode(content_file['data'])
-    #         image_file = ContentFile(image_data, name=file_name)
-    #         file_path = default_storage.save(file_path, image_file)
-    #
-    #         # Get file URL and add to list
-    #         file_url = settings.MEDIA_URL + file_path
-    #         local_urls.append(file_url)
-    #
-    #     except Exception as e:
-    #         return Response({"error": f"Failed to save {file_name}: {str(e)}"},
-    #                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    s3_urls = []
-    response_urls = []
-    for content_file in content_files:
-        try:
-            file_name = content_file["filename"]
-            s3_key = f"poi_attachments/{poi.id}/{file_name}"
-
-            # Save file using Django's storage system
-            image_data = base64.b64decode(content_file["data"])
-            image_file = ContentFile(image_data, name=file_name)
-
-            # Upload file to S3
-            s3_client.upload_fileobj(
-                image_file, settings.AWS_STORAGE_BUCKET_NAME, s3_key
-            )
-
-            # Get file URL and add to list
-            file_url = s3_client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": s3_key},
-                ExpiresIn=settings.AWS_S3_PRESIGNED_URL_TIME,
-            )
-            # file_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
-            response_urls.append(s3_key)
-            s3_urls.append(file_url)
+    with transaction.atomic():
+        poi = POI.objects.create(
+            userId=user,
+            latitude=latitude,
+            longitude=longitude,
+            isPublic=is_public,
+            isDeleted=is_deleted,
+            title=title,
+            tag=tag,
+            description=description,
+            reactions=reactions,
+            content=[],  # This will be updated after uploading files
+        )
 
-        except Exception as e:
-            return Response(
-                {"error": f"Failed to upload {file_name}: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        # Step 3: Register attachments as pending. They are uploaded concurrently in
+        # the background and the POI's content is filled in once they complete
+        attachments = schedule_attachments(poi, content_files)
 
-    # Step 4: Update the POI entry with S3 URLs
-    # local_urls = s3_urls
-    poi.content = s3_urls
-    poi.save()
+        # Step 4: Push the POI into the followers' materialized feeds
+        fan_out_poi(poi)
 
     return Response(
         {
             "message": "POI created successfully",
             "poi_id": poi.id,
-            "content_urls": response_urls,
+            "content_urls": [attachment.key for attachment in attachments],
+            "attachments": [
+                {
+                    "id": attachment.id,
+                    "key": attachment.key,
+                    "status": attachment.status,
+                }
+                for attachment in attachments
+            ],
         },
         status=status.HTTP_201_CREATED,
     )
 
 
 # API to return a filtered list of POIS
+@cached_response(lambda request, user_id: [f"pois:{user_id}"], signed_urls=True)
 @api_view(["GET"])
 def get_pois(request, user_id):
     # Get view type and filter list from the request
@@ -149,8 +108,28 @@ def get_pois(request, user_id):
     if tags:
         pois_query = pois_query.filter(tag__in=tags)
 
-    # Handle list view with pagination
-    if view_type == "list":
+    # Handle list view with keyset (cursor) pagination, newest first
+    if view_type == "list" and "cursor" in request.GET:
+        try:
+            page_size = parse_page_size(request.GET)
+            after_cursor = cursor_q(request.GET["cursor"])
+        except ValueError:
+            return Response({"error": "Invalid pagination parameters"}, status=400)
+
+        # Fetch one extra row to know whether there is a next page, no COUNT needed
+        rows = pois_query.filter(after_cursor).order_by("-createdAt", "-id")
+        pois, next_cursor = cursor_page(
+            project(rows[: page_size + 1], POI_FIELDS),
+            page_size,
+            key=lambda poi: (poi["createdAt"], poi["id"]),
+        )
+        response_data = {
+            "pois": pois,
+            "pagination": {"page_size": page_size, "next_cursor": next_cursor},
+        }
+
+    # Handle list view with page number pagination
+    elif view_type == "list":
         # Pagination parameters
         try:
             page = int(request.GET.get("page", 1))
@@ -159,7 +138,7 @@ def get_pois(request, user_id):
             return Response({"error": "Invalid pagination parameters"}, status=400)
 
         # Paginate the POIs
-        paginator = Paginator(pois_query, page_size)
+        paginator = Paginator(pois_query.order_by("-createdAt", "-id"), page_size)
         try:
             pois_page = paginator.page(page)
         except PageNotAnInteger:
@@ -168,7 +147,7 @@ def get_pois(request, user_id):
             pois_page = paginator.page(paginator.num_pages)
 
         # Convert paginated data to list of dictionaries
-        pois = list(pois_page.object_list.values())
+        pois = project(pois_page.object_list, POI_FIELDS)
 
         # Include pagination metadata in response
         response_data = {
@@ -185,46 +164,74 @@ def get_pois(request, user_id):
     elif view_type == "map":
         # Retrieve bounding box coordinates from request
         try:
-            min_lat = float(request.GET.get("min_lat", -90))
-            max_lat = float(request.GET.get("max_lat", 90))
-            min_lon = float(request.GET.get("min_lon", -180))
-            max_lon = float(request.GET.get("max_lon", 180))
-
-            # Validate coordinate ranges
-            if not (-90 <= min_lat <= 90) or not (-90 <= max_lat <= 90):
-                raise ValueError("Latitude must be between -90 and 90 degrees")
-
-            if not (-180 <= min_lon <= 180) or not (-180 <= max_lon <= 180):
-                raise ValueError("Longitude must be between -180 and 180 degrees")
-
-            # Additional validation for min/max relationship
-            if min_lat > max_lat:
-                raise ValueError("min_lat cannot be greater than max_lat")
-
-            if min_lon > max_lon:
-                raise ValueError("min_lon cannot be greater than max_lon")
-
-            pois_query = pois_query.filter(
-                latitude__gte=min_lat,
-                latitude__lte=max_lat,
-                longitude__gte=min_lon,
-                longitude__lte=max_lon,
-            )
+            min_lat, max_lat, min_lon, max_lon = parse_bbox(request.GET)
         except (KeyError, ValueError):
             return Response(
                 {
-                    "error": "Please provide valid min_lat, max_lat, min_lon, and max_lon values for map view"
+                    "error": (
+                        "Please provide valid min_lat, max_lat, min_lon, and max_lon "
+                        "values for map view"
+                    )
                 },
                 status=400,
             )
 
+        stream_format = request.GET.get("stream")
+        if stream_format is not None and stream_format not in STREAM_FORMATS:
+            return Response(
+                {"error": "Invalid stream format. Use 'json' or 'ndjson'."},
+                status=400,
+            )
+        output_format = request.GET.get("format")
+        if output_format is not None and output_format not in FORMATS:
+            return Response(
+                {"error": "Invalid format. Use 'columnar' or 'binary'."}, status=400
+            )
+
+        # Narrow the query through the geohash index before the exact range check
+        pois_query = filter_bbox(pois_query, min_lat, max_lat, min_lon, max_lon)
+
+        # Marker-only clients can get parallel arrays instead of full objects
+        if output_format == "columnar":
+            return JsonResponse(columnar_payload(pois_query))
+        if output_format == "binary":
+            return HttpResponse(
+                binary_payload(pois_query), content_type=FORMATS["binary"]
+            )
+
+        # Large viewports can be streamed chunk by chunk instead of built in memory
+        if stream_format:
+            return streaming_response(pois_query, POI_FIELDS, stream_format)
+
         # Convert the filtered data to a list of dictionaries
-        pois = list(pois_query.values())
+        pois = project(pois_query, POI_FIELDS)
         response_data = {"pois": pois}
 
+    # Handle clustered map view for dense or zoomed-out viewports
+    elif view_type == "clusters":
+        try:
+            min_lat, max_lat, min_lon, max_lon = parse_bbox(request.GET)
+            zoom = int(request.GET["zoom"])
+            if not (0 <= zoom <= MAX_ZOOM):
+                raise ValueError(f"Zoom must be between 0 and {MAX_ZOOM}")
+        except (KeyError, ValueError):
+            return Response(
+                {
+                    "error": (
+                        "Please provide valid bounding box values and a zoom level "
+                        "for clusters view"
+                    )
+                },
+                status=400,
+            )
+
+        pois_query = filter_bbox(pois_query, min_lat, max_lat, min_lon, max_lon)
+        response_data = cluster_pois(pois_query, zoom)
+
     else:
         return Response(
-            {"error": "Invalid view type. Use 'list' or 'map'."}, status=400
+            {"error": "Invalid view type. Use 'list', 'map' or 'clusters'."},
+            status=400,
         )
 
     # Return the response data as JSON
@@ -236,30 +243,30 @@ def get_pois(request, user_id):
 def update_poi(request, poi_id):
     try:
         poi = POI.objects.get(id=poi_id)
-        print("POI value : ", poi)
+        logger.debug("POI value : %s", poi)
     except POI.DoesNotExist:
         return Response({"error": "POI not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    if "isPublic" in request.data:
-        poi.isPublic = request.data["isPublic"]
+    updated_fields = ["updatedAt"]
+    for field in ["isPublic", "title", "description", "tag"]:
+        if field in request.data:
+            setattr(poi, field, request.data[field])
+            updated_fields.append(field)
 
-    if "reactions_change" in request.data:
-        reactions_change = request.data["reactions_change"]
-        poi.reactions += reactions_change
-        if poi.reactions < 0:
-            poi.reactions = 0
-
-    if "title" in request.data:
-        poi.title = request.data["title"]
-
-    if "description" in request.data:
-        poi.description = request.data["description"]
+    poi.updatedAt = now()
+    # Visibility changes add the POI to or remove it from followers' feeds, in the
+    # same transaction so no feed is read with the POI saved but not yet retracted
+    with transaction.atomic():
+        # Only write the edited columns so concurrent reaction updates are not
+        # overwritten
+        poi.save(update_fields=updated_fields)
+        if "isPublic" in request.data:
+            sync_poi(poi)
 
-    if "tag" in request.data:
-        poi.tag = request.data["tag"]
+    if "reactions_change" in request.data:
+        change_reactions(poi.id, int(request.data["reactions_change"]))
+        poi.refresh_from_db(fields=["reactions"])
 
-    poi.updatedAt = now()
-    poi.save()
     return Response(
         {
             "message": "POI updated successfully",
@@ -283,5 +290,7 @@ def delete_poi(request, poi_id):
 
     poi.isDeleted = 1
     poi.updatedAt = now()
-    poi.save()
+    with transaction.atomic():
+        poi.save(update_fields=["isDeleted", "updatedAt"])
+        retract_poi(poi)
     return Response({"message": "POI marked as deleted"}, status=status.HTTP_200_OK)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        # Connects the follow counter, follow graph and username search signals
+        from . import follow_counts, follow_graph, user_search  # noqa: F401
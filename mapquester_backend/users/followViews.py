@@ -1,15 +1,27 @@
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from mapquester.renderers import JsonResponse
+from django.db import transaction
 from django.db.models import Q
-from .models import Follow
+from .follow_graph import followers_you_know, is_following_many
+from .models import Follow, FollowRecommendation
+from pois.feed_store import add_follow, remove_follow
+from pois.pagination import cursor_page, cursor_q, parse_page_size
+from pois.response_cache import cached_response
 
 # from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from django.contrib.auth import get_user_model
 import json
 
 User = get_user_model()
 
+FOLLOW_PAGE_SIZE = 50
+MAX_FOLLOW_PAGE_SIZE = 500
+MAX_IS_FOLLOWING_IDS = 500
+RECOMMENDATION_LIMIT = 10
+MAX_RECOMMENDATION_LIMIT = 50
+
 
 @csrf_exempt
 def follow_user(request):
@@ -44,33 +56,49 @@ def follow_user(request):
         # follower = get_object_or_404(User, id=follower_id)
         # following = get_object_or_404(User, id=following_id)
 
-        # Check if the follow relationship already exists
-        follow_relation = Follow.objects.filter(follower=follower, following=following)
-        if follow_relation.exists():
-            # Unfollow if already following
-            follow_relation.delete()
-            return JsonResponse(
-                {
-                    "message": f"{follower.username} has unfollowed {following.username}."
-                },
-                status=200,
-            )
-        else:
-            # Follow if not already following
-            Follow.objects.create(follower=follower, following=following)
-            return JsonResponse(
-                {
-                    "message": f"{follower.username} is now following {following.username}."
-                },
-                status=201,
-            )
+        # Unfollow if already following, follow otherwise. The follower counts
+        # are updated by the Follow signals (users/follow_counts.py)
+        with transaction.atomic():
+            unfollowed, _ = Follow.objects.filter(
+                follower=follower, following=following
+            ).delete()
+            if unfollowed:
+                remove_follow(follower.id, following.id)
+            else:
+                Follow.objects.create(follower=follower, following=following)
+                add_follow(follower.id, following.id)
+
+        follower.refresh_from_db(fields=["following_count"])
+        following.refresh_from_db(fields=["followers_count"])
+        verb = "has unfollowed" if unfollowed else "is now following"
+        return JsonResponse(
+            {
+                "message": f"{follower.username} {verb} {following.username}.",
+                "followerCount": following.followers_count,
+                "followingCount": follower.following_count,
+            },
+            status=200 if unfollowed else 201,
+        )
+
+
+def _follow_list_scopes(request, user_id):
+    # "mode" is either followers or followings, an invalid mode is never cached
+    scopes = ["users", f"{request.GET.get('mode')}:{user_id}"]
+    if request.GET.get("viewerId"):
+        scopes.append(f"followings:{request.GET['viewerId']}")
+    return scopes
 
 
+@cached_response(_follow_list_scopes)
 def get_followers_or_followings(request, user_id):
     """
-    API to get a user's followers or followings based on a query parameter.
-    Query Parameter:
-    - `type`: "followers" or "followings"
+    API to get a user's followers or followings based on a query parameter,
+    newest first.
+    Query Parameters:
+    - `mode`: "followers" or "followings"
+    - `cursor`: next_cursor of the previous page, absent for the first page
+    - `page_size`: number of users per page, at most MAX_FOLLOW_PAGE_SIZE
+    - `viewerId`: adds `viewer_follows`, whether this user follows each one
     """
     request_type = request.GET.get("mode")
 
@@ -81,22 +109,160 @@ def get_followers_or_followings(request, user_id):
             status=400,
         )
 
-    # Check if the user exists
     try:
-        user = User.objects.get(id=user_id)
+        page_size = min(
+            parse_page_size(request.GET, FOLLOW_PAGE_SIZE), MAX_FOLLOW_PAGE_SIZE
+        )
+        after_cursor = cursor_q(request.GET.get("cursor"), "created_at", "id")
+        viewer_id = int(request.GET.get("viewerId") or 0) or None
+    except ValueError:
+        return JsonResponse({"error": "Invalid pagination parameters"}, status=400)
+
+    # Check if the user exists, the total comes from the denormalized counts
+    try:
+        user = User.objects.only("followers_count", "following_count").get(id=user_id)
     except User.DoesNotExist:
         return JsonResponse(
             {"error": f"User with ID {user_id} does not exist."}, status=404
         )
 
     if request_type == "followers":
-        data = user.followers.all().values(
-            "follower__id", "follower__username", "follower__email"
+        follows = Follow.objects.filter(after_cursor, following=user)
+        other, count = "follower", user.followers_count
+    else:
+        follows = Follow.objects.filter(after_cursor, follower=user)
+        other, count = "following", user.following_count
+
+    fields = [f"{other}__id", f"{other}__username", f"{other}__email"]
+    # Fetch one extra row to know whether there is a next page
+    rows, next_cursor = cursor_page(
+        follows.order_by("-created_at", "-id").values("id", "created_at", *fields)[
+            : page_size + 1
+        ],
+        page_size,
+        key=lambda row: (row["created_at"], row["id"]),
+    )
+    users = [{field: row[field] for field in fields} for row in rows]
+    if viewer_id:
+        followed = is_following_many(viewer_id, [row[f"{other}__id"] for row in rows])
+        for user in users:
+            user["viewer_follows"] = user[f"{other}__id"] in followed
+    return JsonResponse(
+        {
+            request_type: users,
+            "count": count,
+            "pagination": {"page_size": page_size, "next_cursor": next_cursor},
+        },
+        status=200,
+    )
+
+
+@require_GET
+@cached_response(lambda request, user_id: [f"followings:{user_id}"])
+def is_following(request, user_id):
+    """
+    API to check which of many users a user follows, in one query.
+    Query Parameter:
+    - `ids`: user ids, comma separated or repeated, at most MAX_IS_FOLLOWING_IDS
+    """
+    try:
+        ids = [
+            int(value)
+            for param in request.GET.getlist("ids")
+            for value in param.split(",")
+            if value.strip()
+        ]
+    except ValueError:
+        return JsonResponse({"error": "ids must be user ids"}, status=400)
+    if len(ids) > MAX_IS_FOLLOWING_IDS:
+        return JsonResponse(
+            {"error": f"At most {MAX_IS_FOLLOWING_IDS} ids can be checked at once"},
+            status=400,
         )
-        return JsonResponse({"followers": list(data)}, status=200)
 
-    elif request_type == "followings":
-        data = user.following.all().values(
-            "following__id", "following__username", "following__email"
+    followed = is_following_many(user_id, ids)
+    return JsonResponse(
+        {"user_id": user_id, "following": {str(id): id in followed for id in ids}},
+        status=200,
+    )
+
+
+@require_GET
+@cached_response(
+    lambda request, user_id: [
+        "users",
+        f"followers:{user_id}",
+        f"followings:{request.GET.get('viewerId')}",
+    ]
+)
+def get_followers_you_know(request, user_id):
+    """
+    API to get the followers of a user that the viewer follows.
+    Query Parameters:
+    - `viewerId`: the viewing user
+    - `limit`: number of users returned with the total, at most MAX_FOLLOW_PAGE_SIZE
+    """
+    try:
+        viewer_id = int(request.GET["viewerId"])
+        limit = min(int(request.GET.get("limit", 3)), MAX_FOLLOW_PAGE_SIZE)
+        if limit < 0:
+            raise ValueError("limit must not be negative")
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"error": "Please provide a valid viewerId and limit"}, status=400
         )
-        return JsonResponse({"followings": list(data)}, status=200)
+
+    known = followers_you_know(viewer_id, user_id)
+    users = list(
+        User.objects.filter(id__in=known[:limit])
+        .order_by("id")
+        .values("id", "username")
+    )
+    return JsonResponse({"count": len(known), "users": users}, status=200)
+
+
+@require_GET
+@cached_response(
+    lambda request, user_id: ["users", "recommendations", f"followings:{user_id}"]
+)
+def get_recommendations(request, user_id):
+    """
+    API to get the precomputed "who to follow" suggestions of a user, best first.
+    Accounts followed since the last compute_recommendations run are left out.
+    Query Parameter:
+    - `limit`: number of users, at most MAX_RECOMMENDATION_LIMIT
+    """
+    try:
+        limit = min(
+            int(request.GET.get("limit", RECOMMENDATION_LIMIT)),
+            MAX_RECOMMENDATION_LIMIT,
+        )
+        if limit < 0:
+            raise ValueError("limit must not be negative")
+    except ValueError:
+        return JsonResponse({"error": "Please provide a valid limit"}, status=400)
+
+    followed = Follow.objects.filter(follower=user_id).values("following")
+    rows = (
+        FollowRecommendation.objects.filter(user=user_id)
+        .exclude(candidate__in=followed)
+        .order_by("-score", "candidate")
+        .values(
+            "candidate__id",
+            "candidate__username",
+            "candidate__followers_count",
+            "score",
+            "mutuals",
+        )[:limit]
+    )
+    users = [
+        {
+            "id": row["candidate__id"],
+            "username": row["candidate__username"],
+            "followers_count": row["candidate__followers_count"],
+            "score": round(row["score"], 4),
+            "mutuals": row["mutuals"],
+        }
+        for row in rows
+    ]
+    return JsonResponse({"user_id": user_id, "recommendations": users}, status=200)
@@ -0,0 +1,85 @@
+# Denormalized follower/following counts on User. Every Follow row written or
+# deleted through the ORM (follow_user, the admin, create_test_data, the cascade
+# of a deleted user) adjusts both counts with one atomic UPDATE each, so profile
+# and list endpoints read a column instead of counting a large join. Bulk writes
+# that skip signals (synthetic datasets, COPY) call recount_follow_counts().
+
+from contextvars import ContextVar
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Follow, User
+
+# Ids of the users whose deletion is cascading in this context
+_deleting_users = ContextVar("deleting_users", default=frozenset())
+
+
+def change_follow_counts(follower_id, following_id, delta):
+    """
+    Add delta to the follower's following_count and the followed user's
+    followers_count, never below 0.
+    """
+    User.objects.filter(id=follower_id).update(
+        following_count=Greatest(F("following_count") + delta, 0)
+    )
+    User.objects.filter(id=following_id).update(
+        followers_count=Greatest(F("followers_count") + delta, 0)
+    )
+
+
+def recount_follow_counts(users=None):
+    """
+    Recompute both counts from the Follow table, for a user queryset or every
+    user. Returns the number of users updated.
+    """
+    followers = (
+        Follow.objects.filter(following=OuterRef("pk"))
+        .values("following")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    following = (
+        Follow.objects.filter(follower=OuterRef("pk"))
+        .values("follower")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return (users if users is not None else User.objects.all()).update(
+        followers_count=Coalesce(Subquery(followers), 0),
+        following_count=Coalesce(Subquery(following), 0),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def _follow_created(sender, instance, created, **kwargs):
+    if created:
+        change_follow_counts(instance.follower_id, instance.following_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def _follow_deleted(sender, instance, **kwargs):
+    deleting = _deleting_users.get()
+    if instance.follower_id in deleting or instance.following_id in deleting:
+        return  # Settled by _user_deleting
+    change_follow_counts(instance.follower_id, instance.following_id, -1)
+
+
+@receiver(pre_delete, sender=User)
+def _user_deleting(sender, instance, **kwargs):
+    # The cascade is about to delete this user's follows: settle the counts of
+    # the other side in two UPDATEs instead of two per follow
+    User.objects.filter(followers__follower=instance).update(
+        followers_count=Greatest(F("followers_count") - 1, 0)
+    )
+    User.objects.filter(following__following=instance).update(
+        following_count=Greatest(F("following_count") - 1, 0)
+    )
+    _deleting_users.set(_deleting_users.get() | {instance.id})
+
+
+@receiver(post_delete, sender=User)
+def _user_deleted(sender, instance, **kwargs):
+    _deleting_users.set(_deleting_users.get() - {instance.id})
@@ -0,0 +1,309 @@
+# Optional in-process cache of the follow graph (FOLLOW_GRAPH_ENABLED). Each
+# user's followers and followings are kept as a sorted array('q') of user ids,
+# loaded lazily with one query the first time they are needed, so:
+# - neighbor lookups return a compact array, built in O(degree) from one query
+#   and without a query at all once warm
+# - "does A follow B" is a binary search
+# - intersections ("followers you know", mutual follows) merge two sorted arrays,
+#   or binary search the larger one when the sizes are far apart
+#
+# Memory is bounded by FOLLOW_GRAPH_MAX_EDGES ids in total: the least recently
+# used adjacency lists are evicted first, and a list larger than the whole budget
+# is served without being cached. Follow signals update the cached lists once
+# the transaction commits. Other processes do not see those updates, so
+# entries are also reloaded after FOLLOW_GRAPH_TTL seconds.
+#
+# The module-level helpers (follower_ids, is_following_many, ...) go through the
+# cache when it is enabled and fall back to the Follow table otherwise, so callers
+# do not need to know which one answers.
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Follow
+
+FOLLOWERS = "followers"
+FOLLOWING = "following"
+# (filtered column, returned column) of each direction
+_COLUMNS = {
+    FOLLOWERS: ("following_id", "follower_id"),
+    FOLLOWING: ("follower_id", "following_id"),
+}
+
+
+def _load(direction, user_ids):
+    """
+    {user_id: sorted array of neighbor ids} for the given users, in one query.
+    """
+    key, value = _COLUMNS[direction]
+    adjacency = {user_id: array("q") for user_id in user_ids}
+    rows = (
+        Follow.objects.filter(**{f"{key}__in": user_ids})
+        .order_by(key, value)
+        .values_list(key, value)
+    )
+    for user_id, neighbor_id in rows.iterator(chunk_size=10000):
+        adjacency[user_id].append(neighbor_id)
+    return adjacency
+
+
+def contains(ids, user_id):
+    i = bisect_left(ids, user_id)
+    return i < len(ids) and ids[i] == user_id
+
+
+def intersect(a, b):
+    """
+    Sorted ids present in both sorted sequences.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return []
+    # Binary search the larger side when it dwarfs the smaller one
+    if len(b) > 16 * len(a):
+        return [user_id for user_id in a if contains(b, user_id)]
+    found = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            found.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return found
+
+
+class FollowGraph:
+    """
+    Thread-safe LRU cache of adjacency arrays, keyed by (direction, user id).
+    """
+
+    def __init__(self, max_edges, ttl):
+        self.max_edges = max_edges
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (direction, user_id) -> (ids, loaded_at)
+        self._edges = 0
+        # Bumped by every edge update, so a list loaded while an update landed
+        # is not cached without it
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        # Called with the lock held
+        entry = self._entries.get(key)
+        if entry is None or now - entry[1] > self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key, ids, loaded_at):
+        # Called with the lock held
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._edges -= len(old[0])
+        if len(ids) > self.max_edges:
+            return
+        self._entries[key] = (ids, loaded_at)
+        self._edges += len(ids)
+        while self._edges > self.max_edges:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._edges -= len(evicted)
+            self.evictions += 1
+
+    def neighbors_many(self, direction, user_ids):
+        """
+        {user_id: sorted array of follower or following ids}. Missing users are
+        loaded together in one query. The arrays are shared, do not modify them.
+        """
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for user_id in user_ids:
+                ids = self._lookup((direction, user_id), now)
+                if ids is None:
+                    missing.append(user_id)
+                else:
+                    found[user_id] = ids
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+        if missing:
+            loaded = _load(direction, missing)
+            with self._lock:
+                if generation == self._generation:
+                    for user_id, ids in loaded.items():
+                        self._store((direction, user_id), ids, now)
+            found.update(loaded)
+        return found
+
+    def neighbors(self, direction, user_id):
+        return self.neighbors_many(direction, [user_id])[user_id]
+
+    def followers(self, user_id):
+        return self.neighbors(FOLLOWERS, user_id)
+
+    def following(self, user_id):
+        return self.neighbors(FOLLOWING, user_id)
+
+    def add_edge(self, follower_id, following_id):
+        self._update(follower_id, following_id, add=True)
+
+    def remove_edge(self, follower_id, following_id):
+        self._update(follower_id, following_id, add=False)
+
+    def _update(self, follower_id, following_id, add):
+        # Copy on write: readers may hold the old array outside the lock
+        with self._lock:
+            self._generation += 1
+            for key, user_id in (
+                ((FOLLOWING, follower_id), following_id),
+                ((FOLLOWERS, following_id), follower_id),
+            ):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                ids, loaded_at = entry
+                i = bisect_left(ids, user_id)
+                present = i < len(ids) and ids[i] == user_id
+                if add and not present:
+                    ids = ids[:i] + array("q", [user_id]) + ids[i:]
+                elif not add and present:
+                    ids = ids[:i] + ids[i + 1 :]
+                else:
+                    continue
+                self._store(key, ids, loaded_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._edges = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "edges": self._edges,
+                "max_edges": self.max_edges,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_follow_graph():
+    """
+    The process-wide FollowGraph, or None when FOLLOW_GRAPH_ENABLED is off.
+    """
+    global _graph
+    if not settings.FOLLOW_GRAPH_ENABLED:
+        return None
+    with _graph_lock:
+        if _graph is None:
+            _graph = FollowGraph(
+                settings.FOLLOW_GRAPH_MAX_EDGES, settings.FOLLOW_GRAPH_TTL
+            )
+        return _graph
+
+
+def reset_follow_graph():
+    global _graph
+    with _graph_lock:
+        _graph = None
+
+
+def follower_ids(user_id):
+    """
+    Sorted ids of the user's followers.
+    """
+    graph = get_follow_graph()
+    if graph is not None:
+        return graph.followers(user_id)
+    return _load(FOLLOWERS, [user_id])[user_id]
+
+
+def following_ids(user_id):
+    """
+    Sorted ids of the users the user follows.
+    """
+    graph = get_follow_graph()
+    if graph is not None:
+        return graph.following(user_id)
+    return _load(FOLLOWING, [user_id])[user_id]
+
+
+def followers_many(user_ids):
+    """
+    {user_id: sorted follower ids} for many users, at most one query.
+    """
+    graph = get_follow_graph()
+    if graph is not None:
+        return graph.neighbors_many(FOLLOWERS, user_ids)
+    return _load(FOLLOWERS, user_ids)
+
+
+def is_following_many(user_id, user_ids):
+    """
+    The subset of user_ids that the user follows.
+    """
+    graph = get_follow_graph()
+    if graph is not None:
+        following = graph.following(user_id)
+        return {other for other in user_ids if contains(following, other)}
+    # Without the cache only the requested pairs are read, not the whole list
+    return set(
+        Follow.objects.filter(follower=user_id, following__in=user_ids).values_list(
+            "following", flat=True
+        )
+    )
+
+
+def followers_you_know(viewer_id, user_id):
+    """
+    Sorted ids of the user's followers that the viewer follows.
+    """
+    return intersect(following_ids(viewer_id), follower_ids(user_id))
+
+
+def mutual_follows(user_id):
+    """
+    Sorted ids of the users who follow the user and are followed back.
+    """
+    return intersect(follower_ids(user_id), following_ids(user_id))
+
+
+def _after_commit(update, follower_id, following_id):
+    graph = get_follow_graph()
+    if graph is not None:
+        transaction.on_commit(lambda: update(graph, follower_id, following_id))
+
+
+@receiver(post_save, sender=Follow)
+def _follow_created(sender, instance, created, **kwargs):
+    if created:
+        _after_commit(FollowGraph.add_edge, instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def _follow_deleted(sender, instance, **kwargs):
+    _after_commit(FollowGraph.remove_edge, instance.follower_id, instance.following_id)
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from users.recommendations import (
+    BATCH_SIZE,
+    LIMIT,
+    MAX_FANOUT,
+    compute_recommendations,
+)
+
+
+class Command(BaseCommand):
+    help = "Computes the who-to-follow recommendations, meant to run nightly"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only compute the recommendations of this user id (repeatable)",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only users who followed or interacted since the last run",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=LIMIT, help="Recommendations per user"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of users written per transaction",
+        )
+        parser.add_argument(
+            "--max-fanout",
+            type=int,
+            default=MAX_FANOUT,
+            help="Neighbors followed per account or POI, larger ones are sampled",
+        )
+
+    def handle(self, *args, **options):
+        def log(done, total):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{done}/{total} users")
+
+        stats = compute_recommendations(
+            options["user_ids"],
+            incremental=options["incremental"],
+            limit=options["limit"],
+            batch_size=options["batch_size"],
+            max_fanout=options["max_fanout"],
+            log=log,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Computed {stats['rows']} recommendations for {stats['users']} "
+                f"users from {stats['edges']} edges in "
+                f"{stats['load_seconds'] + stats['score_seconds']:.1f}s"
+            )
+        )
@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from pois.models import POI, PoiInteractions
+from pois.bulk_import import import_pois
+from pois.counters import change_reactions
+from pois.feed_store import rebuild_feeds
 from users.models import Follow
 from decimal import Decimal
 import random
@@ -25,17 +28,20 @@ class Command(BaseCommand):
 
         # Create 100 POIs for the main user
         tags = ["food", "event", "school", "photo", "music"]
-        for i in range(100):
-            POI.objects.create(
-                userId=main_user,
-                latitude=Decimal(random.uniform(40.5, 40.9)),  # NYC
-                longitude=Decimal(random.uniform(-74.1, -73.8)),
-                isPublic=True,
-                title=f"Test POI {i+1}",
-                tag=random.choice(tags),
-                description=f"This is a test POI number {i+1}",
-                reactions=0,
-            )
+        import_pois(
+            [
+                {
+                    "latitude": Decimal(random.uniform(40.5, 40.9)),  # NYC
+                    "longitude": Decimal(random.uniform(-74.1, -73.8)),
+                    "isPublic": True,
+                    "title": f"Test POI {i+1}",
+                    "tag": random.choice(tags),
+                    "description": f"This is a test POI number {i+1}",
+                }
+                for i in range(100)
+            ],
+            user_id=main_user.id,
+        )
 
         # Create 7 additional users
         additional_users = []
@@ -68,18 +74,25 @@ class Command(BaseCommand):
             )
 
         # Create POIs for additional users
-        for user in additional_users:
-            for i in range(25):
-                POI.objects.create(
-                    userId=user,
-                    latitude=Decimal(random.uniform(40.5, 40.9)),  # NYC
-                    longitude=Decimal(random.uniform(-74.1, -73.8)),
-                    isPublic=True,
-                    title=f"{user.username}'s POI {i+1}",
-                    tag=random.choice(tags),
-                    description=f"This is {user.username}'s POI number {i+1}",
-                    reactions=random.randint(0, 10),
-                )
+        additional_pois, _ = import_pois(
+            [
+                {
+                    "userId": user.id,
+                    "latitude": Decimal(random.uniform(40.5, 40.9)),  # NYC
+                    "longitude": Decimal(random.uniform(-74.1, -73.8)),
+                    "isPublic": True,
+                    "title": f"{user.username}'s POI {i+1}",
+                    "tag": random.choice(tags),
+                    "description": f"This is {user.username}'s POI number {i+1}",
+                }
+                for user in additional_users
+                for i in range(25)
+            ]
+        )
+        # The importer leaves reaction counts at zero
+        for poi in additional_pois:
+            poi.reactions = random.randint(0, 10)
+        POI.objects.bulk_update(additional_pois, ["reactions"])
 
         # Create interactions from followers to main user's POIs
         main_user_pois = POI.objects.filter(userId=main_user)
@@ -109,7 +122,9 @@ class Command(BaseCommand):
                     ),
                 )
                 if interaction_type == "reaction":
-                    poi.reactions += 1
-                    poi.save()
+                    change_reactions(poi.id, 1)
+
+        # Materialize the feeds for the new follow relationships
+        rebuild_feeds([main_user.id] + [user.id for user in additional_users])
 
         self.stdout.write(self.style.SUCCESS("Successfully created all test data"))
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from users.user_search import trigrams
+
+
+def create_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        # Serves UPPER(username::text) LIKE UPPER(...), as Django builds
+        # istartswith and icontains
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX users_username_trgm_idx ON users_user "
+            'USING GIN (UPPER("username"::text) gin_trgm_ops)'
+        )
+        return
+
+    User = apps.get_model("users", "User")
+    UsernameTrigram = apps.get_model("users", "UsernameTrigram")
+    batch = []
+    for user in User.objects.only("id", "username").iterator():
+        batch.extend(
+            UsernameTrigram(user_id=user.id, gram=gram)
+            for gram in trigrams(user.username)
+        )
+        if len(batch) >= 1000:
+            UsernameTrigram.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        UsernameTrigram.objects.bulk_create(batch)
+
+
+def drop_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS users_username_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_follow"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UsernameTrigram",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("gram", models.CharField(max_length=3)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["gram", "user"], name="username_gram_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "gram"), name="username_user_gram"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
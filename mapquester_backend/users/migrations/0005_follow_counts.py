@@ -0,0 +1,58 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_follows(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    Follow = apps.get_model("users", "Follow")
+
+    def count(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef("pk")})
+                .values(field)
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    User.objects.update(
+        followers_count=count("following"), following_count=count("follower")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_username_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["following", "-created_at", "-id"], name="follow_followers_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["follower", "-created_at", "-id"], name="follow_following_idx"
+            ),
+        ),
+        migrations.RunPython(count_follows, migrations.RunPython.noop),
+    ]
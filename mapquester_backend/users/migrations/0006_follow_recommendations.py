@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_follow_counts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FollowRecommendation",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("score", models.FloatField()),
+                ("mutuals", models.PositiveIntegerField(default=0)),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "candidate",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-score"], name="recommendation_user_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "candidate"),
+                        name="recommendation_user_candidate",
+                    )
+                ],
+            },
+        ),
+    ]
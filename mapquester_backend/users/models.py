@@ -5,6 +5,9 @@ from django.db import models
 class User(AbstractUser):
     # Add any custom fields here
     profile_info = models.TextField(blank=True)
+    # Denormalized Follow counts, kept in sync by users/follow_counts.py
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username
@@ -62,6 +65,62 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ("follower", "following")
+        # Keyset pagination of follower/following lists, newest first
+        indexes = [
+            models.Index(
+                fields=["following", "-created_at", "-id"], name="follow_followers_idx"
+            ),
+            models.Index(
+                fields=["follower", "-created_at", "-id"], name="follow_following_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.follower} follows {self.following}"
+
+
+class UsernameTrigram(models.Model):
+    """
+    Trigram index of usernames for user search on databases without pg_trgm
+    (see users/user_search.py). One row per distinct trigram of a username.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    gram = models.CharField(max_length=3)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "gram"], name="username_user_gram")
+        ]
+        indexes = [models.Index(fields=["gram", "user"], name="username_gram_idx")]
+
+
+class FollowRecommendation(models.Model):
+    """
+    Precomputed "who to follow" candidates of a user, see users/recommendations.py.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    candidate = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+    # Accounts the user follows that follow the candidate
+    mutuals = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "candidate"], name="recommendation_user_candidate"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["user", "-score"], name="recommendation_user_idx")
+        ]
@@ -1,3 +1,425 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+from pois.feed_store import fan_out_poi
+from pois.models import POI, FeedEntry, PoiInteractions
+from users import follow_graph
+from users.follow_graph import FollowGraph, intersect
+from users.models import Follow, FollowRecommendation, UsernameTrigram
+from users.recommendations import Graph, compute_recommendations
+from users.user_search import query_trigrams, rebuild_index, search_page, trigrams
 
-# Create your tests here.
+User = get_user_model()
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        for username in [
+            "anna",
+            "annabel",
+            "hannah",
+            "joanna_k",
+            "Anne",
+            "bob",
+            "bobby.tables",
+        ]:
+            User.objects.create_user(username=username, password="testpass123")
+        self.searcher = User.objects.get(username="bob")
+        self.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.searcher)}"
+        }
+
+    def search(self, username=None, **params):
+        url = (
+            reverse("get_user_detail", args=[username])
+            if username
+            else reverse("get_user")
+        )
+        return self.client.get(url, params, **self.headers)
+
+    def usernames(self, username=None, **params):
+        response = self.search(username, **params)
+        self.assertEqual(response.status_code, 200)
+        return [user["username"] for user in response.json()["users"]]
+
+    def test_trigrams(self):
+        """Test that usernames are padded and lowercased like pg_trgm"""
+        self.assertEqual(trigrams("Bob"), ["  b", " bo", "bob", "ob "])
+        self.assertEqual(query_trigrams("A"), ["  a"])
+        self.assertEqual(query_trigrams("bo"), [" bo"])
+        self.assertEqual(query_trigrams("anna"), ["ann", "nna"])
+
+    def test_ranking(self):
+        """Test exact, then prefix, then substring matches, shortest first"""
+        self.assertEqual(
+            self.usernames("anna"), ["anna", "annabel", "hannah", "joanna_k"]
+        )
+        self.assertEqual(
+            self.usernames("ANN"), ["Anne", "anna", "annabel", "hannah", "joanna_k"]
+        )
+        # Short queries only match the start of usernames
+        self.assertEqual(self.usernames("an"), ["Anne", "anna", "annabel"])
+        self.assertEqual(self.usernames("y.ta"), ["bobby.tables"])
+        self.assertEqual(self.search("zzz").status_code, 404)
+
+    def test_cursor_pagination(self):
+        """Test that pages follow each other without gaps or repeats"""
+        usernames = []
+        cursor = None
+        for _ in range(5):
+            params = {"page_size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.search("ann", **params).json()
+            # Counted on the first page only
+            self.assertEqual(
+                data["count"], None if cursor else len(self.usernames("ann"))
+            )
+            usernames += [user["username"] for user in data["users"]]
+            cursor = data["pagination"]["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(usernames, self.usernames("ann"))
+
+        # Without a username, every user, shortest username first
+        everyone = self.usernames(page_size=100)
+        self.assertEqual(everyone, sorted(everyone, key=lambda name: (len(name), name)))
+        self.assertEqual(len(everyone), User.objects.count())
+        first = self.search(page_size=3).json()
+        self.assertEqual([user["username"] for user in first["users"]], everyone[:3])
+        self.assertEqual(set(first["users"][0]), {"id", "username"})
+        self.assertEqual(first["count"], len(everyone))
+        users, _, count = search_page(User.objects.all(), "", None, 1, ["id"], 2)
+        self.assertEqual((len(users), count), (1, "2+"))
+
+        self.assertEqual(self.search("ann", cursor="nope").status_code, 400)
+
+    def test_index_maintenance_and_query_count(self):
+        """Test renames, rebuilds and the single query per search"""
+        user = User.objects.get(username="hannah")
+        user.username = "zelda"
+        user.save()
+        self.assertNotIn("hannah", self.usernames("ann"))
+        self.assertEqual(self.usernames("zel"), ["zelda"])
+
+        UsernameTrigram.objects.all().delete()
+        self.assertEqual(rebuild_index(), UsernameTrigram.objects.count())
+        self.assertEqual(self.usernames("zel"), ["zelda"])
+
+        self.search("ann")  # Authentication is cached by the first request
+        with self.assertNumQueries(2):  # The user of the token, then the search
+            self.assertEqual(self.search("anna", page_size=2).status_code, 200)
+
+
+class FollowGraphTests(TestCase):
+    def setUp(self):
+        self.celebrity = User.objects.create_user(username="celebrity", password="x")
+        self.fans = [
+            User.objects.create_user(username=f"fan{i}", password="x") for i in range(7)
+        ]
+
+    def toggle(self, follower, following):
+        return self.client.post(
+            reverse("follow_user"),
+            {"followerId": follower.id, "followingId": following.id},
+            content_type="application/json",
+        )
+
+    def listing(self, user, mode, **params):
+        response = self.client.get(
+            reverse("get_followers_or_followings", args=[user.id]),
+            {"mode": mode, **params},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def test_counts_follow_toggle(self):
+        """Test that follow_user keeps both counters in sync and returns them"""
+        for fan in self.fans:
+            response = self.toggle(fan, self.celebrity)
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["followerCount"], 7)
+        self.assertEqual(response.json()["followingCount"], 1)
+
+        response = self.toggle(self.fans[0], self.celebrity)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["followerCount"], 6)
+        self.assertEqual(self.counts(self.celebrity), (6, 0))
+        self.assertEqual(self.counts(self.fans[0]), (0, 0))
+        self.assertEqual(self.counts(self.fans[1]), (0, 1))
+
+        # Deleting a user settles the counts of the other side of its follows
+        self.toggle(self.celebrity, self.fans[1])
+        self.fans[2].delete()
+        self.assertEqual(self.counts(self.celebrity), (5, 1))
+        self.celebrity.delete()
+        self.assertEqual(self.counts(self.fans[1]), (0, 0))
+        self.assertEqual(self.counts(self.fans[3]), (0, 0))
+
+    def test_cursor_pagination(self):
+        """Test that follower lists are paginated newest first with the total"""
+        for fan in self.fans:
+            Follow.objects.create(follower=fan, following=self.celebrity)
+
+        names = []
+        cursor = ""
+        while True:
+            data = self.listing(self.celebrity, "followers", page_size=3, cursor=cursor)
+            self.assertEqual(data["count"], 7)
+            self.assertLessEqual(len(data["followers"]), 3)
+            names += [row["follower__username"] for row in data["followers"]]
+            cursor = data["pagination"]["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(names, [fan.username for fan in reversed(self.fans)])
+        self.assertEqual(
+            set(data["followers"][0]),
+            {"follower__id", "follower__username", "follower__email"},
+        )
+
+        followings = self.listing(self.fans[0], "followings")
+        self.assertEqual(followings["count"], 1)
+        self.assertEqual(
+            followings["followings"][0]["following__id"], self.celebrity.id
+        )
+
+        with self.assertNumQueries(2):
+            self.listing(self.celebrity, "followers", page_size=3)
+        response = self.client.get(
+            reverse("get_followers_or_followings", args=[self.celebrity.id]),
+            {"mode": "followers", "cursor": "bad"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_is_following(self):
+        """Test the bulk is-following check in one query"""
+        for fan in self.fans[:3]:
+            Follow.objects.create(follower=self.celebrity, following=fan)
+        url = reverse("is_following", args=[self.celebrity.id])
+        ids = [fan.id for fan in self.fans[1:5]]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"ids": ",".join(map(str, ids))})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["following"],
+            {
+                str(self.fans[1].id): True,
+                str(self.fans[2].id): True,
+                str(self.fans[3].id): False,
+                str(self.fans[4].id): False,
+            },
+        )
+        response = self.client.get(url, {"ids": [self.fans[0].id, 999]})
+        self.assertEqual(
+            response.json()["following"], {str(self.fans[0].id): True, "999": False}
+        )
+        self.assertEqual(self.client.get(url, {"ids": "1,x"}).status_code, 400)
+        self.assertEqual(self.client.post(url).status_code, 405)
+
+
+@override_settings(FOLLOW_GRAPH_ENABLED=True, FOLLOW_GRAPH_TTL=60)
+class FollowGraphCacheTests(TestCase):
+    def setUp(self):
+        follow_graph.reset_follow_graph()
+        self.addCleanup(follow_graph.reset_follow_graph)
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="x")
+            for i in range(6)
+        ]
+        self.ids = [user.id for user in self.users]
+        # 0 follows 1, 2, 3; 1, 2, 4 follow 5; 5 follows 1 back
+        for a, b in [(0, 1), (0, 2), (0, 3), (1, 5), (2, 5), (4, 5), (5, 1)]:
+            Follow.objects.create(follower=self.users[a], following=self.users[b])
+
+    def test_intersect(self):
+        """Test the merge and binary search intersections"""
+        self.assertEqual(intersect([1, 3, 5, 7], [2, 3, 4, 7, 9]), [3, 7])
+        self.assertEqual(intersect([5], list(range(0, 1000, 5))), [5])
+        self.assertEqual(intersect([], [1, 2]), [])
+
+    def test_lazy_load_and_updates(self):
+        """Test that lists load once, then follow_user keeps them current"""
+        graph = follow_graph.get_follow_graph()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                list(graph.followers(self.ids[5])), self.ids[1:3] + [self.ids[4]]
+            )
+        with self.assertNumQueries(0):
+            graph.followers(self.ids[5])
+        self.assertEqual(graph.stats()["hits"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("follow_user"),
+                {"followerId": self.ids[3], "followingId": self.ids[5]},
+                content_type="application/json",
+            )
+            self.client.post(
+                reverse("follow_user"),
+                {"followerId": self.ids[1], "followingId": self.ids[5]},
+                content_type="application/json",
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(follow_graph.follower_ids(self.ids[5])),
+                [self.ids[2], self.ids[3], self.ids[4]],
+            )
+
+        # The feed fan-out reads the followers from the graph
+        poi = POI.objects.create(
+            userId=self.users[5],
+            title="POI",
+            description="Test Description",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+        with self.assertNumQueries(1):  # The feed entries insert
+            fan_out_poi(poi)
+        self.assertCountEqual(
+            FeedEntry.objects.filter(poiId=poi).values_list("userId", flat=True),
+            [self.ids[2], self.ids[3], self.ids[4]],
+        )
+
+    def test_eviction(self):
+        """Test that the edge budget evicts the least recently used lists"""
+        graph = FollowGraph(max_edges=4, ttl=60)
+        graph.following(self.ids[0])  # 3 ids
+        graph.followers(self.ids[1])  # 2 ids, evicts user 0's list
+        self.assertEqual(graph.stats()["edges"], 2)
+        self.assertEqual(graph.stats()["evictions"], 1)
+        graph.followers(self.ids[5])  # 3 ids, evicts user 1's list
+        self.assertEqual(graph.stats()["entries"], 1)
+        # Larger than the whole budget: answered, not cached
+        big = FollowGraph(max_edges=2, ttl=60)
+        self.assertEqual(len(big.following(self.ids[0])), 3)
+        self.assertEqual(big.stats()["entries"], 0)
+
+    def test_endpoints(self):
+        """Test is-following, viewer flags and followers you know from the graph"""
+        viewer = self.ids[0]
+        follow_graph.following_ids(viewer)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("is_following", args=[viewer]),
+                {"ids": f"{self.ids[1]},{self.ids[4]}"},
+            )
+        self.assertEqual(
+            response.json()["following"],
+            {str(self.ids[1]): True, str(self.ids[4]): False},
+        )
+
+        response = self.client.get(
+            reverse("get_followers_you_know", args=[self.ids[5]]),
+            {"viewerId": viewer, "limit": 1},
+        )
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual(
+            response.json()["users"], [{"id": self.ids[1], "username": "user1"}]
+        )
+        self.assertEqual(follow_graph.mutual_follows(self.ids[5]), [self.ids[1]])
+        with self.settings(FOLLOW_GRAPH_ENABLED=False):
+            self.assertEqual(
+                follow_graph.followers_you_know(viewer, self.ids[5]), self.ids[1:3]
+            )
+
+        data = self.client.get(
+            reverse("get_followers_or_followings", args=[self.ids[5]]),
+            {"mode": "followers", "viewerId": viewer},
+        ).json()
+        self.assertEqual(
+            {row["follower__id"]: row["viewer_follows"] for row in data["followers"]},
+            {self.ids[1]: True, self.ids[2]: True, self.ids[4]: False},
+        )
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="x")
+            for i in range(7)
+        ]
+        self.ids = [user.id for user in self.users]
+        # 0 follows 1 and 2, who both follow 3; 1 also follows 4
+        for a, b in [(0, 1), (0, 2), (1, 3), (1, 4), (2, 3)]:
+            Follow.objects.create(follower=self.users[a], following=self.users[b])
+        # 0 and 6 reacted to a POI of 5
+        poi = POI.objects.create(
+            userId=self.users[5],
+            title="POI",
+            description="Test Description",
+            tag="food",
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+        for user in (self.users[0], self.users[6]):
+            PoiInteractions.objects.create(
+                userId=user, poiId=poi, interactionType="reaction"
+            )
+
+    def recommended(self, user):
+        return list(
+            FollowRecommendation.objects.filter(user=user)
+            .order_by("-score")
+            .values_list("candidate", "mutuals")
+        )
+
+    def test_graph(self):
+        """Test the compressed sparse row adjacency"""
+        graph = Graph.from_pairs([(0, 2), (0, 3), (2, 1)], 4)
+        self.assertEqual(list(graph.offsets), [0, 2, 2, 3, 3])
+        self.assertEqual(list(graph.neighbors(0)), [2, 3])
+        self.assertEqual(list(graph.neighbors(1)), [])
+        self.assertEqual(list(graph.neighbors(9)), [])
+
+    def test_compute(self):
+        """Test friends of friends and co-interaction scores, best first"""
+        stats = compute_recommendations()
+        self.assertEqual(stats["users"], 7)
+        ids = self.ids
+        # 3 through two follows, 5 authored the POI, 4 through the follow of a
+        # busier account, 6 reacted to the same POI
+        self.assertEqual(
+            self.recommended(ids[0]),
+            [(ids[3], 2), (ids[5], 0), (ids[4], 1), (ids[6], 0)],
+        )
+        # Already followed accounts and the user itself are never recommended
+        self.assertEqual(self.recommended(ids[1]), [])
+        self.assertEqual(compute_recommendations(limit=1)["rows"], 2)
+        self.assertEqual(self.recommended(ids[0]), [(ids[3], 2)])
+
+    def test_endpoint_and_incremental(self):
+        """Test serving the table and recomputing only the changed users"""
+        ids = self.ids
+        compute_recommendations()
+        url = reverse("get_recommendations", args=[ids[0]])
+        data = self.client.get(url, {"limit": 2}).json()
+        self.assertEqual(
+            [(row["id"], row["mutuals"]) for row in data["recommendations"]],
+            [(ids[3], 2), (ids[5], 0)],
+        )
+        self.assertEqual(data["recommendations"][0]["username"], "user3")
+        self.assertEqual(self.client.get(url, {"limit": "x"}).status_code, 400)
+
+        # A new follow is hidden right away, then dropped by the incremental run
+        self.client.post(
+            reverse("follow_user"),
+            {"followerId": ids[0], "followingId": ids[3]},
+            content_type="application/json",
+        )
+        data = self.client.get(url, {"limit": 2}).json()
+        self.assertEqual(
+            [row["id"] for row in data["recommendations"]], [ids[5], ids[4]]
+        )
+        stats = compute_recommendations(incremental=True)
+        self.assertEqual(stats["users"], 1)
+        self.assertEqual(
+            self.recommended(ids[0]), [(ids[5], 0), (ids[4], 1), (ids[6], 0)]
+        )
+        self.assertEqual(compute_recommendations(incremental=True)["users"], 0)
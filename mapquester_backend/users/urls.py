@@ -1,7 +1,13 @@
 from django.urls import path
 
 from . import views
-from .followViews import follow_user, get_followers_or_followings
+from .followViews import (
+    follow_user,
+    get_followers_or_followings,
+    get_followers_you_know,
+    get_recommendations,
+    is_following,
+)
 
 urlpatterns = [
     # Define the paths for user-related functionalities
@@ -19,4 +25,15 @@ urlpatterns = [
         get_followers_or_followings,
         name="get_followers_or_followings",
     ),
+    path("<int:user_id>/is_following/", is_following, name="is_following"),
+    path(
+        "<int:user_id>/followers_you_know/",
+        get_followers_you_know,
+        name="get_followers_you_know",
+    ),
+    path(
+        "<int:user_id>/recommendations/",
+        get_recommendations,
+        name="get_recommendations",
+    ),
 ]
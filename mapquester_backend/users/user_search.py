@@ -0,0 +1,197 @@
+# Typeahead user search by username. Queries of three characters or more match
+# anywhere in the username, shorter ones match its start. Results are ranked
+# exact match first, then prefix matches, then other matches, shorter usernames
+# first, and paginated with a keyset cursor on that order, so each call is a
+# single query however deep the page.
+#
+# Two backends maintain the index:
+# - PostgreSQL: a pg_trgm GIN index on UPPER(username), created by migration
+#   0004. It serves the LIKE patterns of istartswith/icontains directly.
+# - elsewhere (SQLite): the UsernameTrigram table, the trigrams of each padded,
+#   lowercased username ("  ab", " abc", "bc "...). Candidates are the users
+#   holding every trigram of the query, then checked with the real predicate.
+#   Kept current by the User post_save signal and index_users() for bulk writes.
+
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import UsernameTrigram
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+# Trigrams of a query checked through the index, the predicate checks the rest
+MAX_QUERY_GRAMS = 6
+# Match classes, in rank order
+EXACT, PREFIX, CONTAINS = 0, 1, 2
+ORDER_KEYS = ("match", "length", "username")
+
+
+def uses_trigram_index():
+    return connection.vendor == "postgresql"
+
+
+def trigrams(username):
+    """
+    Distinct trigrams of a username, padded like pg_trgm: two spaces in front
+    and one behind, so the first trigrams mark the start of the name.
+    """
+    padded = f"  {username.lower()} "
+    grams = []
+    for i in range(len(padded) - 2):
+        if padded[i : i + 3] not in grams:
+            grams.append(padded[i : i + 3])
+    return grams
+
+
+def query_trigrams(q):
+    # Short queries only match prefixes, through the padded leading trigram
+    q = q.lower()
+    if len(q) < 3:
+        return [f"{' ' * (3 - len(q))}{q}"]
+    return [q[i : i + 3] for i in range(len(q) - 2)][:MAX_QUERY_GRAMS]
+
+
+def index_users(users, batch_size=BATCH_SIZE):
+    """
+    (Re)build the trigrams of the given users. A no-op on PostgreSQL.
+    """
+    if uses_trigram_index():
+        return 0
+    users = list(users)
+    UsernameTrigram.objects.filter(user__in=[user.id for user in users]).delete()
+    rows = [
+        UsernameTrigram(user_id=user.id, gram=gram)
+        for user in users
+        for gram in trigrams(user.username)
+    ]
+    UsernameTrigram.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def index_queryset(queryset, batch_size=BATCH_SIZE):
+    """
+    Index the users of a queryset in batches. Returns the number of trigrams.
+    """
+    if uses_trigram_index():
+        return 0
+    count = 0
+    batch = []
+    for user in queryset.only("id", "username").iterator(chunk_size=batch_size):
+        batch.append(user)
+        if len(batch) >= batch_size:
+            count += index_users(batch, batch_size)
+            batch = []
+    return count + (index_users(batch, batch_size) if batch else 0)
+
+
+def rebuild_index(batch_size=BATCH_SIZE):
+    """
+    Index every user from scratch. Returns the number of trigrams written.
+    """
+    if uses_trigram_index():
+        return 0
+    UsernameTrigram.objects.all().delete()
+    return index_queryset(User.objects.all(), batch_size)
+
+
+@receiver(post_save, sender=User)
+def _user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only write last_login
+    if update_fields is not None and "username" not in update_fields:
+        return
+    index_users([instance])
+
+
+def encode_cursor(values):
+    payload = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor back into (match, length, username). Raises ValueError if it
+    is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        match, length, username = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(match), int(length), str(username)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def cursor_q(cursor):
+    """
+    Keyset predicate selecting users after the cursor in ORDER_KEYS order. An
+    empty cursor selects from the first row.
+    """
+    if not cursor:
+        return Q()
+    match, length, username = decode_cursor(cursor)
+    return (
+        Q(match__gt=match)
+        | Q(match=match, length__gt=length)
+        | Q(match=match, length=length, username__gt=username)
+    )
+
+
+def search_users(queryset, q=""):
+    """
+    Filter a user queryset to the matches of q, annotated with `match` and
+    `length` and ordered by ORDER_KEYS. An empty q matches every user.
+    """
+    q = q.strip()
+    if not q:
+        return queryset.annotate(
+            match=Value(CONTAINS, output_field=IntegerField()),
+            length=Length("username"),
+        ).order_by(*ORDER_KEYS)
+
+    lookup = "username__istartswith" if len(q) < 3 else "username__icontains"
+    if not uses_trigram_index():
+        for gram in query_trigrams(q):
+            queryset = queryset.filter(
+                id__in=UsernameTrigram.objects.filter(gram=gram).values("user")
+            )
+    return (
+        queryset.filter(**{lookup: q})
+        .annotate(
+            match=Case(
+                When(username__iexact=q, then=Value(EXACT)),
+                When(username__istartswith=q, then=Value(PREFIX)),
+                default=Value(CONTAINS),
+                output_field=IntegerField(),
+            ),
+            length=Length("username"),
+        )
+        .order_by(*ORDER_KEYS)
+    )
+
+
+def search_page(queryset, q, cursor, page_size, fields, count_limit=0):
+    """
+    One page of search results as dicts of `fields`, the cursor of the next page
+    (None on the last page) and the number of matches. The count comes from the
+    same query: on the first page up to count_limit matches are read, and more
+    are reported as "<count_limit>+". It is None on later pages. Raises
+    ValueError on a malformed cursor.
+    """
+    limit = page_size if cursor else max(page_size, count_limit)
+    rows = search_users(queryset, q).filter(cursor_q(cursor))
+    rows = list(rows.values(*dict.fromkeys([*fields, *ORDER_KEYS]))[: limit + 1])
+    count = None
+    if not cursor:
+        count = len(rows) if len(rows) <= count_limit else f"{count_limit}+"
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][key] for key in ORDER_KEYS)
+    return [{field: row[field] for field in fields} for row in rows], next_cursor, count
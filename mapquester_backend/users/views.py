@@ -1,12 +1,24 @@
+import logging
+
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from pois.pagination import parse_page_size
 from .forms import UserRegisterForm, UserLoginForm
+from .user_search import search_page
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+USER_PAGE_SIZE = 20
+MAX_USER_PAGE_SIZE = 100
+# Matches counted on the first page, beyond it the count is reported as "100+"
+USER_COUNT_LIMIT = 100
+USER_SEARCH_FIELDS = ("id", "username", "email", "profile_info")
+USER_LIST_FIELDS = ("id", "username")
 
 
 @api_view(["POST"])
@@ -54,7 +66,6 @@ def login(request):
 def logout(request):
     try:
         refresh_token = request.data["refresh_token"]
-        print(refresh_token)
         token = RefreshToken(refresh_token)
         token.blacklist()
         return Response(
@@ -62,7 +73,7 @@ def logout(request):
             status=status.HTTP_205_RESET_CONTENT,
         )
     except Exception as e:
-        print(f"Error during logout: {str(e)}")
+        logger.warning("Error during logout: %s", e)
         return Response(
             {"error": "Invalid token or token not provided."},
             status=status.HTTP_400_BAD_REQUEST,
@@ -98,24 +109,47 @@ def delete_account(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_user(request, username=None):
-    if username:
-        users = User.objects.filter(username__icontains=username).values(
-            "id", "username", "email", "profile_info"
+    """
+    Typeahead user search, best match first, see users/user_search.py.
+    Query Parameters:
+    - `cursor`: next_cursor of the previous page, absent for the first page
+    - `page_size`: number of users per page, at most MAX_USER_PAGE_SIZE
+    Without a username, pages through all users, shortest username first, then
+    alphabetically. `count` is the number of matching users on the first page,
+    "100+" past USER_COUNT_LIMIT, and null on later pages.
+    """
+    fields = USER_SEARCH_FIELDS if username else USER_LIST_FIELDS
+    try:
+        page_size = min(
+            parse_page_size(request.GET, USER_PAGE_SIZE), MAX_USER_PAGE_SIZE
+        )
+        users, next_cursor, count = search_page(
+            User.objects.all(),
+            username or "",
+            request.GET.get("cursor"),
+            page_size,
+            fields,
+            USER_COUNT_LIMIT,
         )
-        if users.exists():
-            return Response(
-                {"users": list(users), "count": users.count()},
-                status=status.HTTP_200_OK,
-            )
+    except ValueError:
         return Response(
-            {"error": "No users found matching the criteria"},
-            status=status.HTTP_404_NOT_FOUND,
+            {"error": "Invalid pagination parameters"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
-    else:
-        users = User.objects.all().values("id", "username")
+
+    if username and not users and not request.GET.get("cursor"):
         return Response(
-            {"users": list(users), "count": users.count()}, status=status.HTTP_200_OK
+            {"error": "No users found matching the criteria"},
+            status=status.HTTP_404_NOT_FOUND,
         )
+    return Response(
+        {
+            "users": users,
+            "count": count,
+            "pagination": {"page_size": page_size, "next_cursor": next_cursor},
+        },
+        status=status.HTTP_200_OK,
+    )
 
 
 @api_view(["GET"])
@@ -128,6 +162,8 @@ def get_exact_user(request, id):
             "username": user.username,
             "email": user.email,
             "profile_info": getattr(user, "profile_info", None),
+            "followers_count": user.followers_count,
+            "following_count": user.following_count,
         }
         return Response(user_data, status=status.HTTP_200_OK)
     except User.DoesNotExist:
@@ -19,7 +19,8 @@ export default function Profile({ params }: { params: { userId: string } }) {
     followers: [],
     followings: [],
     followerCount: 0,
-    followingCount: 0
+    followingCount: 0,
+    viewerFollows: {}
   });
   const [isFollowing, setIsFollowing] = useState(false);
 
@@ -52,14 +53,12 @@ export default function Profile({ params }: { params: { userId: string } }) {
       try {
         const [profileRes, metadata] = await Promise.all([
           apiClient.get(`/api/v1/users/exact-user/${params.userId}/`),
-          fetchFollowMetadata(params.userId),
+          fetchFollowMetadata(params.userId, auth.id),
         ]);
 
         setProfile(profileRes.data);
         setFollowMetadata(metadata);
-        setIsFollowing(metadata.followers.some(
-          (follower: any) => follower.follower__id.toString() === auth.id
-        ));
+        setIsFollowing(metadata.viewerFollows[params.userId] ?? false);
       } catch (error) {
         console.error('Error fetching profile:', error);
       }
@@ -70,7 +69,7 @@ export default function Profile({ params }: { params: { userId: string } }) {
 
   const handleFollowChange = async () => {
     // Production mode
-    const metadata = await fetchFollowMetadata(params.userId);
+    const metadata = await fetchFollowMetadata(params.userId, auth.id);
     setFollowMetadata(metadata);
     setIsFollowing(!isFollowing);
   };
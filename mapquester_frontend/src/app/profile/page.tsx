@@ -23,7 +23,8 @@ const Profile = () => {
     followers: [],
     followings: [],
     followerCount: 0,
-    followingCount: 0
+    followingCount: 0,
+    viewerFollows: {}
   });
   const [isSearching, setIsSearching] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
@@ -315,9 +316,7 @@ const Profile = () => {
                   <FollowButton
                     followerId={auth.id}
                     followingId={follower.follower__id}
-                    isFollowing={followMetadata.followings.some(
-                      following => String(following.following__id) === String(follower.follower__id)
-                    )}
+                    isFollowing={followMetadata.viewerFollows[String(follower.follower__id)] ?? false}
                     onFollowChange={async () => {
                       const metadata = await fetchFollowMetadata(auth.id);
                       setFollowMetadata(metadata);
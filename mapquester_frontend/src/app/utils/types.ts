@@ -46,4 +46,6 @@ export interface FollowMetadata {
       followings: Following[];
       followerCount: number;
       followingCount: number;
+      // Whether the viewing user follows each user id
+      viewerFollows: Record<string, boolean>;
 }
\ No newline at end of file
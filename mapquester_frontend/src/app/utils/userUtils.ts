@@ -1,21 +1,57 @@
 import apiClient from '../api/axios';
 import { FollowMetadata } from './types';
 
-export const fetchFollowMetadata = async (userId: string): Promise<FollowMetadata> => {
+// First page of each list, the counts come from the server's totals
+const FOLLOW_PAGE_SIZE = 100;
+
+// Which of the given users the viewer follows, in one request
+export const fetchIsFollowing = async (
+  viewerId: string,
+  userIds: string[]
+): Promise<Record<string, boolean>> => {
+  if (!viewerId || userIds.length === 0) return {};
+  try {
+    const response = await apiClient.get(`/api/v1/users/${viewerId}/is_following/`, {
+      params: { ids: userIds.join(',') }
+    });
+    return response.data.following || {};
+  } catch (error) {
+    console.error('Error checking follows:', error);
+    return {};
+  }
+};
+
+export const fetchFollowMetadata = async (
+  userId: string,
+  viewerId: string = userId
+): Promise<FollowMetadata> => {
   try {
     const [followersRes, followingsRes] = await Promise.all([
-      apiClient.get(`/api/v1/users/${userId}/followers_or_followings/?mode=followers`),
-      apiClient.get(`/api/v1/users/${userId}/followers_or_followings/?mode=followings`)
+      apiClient.get(`/api/v1/users/${userId}/followers_or_followings/`, {
+        params: { mode: 'followers', page_size: FOLLOW_PAGE_SIZE }
+      }),
+      apiClient.get(`/api/v1/users/${userId}/followers_or_followings/`, {
+        params: { mode: 'followings', page_size: FOLLOW_PAGE_SIZE }
+      })
+    ]);
+    const followers = followersRes.data.followers || [];
+    const followings = followingsRes.data.followings || [];
+
+    // Follow buttons of the profile itself and of the listed followers
+    const viewerFollows = await fetchIsFollowing(viewerId, [
+      userId,
+      ...followers.map((follower: { follower__id: string }) => String(follower.follower__id))
     ]);
 
     return {
-      followers: followersRes.data.followers || [],
-      followings: followingsRes.data.followings || [],
-      followerCount: followersRes.data.followers?.length || 0,
-      followingCount: followingsRes.data.followings?.length || 0
+      followers,
+      followings,
+      followerCount: followersRes.data.count ?? followers.length,
+      followingCount: followingsRes.data.count ?? followings.length,
+      viewerFollows
     };
   } catch (error) {
     console.error('Error fetching follow counts:', error);
-    return { followers: [], followings: [], followerCount: 0, followingCount: 0 };
+    return { followers: [], followings: [], followerCount: 0, followingCount: 0, viewerFollows: {} };
   }
-}; 
\ No newline at end of file
+}; 